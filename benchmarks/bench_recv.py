@@ -0,0 +1,111 @@
+# -*- encoding: utf-8 -*-
+"""
+Benchmark: reading large OMP responses
+======================================
+Compares the number of recv calls and wall time needed to read a response
+with the fixed 1024 byte loop pyvas used before and the growing
+`ResponseReader`. The socket is simulated, each recv returns at most one TLS
+record (16 KiB) worth of data and every `STALL_EVERY` calls only part of a
+record has arrived, like on a busy manager.
+
+Usage:
+
+    $ python benchmarks/bench_recv.py            # 1 MB, 50 MB and 500 MB
+    $ python benchmarks/bench_recv.py 1 10       # sizes in MB
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+from lxml import etree
+
+from pyvas.stream import ResponseParser
+from pyvas.stream import ResponseReader
+
+
+TLS_RECORD_SIZE = 16 * 1024
+STALL_EVERY = 500
+MB = 1024 * 1024
+
+HEAD = b'<get_reports_response status="200" status_text="OK"><report>'
+TAIL = b'</report></get_reports_response>'
+RESULT = (b'<result id="a4e5f0c1-7f8e-4c63-b8c9-000000000000">'
+          b'<name>OpenSSH Detection</name><host>10.0.0.1</host>'
+          b'<port>22/tcp</port><nvt oid="1.3.6.1.4.1.25623.1.0.10267"/>'
+          b'<severity>0.0</severity><description>' + b'x' * 400 +
+          b'</description></result>')
+
+
+class SimulatedSocket(object):
+    """Serves a generated response of `size` bytes without holding it."""
+
+    def __init__(self, size):
+        self.remaining = max(size - len(HEAD) - len(TAIL), 0)
+        self.buffer = HEAD
+        self.tail_sent = False
+        self.recv_calls = 0
+
+    def _fill(self, size):
+        while len(self.buffer) < size and not self.tail_sent:
+            if self.remaining > 0:
+                count = max(min(self.remaining // len(RESULT), 256), 1)
+                self.buffer += RESULT * count
+                self.remaining -= len(RESULT) * count
+            else:
+                self.buffer += TAIL
+                self.tail_sent = True
+
+    def recv(self, size):
+        self.recv_calls += 1
+        size = min(size, TLS_RECORD_SIZE)
+        if self.recv_calls % STALL_EVERY == 0:
+            size = min(size, 512)
+        self._fill(size)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def legacy_read(sock):
+    """The pre-streaming read loop: stop on the first short read."""
+    block_size = 1024
+    parser = etree.XMLParser()
+    received = 0
+    while True:
+        response = sock.recv(block_size)
+        received += len(response)
+        parser.feed(response)
+        if len(response) < block_size:
+            break
+    return received
+
+
+def streaming_read(sock):
+    reader = ResponseReader(sock, ResponseParser())
+    reader.read()
+    return reader.bytes_received
+
+
+def run(name, func, size):
+    sock = SimulatedSocket(size)
+    start = time.time()
+    try:
+        received = func(sock)
+        complete = sock.tail_sent and not sock.buffer
+    except etree.XMLSyntaxError:
+        received, complete = None, False
+    elapsed = time.time() - start
+    print("{:<10} {:>8} MB {:>12} recv {:>9.3f} s  complete={}".format(
+        name, size // MB, sock.recv_calls, elapsed, complete))
+    return received
+
+
+def main(argv):
+    sizes = [int(arg) for arg in argv] or [1, 50, 500]
+    for size in sizes:
+        run("legacy", legacy_read, size * MB)
+        run("streaming", streaming_read, size * MB)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
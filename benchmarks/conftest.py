@@ -0,0 +1,187 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas benchmark configuration with pytest-benchmark
+===================================================
+Fixtures build real-sized OMP responses once per session. Benchmarks on
+100k result reports only run with --slow.
+
+Usage:
+
+    $ tox -e bench
+    $ tox -e bench -- pytest benchmarks --benchmark-only --slow
+
+Besides time, each benchmark run through the `measure` fixture records the
+peak Python heap allocated by a single call as `peak_memory` in the extra
+info of the results (`--benchmark-json`). Memory allocated by libxml2 for
+element trees is not traced.
+"""
+import tracemalloc
+
+import pytest
+from lxml import etree
+
+
+def pytest_addoption(parser):
+    parser.addoption("--slow", action="store_true", help="run slow tests")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: needs the --slow option")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--slow"):
+        return
+    skip = pytest.mark.skip(reason="need --slow option to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+TASK = (
+    '<task id="{0:08d}-1a2b-4c3d-8e9f-a0b1c2d3e4f5">'
+    '<owner><name>admin</name></owner><name>Scan {0}</name><comment/>'
+    '<creation_time>2017-05-30T16:55:01Z</creation_time>'
+    '<modification_time>2017-05-30T17:05:01Z</modification_time>'
+    '<writable>1</writable><in_use>0</in_use><permissions>'
+    '<permission><name>Everything</name></permission></permissions>'
+    '<alterable>0</alterable><usage_type>scan</usage_type>'
+    '<config id="daba56c8-73ec-11df-a475-002264764cea">'
+    '<name>Full and fast</name><trash>0</trash></config>'
+    '<target id="b493b7a8-7489-11df-a3ec-002264764cea">'
+    '<name>Target {0}</name><trash>0</trash></target>'
+    '<hosts_ordering/><scanner id="08b69003-5fc2-4037-a479-93b440211c73">'
+    '<name>OpenVAS Default</name><type>2</type></scanner>'
+    '<status>Done</status><progress>-1</progress>'
+    '<report_count>3<finished>3</finished></report_count>'
+    '<trend/><schedule id=""><name/><trash>0</trash></schedule>'
+    '<schedule_periods>0</schedule_periods>'
+    '<preferences><preference><name>Maximum concurrently executed NVTs'
+    '</name><scanner_name>max_checks</scanner_name><value>4</value>'
+    '</preference><preference><name>Maximum concurrently scanned hosts'
+    '</name><scanner_name>max_hosts</scanner_name><value>20</value>'
+    '</preference></preferences></task>'
+)
+
+RESULT = (
+    '<result id="{0:08d}-9f8e-4d7c-b6a5-f4e3d2c1b0a9">'
+    '<name>OpenSSH Detection {0}</name><owner><name>admin</name></owner>'
+    '<comment/><creation_time>2017-05-30T16:55:01Z</creation_time>'
+    '<modification_time>2017-05-30T16:55:01Z</modification_time>'
+    '<host>10.0.{1}.{2}<asset asset_id="a1"/>'
+    '<hostname>host{0}.example.com</hostname></host>'
+    '<port>22/tcp</port><nvt oid="1.3.6.1.4.1.25623.1.0.{0}">'
+    '<type>nvt</type><name>OpenSSH Detection</name><family>Service '
+    'detection</family><cvss_base>5.0</cvss_base>'
+    '<tags>cvss_base_vector=AV:N/AC:L/Au:N/C:N/I:N/A:N|summary=Detects '
+    'the installed version.</tags></nvt><scan_nvt_version/>'
+    '<threat>Medium</threat><severity>5.0</severity><qod><value>80</value>'
+    '<type>remote_banner</type></qod><description>Installed version: 7.4'
+    '</description><original_threat>Medium</original_threat>'
+    '<original_severity>5.0</original_severity>'
+    '<detection><result id="d{0}"><details><detail><name>product</name>'
+    '<value>cpe:/a:openbsd:openssh:7.4</value></detail></details>'
+    '</result></detection></result>'
+)
+
+
+PREFERENCE = (
+    '<preference><nvt oid="1.3.6.1.4.1.25623.1.0.{0}"><name>NVT {0}</name>'
+    '</nvt><id>{1}</id><hr_name>Preference {1}</hr_name>'
+    '<name>Preference {1}</name><type>radio</type><value>yes</value>'
+    '<alt>no</alt><alt>auto</alt><default>yes</default></preference>'
+)
+
+FAMILY = (
+    '<family><name>Family {0}</name><nvt_count>{1}<growing>0</growing>'
+    '</nvt_count><max_nvt_count>{1}</max_nvt_count><growing>1</growing>'
+    '</family>'
+)
+
+
+def tasks_xml(count):
+    return ('<get_tasks_response status="200" status_text="OK">' +
+            "".join(TASK.format(i) for i in range(count)) +
+            '<task_count>{0}<filtered>{0}</filtered><page>{0}</page>'
+            '</task_count></get_tasks_response>'.format(count)
+            ).encode("utf-8")
+
+
+def report_xml(count):
+    return ('<get_reports_response status="200" status_text="OK">'
+            '<report id="r1" content_type="text/xml" format_id="x">'
+            '<report id="r1"><results start="1" max="-1">' +
+            "".join(RESULT.format(i, i // 250 % 250, i % 250)
+                    for i in range(count)) +
+            '</results><result_count>{0}<full>{0}</full></result_count>'
+            '</report></report></get_reports_response>'.format(count)
+            ).encode("utf-8")
+
+
+def config_xml(count):
+    """A get_configs response for a config with `count` NVT preferences,
+    as requested with preferences="1" families="1"."""
+    return ('<get_configs_response status="200" status_text="OK">'
+            '<config id="daba56c8-73ec-11df-a475-002264764cea">'
+            '<owner><name/></owner><name>Full and fast</name><comment/>'
+            '<family_count>64<growing>1</growing></family_count>'
+            '<nvt_count>{0}<growing>1</growing></nvt_count><type>0</type>'
+            '<preferences>'.format(count) +
+            "".join(PREFERENCE.format(i // 4, i % 4 + 1)
+                    for i in range(count)) +
+            '</preferences><nvt_selectors><nvt_selector><name>s</name>'
+            '<include>1</include><type>0</type><family_or_nvt/>'
+            '</nvt_selector></nvt_selectors><families>' +
+            "".join(FAMILY.format(i, count // 64) for i in range(64)) +
+            '</families><tasks><task id="t"><name>Scan</name></task></tasks>'
+            '</config></get_configs_response>').encode("utf-8")
+
+
+@pytest.fixture
+def measure(benchmark):
+    """Benchmark a call, recording the peak Python heap of one call."""
+    def run(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory"] = peak
+        return benchmark(func, *args, **kwargs)
+    return run
+
+
+@pytest.fixture(scope="session")
+def tasks_10k_xml():
+    return tasks_xml(10000)
+
+
+@pytest.fixture(scope="session")
+def report_100k_xml():
+    return report_xml(100000)
+
+
+@pytest.fixture(scope="session")
+def config_xml_5k():
+    return config_xml(5000)
+
+
+@pytest.fixture(scope="session")
+def tasks_10k():
+    return etree.fromstring(tasks_xml(10000))
+
+
+@pytest.fixture(scope="session")
+def report_10k():
+    return etree.fromstring(report_xml(10000))
+
+
+@pytest.fixture(scope="session")
+def report_100k(report_100k_xml):
+    return etree.fromstring(report_100k_xml, etree.XMLParser(huge_tree=True))
+
+
+@pytest.fixture(scope="session")
+def config_5k(config_xml_5k):
+    return etree.fromstring(config_xml_5k)
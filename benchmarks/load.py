@@ -0,0 +1,131 @@
+# -*- encoding: utf-8 -*-
+"""
+Load test: pyvas Client against an in-process manager
+=====================================================
+Starts a `pyvas.testing.FakeManager` and drives it with a number of client
+threads, each with its own connection, running a mix of list, get and
+report commands. Reports throughput and per command latency percentiles
+from `pyvas.metrics.MetricsCollector`.
+
+Usage:
+
+    $ python benchmarks/load.py
+    $ python benchmarks/load.py --clients 16 --duration 30 --latency 0.005 \\
+          --jitter 0.002 --report-size 10000 --parse-mode dict
+
+With --aimd, the clients share a `pyvas.governor.AIMDLimit`.
+"""
+from __future__ import print_function
+
+import argparse
+import threading
+import time
+
+from pyvas import Client
+from pyvas.governor import AIMDLimit
+from pyvas.metrics import MetricsCollector
+from pyvas.testing import FakeManager
+
+
+USERNAME = PASSWORD = "admin"
+
+
+def setup(manager, targets, tasks):
+    """Create targets and finished tasks, returns task and report ids."""
+    with Client(manager.host, username=USERNAME, password=PASSWORD,
+                port=manager.port) as cli:
+        config = cli.list_configs(name="empty")[0]["@id"]
+        target_ids = [cli.create_target("target {}".format(i), "127.0.0.1")
+                      .xml.get("id") for i in range(targets)]
+        task_ids = []
+        for i in range(tasks):
+            task = cli.create_task("task {}".format(i), config,
+                                   target_ids[i % targets])
+            task_ids.append(task.xml.get("id"))
+            cli.start_task(task_ids[-1])
+        cli.wait_for_tasks(task_ids, min_interval=0.01)
+        report_ids = [report["@id"] for report in cli.list_reports()]
+    return task_ids, report_ids
+
+
+def worker(manager, args, metrics, task_ids, report_ids, deadline, errors,
+           governor):
+    cli = Client(manager.host, username=USERNAME, password=PASSWORD,
+                 port=manager.port, parse_mode=args.parse_mode,
+                 governor=governor)
+    metrics.register(cli)
+    cli.open()
+    try:
+        i = 0
+        while time.time() < deadline:
+            try:
+                if i % args.report_every == 0:
+                    cli.download_report(report_ids[i % len(report_ids)])
+                elif i % 2:
+                    cli.list_targets().data
+                else:
+                    cli.get_task(task_ids[i % len(task_ids)]).data
+            except Exception as error:  # noqa, counted and reported
+                errors.append(error)
+            i += 1
+    finally:
+        cli.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--report-size", type=int, default=1000)
+    parser.add_argument("--report-every", type=int, default=20,
+                        help="download a report every N commands")
+    parser.add_argument("--targets", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--parse-mode", choices=("tree", "dict"),
+                        default="tree")
+    parser.add_argument("--aimd", action="store_true",
+                        help="limit commands in flight with AIMD")
+    args = parser.parse_args(argv)
+
+    metrics = MetricsCollector()
+    errors = []
+    governor = AIMDLimit(maximum=args.clients) if args.aimd else None
+    with FakeManager(latency=args.latency, jitter=args.jitter,
+                     report_size=args.report_size) as manager:
+        task_ids, report_ids = setup(manager, args.targets, args.tasks)
+
+        start = time.time()
+        deadline = start + args.duration
+        threads = [threading.Thread(target=worker, args=(
+            manager, args, metrics, task_ids, report_ids, deadline, errors,
+            governor))
+            for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+
+    summary = metrics.summary()
+    total = sum(stats["count"] for stats in summary.values())
+    print("{} clients, {:.1f}s: {} commands, {:.1f} commands/s, {} errors"
+          .format(args.clients, elapsed, total, total / elapsed,
+                  len(errors)))
+    print("{:<14} {:>7} {:>9} {:>9} {:>9} {:>9} {:>11}".format(
+        "command", "count", "p50 ms", "p90 ms", "p99 ms", "max ms",
+        "MB in"))
+    for command, stats in sorted(summary.items()):
+        total_time = stats["total_time"]
+        print("{:<14} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>11.1f}"
+              .format(command, stats["count"], total_time["p50"] * 1000,
+                      total_time["p90"] * 1000, total_time["p99"] * 1000,
+                      total_time["max"] * 1000,
+                      stats["bytes_in"] / 1024.0 / 1024.0))
+    if governor is not None:
+        print("governor: {}".format(governor.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# -*- encoding: utf-8 -*-
+"""
+Benchmark: dict_to_lxml
+=======================
+Builds element trees back from `lxml_to_dict` output, as `Response.xml`
+does for responses parsed in dict mode.
+"""
+import pytest
+
+from pyvas.utils import dict_to_lxml
+from pyvas.utils import lxml_to_dict
+
+
+def root_item(tree):
+    (tag, value), = lxml_to_dict(tree).items()
+    return tag, value
+
+
+@pytest.mark.benchmark(group="dict_to_lxml")
+def test_tasks_10k(measure, tasks_10k):
+    tag, value = root_item(tasks_10k)
+    tree = measure(dict_to_lxml, tag, value)
+    assert len(tree.findall("task")) == 10000
+
+
+@pytest.mark.benchmark(group="dict_to_lxml")
+def test_config_5k(measure, config_5k):
+    tag, value = root_item(config_5k)
+    tree = measure(dict_to_lxml, tag, value)
+    assert len(tree.findall("config/preferences/preference")) == 5000
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(group="dict_to_lxml")
+def test_report_100k(measure, report_100k):
+    tag, value = root_item(report_100k)
+    tree = measure(dict_to_lxml, tag, value)
+    assert len(tree.findall("report/report/results/result")) == 100000
@@ -0,0 +1,61 @@
+# -*- encoding: utf-8 -*-
+"""
+Benchmark: _list and _get callbacks
+===================================
+Runs `Client.list_tasks` and `Client.get_config` against a socket replaying
+a canned response, covering the parse, the `Response` and the data type
+callback of `_list` and `_get` in both parse modes.
+"""
+import pytest
+
+from pyvas import Client
+
+
+class ReplaySocket(object):
+    """Socket stand-in answering every request with the same response."""
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = len(data)
+
+    def sendall(self, data):
+        self.offset = 0
+
+    def recv(self, size):
+        data = self.data[self.offset:self.offset + size]
+        self.offset += len(data)
+        return data
+
+
+def client(data, parse_mode):
+    cli = Client("localhost", parse_mode=parse_mode)
+    cli.socket = ReplaySocket(data)
+    return cli
+
+
+PARSE_MODES = ["tree", "dict"]
+
+
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="list-tasks-10k")
+def test_list_tasks_10k(measure, tasks_10k_xml, parse_mode):
+    cli = client(tasks_10k_xml, parse_mode)
+    tasks = measure(lambda: cli.list_tasks().data)
+    assert len(tasks) == 10000
+
+
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="get-config-5k")
+def test_get_config_5k(measure, config_xml_5k, parse_mode):
+    cli = client(config_xml_5k, parse_mode)
+    config = measure(lambda: cli.get_config("c").data)
+    assert len(config["preferences"]["preference"]) == 5000
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="list-reports-100k")
+def test_list_report_100k(measure, report_100k_xml, parse_mode):
+    cli = client(report_100k_xml, parse_mode)
+    reports = measure(lambda: cli.list_reports().data)
+    assert len(reports[0]["report"]["results"]["result"]) == 100000
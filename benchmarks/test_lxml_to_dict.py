@@ -0,0 +1,73 @@
+# -*- encoding: utf-8 -*-
+"""
+Benchmark: lxml_to_dict
+=======================
+Compares `pyvas.utils.lxml_to_dict` with the recursive implementation it
+replaced.
+"""
+import collections
+
+import pytest
+import six
+
+from pyvas.utils import lxml_to_dict
+
+
+def recursive_lxml_to_dict(tree, strip_root=False):
+    """The recursive converter used up to pyvas 0.5.1."""
+    dct = {tree.tag: {} if tree.attrib else None}
+    children = list(tree)
+    if children:
+        default_dict = collections.defaultdict(list)
+        for child in [recursive_lxml_to_dict(child) for child in children]:
+            for key, value in six.iteritems(child):
+                default_dict[key].append(value)
+        dct = {tree.tag: {key: value[0] if len(value) == 1 else value
+                          for key, value in six.iteritems(default_dict)}}
+    if tree.attrib:
+        dct[tree.tag].update(("@" + key, value)
+                             for key, value in six.iteritems(tree.attrib))
+    if tree.text:
+        text = tree.text.strip()
+        if children or tree.attrib:
+            dct[tree.tag]["#text"] = text
+        else:
+            dct[tree.tag] = text
+    if strip_root:
+        return list(dct.values())[0]
+    return dct
+
+
+CONVERTERS = {
+    "recursive": recursive_lxml_to_dict,
+    "iterative": lxml_to_dict,
+}
+
+
+@pytest.mark.parametrize("name", sorted(CONVERTERS))
+@pytest.mark.benchmark(group="lxml_to_dict-tasks-10k")
+def test_tasks(measure, tasks_10k, name):
+    result = measure(CONVERTERS[name], tasks_10k)
+    assert result == recursive_lxml_to_dict(tasks_10k)
+
+
+@pytest.mark.parametrize("name", sorted(CONVERTERS))
+@pytest.mark.benchmark(group="lxml_to_dict-report-10k")
+def test_report(measure, report_10k, name):
+    result = measure(CONVERTERS[name], report_10k)
+    assert result == recursive_lxml_to_dict(report_10k)
+
+
+@pytest.mark.parametrize("name", sorted(CONVERTERS))
+@pytest.mark.benchmark(group="lxml_to_dict-config-5k")
+def test_config(measure, config_5k, name):
+    result = measure(CONVERTERS[name], config_5k)
+    assert result == recursive_lxml_to_dict(config_5k)
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark(group="lxml_to_dict-report-100k")
+def test_report_100k(measure, report_100k):
+    result = measure(lxml_to_dict, report_100k)
+    assert len(result["get_reports_response"]["report"]["report"]
+               ["results"]["result"]) == 100000
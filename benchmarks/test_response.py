@@ -0,0 +1,62 @@
+# -*- encoding: utf-8 -*-
+"""
+Benchmark: Response construction
+================================
+Parses raw responses into a `Response` and converts its data, in both parse
+modes, the way `Client._command` does.
+"""
+import pytest
+
+from pyvas.client import PARSE_DICT
+from pyvas.response import Response
+from pyvas.stream import ResponseParser
+from pyvas.utils import DictTarget
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse(data, parse_mode):
+    target = DictTarget() if parse_mode == PARSE_DICT else None
+    parser = ResponseParser(target=target)
+    for start in range(0, len(data), CHUNK_SIZE):
+        parser.feed(data[start:start + CHUNK_SIZE])
+    return parser.close()
+
+
+def build(data, parse_mode):
+    response = Response(resp=parse(data, parse_mode))
+    response.data
+    return response
+
+
+PARSE_MODES = ["tree", "dict"]
+
+
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="response-tasks-10k")
+def test_tasks_10k(measure, tasks_10k_xml, parse_mode):
+    response = measure(build, tasks_10k_xml, parse_mode)
+    assert len(response["task"]) == 10000
+
+
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="response-config-5k")
+def test_config_5k(measure, config_xml_5k, parse_mode):
+    response = measure(build, config_xml_5k, parse_mode)
+    assert len(response["config"]["preferences"]["preference"]) == 5000
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("parse_mode", PARSE_MODES)
+@pytest.mark.benchmark(group="response-report-100k")
+def test_report_100k(measure, report_100k_xml, parse_mode):
+    response = measure(build, report_100k_xml, parse_mode)
+    assert len(response["report"]["report"]["results"]["result"]) == 100000
+
+
+@pytest.mark.benchmark(group="response-lazy")
+def test_construction_only(measure, tasks_10k):
+    # status is checked eagerly, data conversion is left for first use
+    response = measure(Response, resp=tasks_10k)
+    assert response.status_code == 200
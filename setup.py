@@ -48,6 +48,7 @@ setup(
     keywords="openvas omp client",
     packages=find_packages("src"),
     package_dir={"": "src"},
+    package_data={"pyvas": ["*.pem"]},
     py_modules=[splitext(basename(path))[0] for path in glob("src/*.py")],
     install_requires=["six", "lxml"],
     setup_requires=["pytest-runner"],
@@ -11,4 +11,5 @@ __copyright__ = "Copyright 2017 Martin Picard"
 
 
 from .client import Client  # noqa
+from .async_client import AsyncClient  # noqa
 from .response import Response  # noqa
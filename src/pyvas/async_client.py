@@ -0,0 +1,580 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas asyncio client
+====================
+usage:
+
+> from pyvas import AsyncClient
+> async with AsyncClient(host, username=username, password=password) as cli:
+>     targets = await cli.list_targets()
+>     async for task in cli.iter_tasks():
+>         print(task["@id"])
+
+`AsyncClient` exposes the same methods as `Client` as coroutines, reusing
+its request building and `Response` handling, on top of asyncio streams.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+import ssl
+
+from lxml import etree
+
+from .client import Client
+from .client import DEFAULT_PAGE_SIZE
+from .client import DEFAULT_PORT
+from .client import DEFAULT_SCANNER_NAME
+from .client import PARSE_TREE
+from .client import CONNECTION_ERRORS
+from .client import _TaskWaiter
+from .client import _idempotent
+from .client import _filtered_count
+from .client import _output_file
+from .client import _no_data
+from .client import _report_contents
+from .client import _report_record
+from .client import _report_request
+from .client import _report_results_request
+from .client import _serialize
+from .client import _server_error
+from .governor import acquire_async
+from .metrics import clock
+from .metrics import record_recv
+from .metrics import record_send
+from .response import RAW_BYTES_ONLY
+from .response import Response
+from .stream import MAX_BLOCK_SIZE
+from .stream import MIN_BLOCK_SIZE
+from .stream import ReportTarget
+from .stream import ResponseParser
+from .stream import next_block_size
+from .stream import release
+from .timeouts import CONNECT
+from .timeouts import TOTAL
+from .timeouts import TTFB
+from .utils import dict_to_lxml
+from .exceptions import AuthenticationError
+from .exceptions import ConnectionClosed
+from .exceptions import HTTPError
+from .exceptions import RequestTimeout
+from .exceptions import ElementNotFound
+
+
+async def _within(awaitable, deadline, phase):
+    """Await within the phase's budget of deadline, if any."""
+    if deadline is None:
+        return await awaitable
+    try:
+        timeout = deadline.remaining(phase)
+    except RequestTimeout:
+        awaitable.close()
+        raise
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        # raises the timeout of the budget which ran out
+        deadline.remaining(phase)
+        raise deadline.expired(phase)
+
+
+class _TaskLock(object):
+    """asyncio lock the task holding it can take again, the counterpart of
+    the sync client's RLock."""
+
+    def __init__(self):
+        # created on first use, within the event loop
+        self._lock = None
+        self._owner = None
+        self._depth = 0
+
+    async def __aenter__(self):
+        task = asyncio.current_task()
+        if self._owner is not task:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            await self._lock.acquire()
+            self._owner = task
+        self._depth += 1
+
+    async def __aexit__(self, exc_type, ex_val, exc_tb):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+            self._lock.release()
+
+
+class AsyncClient(Client):
+    """OpenVAS OMP Client for asyncio"""
+
+    def __init__(self, host, username=None, password=None, port=DEFAULT_PORT,
+                 **kwargs):
+        """Initialize asyncio OMP client, see Client for keyword arguments."""
+        super(AsyncClient, self).__init__(
+            host, username=username, password=password, port=port, **kwargs)
+        self._reader = None
+        self._writer = None
+        self._async_lock = _TaskLock()
+
+    async def _connect(self):
+        """Open streams to the server through the client's transport.
+
+        The connect and handshake timeouts bound the time to open them
+        together.
+        """
+        opening = self.transport.open_connection()
+        timeouts = self._timeouts()
+        budget = None
+        if timeouts is not None and timeouts.limits_connect:
+            budget = (timeouts.connect or 0) + (timeouts.handshake or 0)
+        if budget is None:
+            self._reader, self._writer = await opening
+        else:
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    opening, budget)
+            except asyncio.TimeoutError:
+                raise RequestTimeout("connect", CONNECT, budget, budget)
+
+    def is_alive(self):
+        """Returns True if the connection has not been closed."""
+        return self._reader is not None and not self._reader.at_eof()
+
+    async def reconnect(self):
+        """Replace the connection and authenticate with the last
+        credentials used."""
+        async with self._async_lock:
+            self._check_idle()
+            if self._writer is not None:
+                try:
+                    await self.close()
+                except CONNECTION_ERRORS:
+                    self._reader = self._writer = None
+            self.reconnects += 1
+            await self._connect()
+            if self._credentials is not None:
+                await self.authenticate(*self._credentials)
+
+    async def open(self, username=None, password=None):
+        """Open connection and authenticate client."""
+        await self._connect()
+        await self.authenticate(username, password)
+
+    def _drop_connection(self):
+        """Close a connection left out of sync by an incomplete command,
+        the next command reconnects."""
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            writer.close()
+
+    async def close(self):
+        """Close client's connection to server, if any."""
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, ssl.SSLError):  # pragma: no cover
+            pass
+
+    async def authenticate(self, username=None, password=None):
+        """Authenticate Client using username and password."""
+        if self._writer is None:
+            await self._connect()
+
+        if username is None:
+            username = self.username
+
+        if password is None:
+            password = self.password
+
+        request = dict_to_lxml(
+            "authenticate",
+            {"credentials": {
+                "username": username,
+                "password": password
+            }}
+        )
+
+        try:
+            response = await self._command(request)
+        except HTTPError:
+            raise AuthenticationError(username)
+        self._credentials = (username, password)
+        return response
+
+    def changes(self, data_type, state=None):
+        """Returns an AsyncChangeFeed of created and modified objects of a
+        type."""
+        from .changes import AsyncChangeFeed
+        return AsyncChangeFeed(self, data_type, state=state)
+
+    async def create_task(self, name, config_uuid, target_uuid,
+                          scanner_uuid=None, comment=None,
+                          schedule_uuid=None):
+        """Create a task."""
+        if scanner_uuid is None:
+            # try to use default scanner
+            try:
+                scanners = await self.list_scanners(name=DEFAULT_SCANNER_NAME)
+                scanner_uuid = scanners[0]["@id"]
+            except (ElementNotFound, IndexError, KeyError):
+                raise ElementNotFound('''Could not find default scanner,
+                                      please use scanner_uuid to specify a
+                                      scanner.''')
+
+        return await super(AsyncClient, self).create_task(
+            name, config_uuid, target_uuid, scanner_uuid=scanner_uuid,
+            comment=comment, schedule_uuid=schedule_uuid)
+
+    async def wait_for_tasks(self, uuids, timeout=None, on_progress=None,
+                             min_interval=2, max_interval=30):
+        """Wait for tasks to reach a terminal state, see Client."""
+        waiter = _TaskWaiter(uuids, timeout, on_progress,
+                             min_interval, max_interval)
+        while waiter.pending:
+            tasks = await self._list("task",
+                                     filter_terms=waiter.filter_terms(),
+                                     records=False)
+            delay = waiter.update(tasks.data)
+            if delay:
+                await asyncio.sleep(delay)
+        return waiter.finished
+
+    async def download_report(self, uuid, format_uuid=None,
+                              as_element_tree=False, **kwargs):
+        """Get XML or base64 encoded report contents"""
+        request = _report_request(uuid, format_uuid, kwargs)
+        response = await self._command(request, parse_mode=PARSE_TREE)
+        return _report_contents(response, as_element_tree)
+
+    async def download_report_to(self, uuid, fileobj, format_uuid=None,
+                                 **kwargs):
+        """Write report contents to a file object or path, see Client."""
+        request = _report_request(uuid, format_uuid, kwargs)
+        with _output_file(fileobj) as out:
+            parser = ResponseParser(max_response_size=self.max_response_size,
+                                    target=ReportTarget(out))
+            resp, _ = await self._send_with_retry(request, parser=parser)
+            response = Response(req=request, resp=resp)
+            response.raise_for_status()
+        return response
+
+    async def iter_report_results(self, uuid, records=None, **kwargs):
+        """Yield the results of a report one at a time, as dicts or records.
+
+        See `Client.iter_report_results`, other commands wait until the
+        generator is exhausted or closed, those of the task iterating it
+        raise RuntimeError.
+        """
+        request = _report_results_request(uuid, kwargs)
+        convert = self._result_converter(records)
+        deadline = self._deadline(request)
+        retries = self.retries
+
+        async with self._async_lock:
+            self._check_idle()
+            if self._credentials is not None and not self.is_alive():
+                await self.reconnect()
+            while True:
+                parser = ResponseParser(
+                    max_response_size=self.max_response_size,
+                    tag="result", parent="results")
+                results = self._iter_results(request, parser, deadline)
+                try:
+                    self._streaming = True
+                    try:
+                        async for result in results:
+                            yield convert(result)
+                    finally:
+                        self._streaming = False
+                    break
+                except CONNECTION_ERRORS + (RequestTimeout,) as error:
+                    if (parser.bytes_received or
+                            not self._retryable(error, retries)):
+                        raise
+                    retries -= 1
+                    await self.reconnect()
+                finally:
+                    # reads the rest of the response if closed early
+                    await results.aclose()
+
+        Response(req=request, resp=parser.close(),
+                 cb=_no_data).raise_for_status()
+
+    async def _iter_results(self, request, parser, deadline):
+        """Send a report results request and yield its results."""
+        await self._write_request(request, deadline=deadline)
+
+        block_size = MIN_BLOCK_SIZE
+        try:
+            while not parser.done:
+                data = await self._recv(parser, block_size, deadline)
+                block_size = next_block_size(block_size, data)
+                parser.feed(data)
+                while parser.elements:
+                    result = parser.elements.popleft()
+                    yield result
+                    release(result)
+        except GeneratorExit:
+            while not parser.done:
+                parser.feed(await self._recv(parser, MAX_BLOCK_SIZE,
+                                             deadline))
+                while parser.elements:
+                    release(parser.elements.popleft())
+            raise
+        except RequestTimeout:
+            self._drop_connection()
+            raise
+
+    async def _iter(self, data_type, page_size=DEFAULT_PAGE_SIZE,
+                    prefetch=False, **kwargs):
+        """Generic lazy list function, fetching `page_size` rows at a time.
+
+        With prefetch, page N+1 is requested in a background task while the
+        caller works through page N.
+        """
+        def fetch(first):
+            return self._list(data_type, first=first, rows=page_size,
+                              **kwargs)
+
+        first = 1
+        page = await fetch(first)
+        next_page = None
+        try:
+            while True:
+                # read before data, which may release the raw response
+                count = _filtered_count(page, data_type)
+                items = page.data
+                if count is not None:
+                    more = first + page_size <= int(count)
+                else:
+                    more = len(items) >= page_size
+
+                if more:
+                    first += page_size
+                    if prefetch:
+                        next_page = asyncio.ensure_future(fetch(first))
+
+                for item in items:
+                    yield item
+
+                if not more:
+                    break
+
+                if prefetch:
+                    page, next_page = await next_page, None
+                else:
+                    page = await fetch(first)
+        finally:
+            if next_page is not None:
+                # let the request complete to keep the stream in sync
+                await asyncio.wait([next_page])
+
+    async def _command(self, request, cb=None, parse_mode=None):
+        """Send, build and validate response."""
+        timings = self._pre_command(request)
+        response, cached = None, False
+        retention, raw_bytes = self._retention(), None
+        try:
+            resp, raw_bytes, cached = await self._fetch(request, timings,
+                                                        retention, parse_mode)
+
+            response = Response(req=request, resp=resp, cb=cb,
+                                retention=retention, raw_bytes=raw_bytes)
+            if not cached:
+                self._cache_update(request, resp, response.status_code)
+            # validate response, raise exceptions, if any
+            response.raise_for_status()
+        except Exception as error:
+            if timings is not None:
+                timings.error = type(error).__name__
+            raise
+        finally:
+            if timings is not None:
+                self._post_command(timings, response, cached)
+
+        return response
+
+    async def _fetch(self, request, timings, retention, parse_mode=None):
+        """Returns the response to request, see `Client._fetch`."""
+        compress = retention == RAW_BYTES_ONLY
+        resp = self._cache_get(request)
+        if resp is not None:
+            return resp, None, True
+        if (self.report_store is None or
+                not self.report_store.cacheable(request)):
+            resp, raw_bytes = await self._send_with_retry(
+                request, timings, compress=compress, parse_mode=parse_mode)
+            return resp, raw_bytes, False
+
+        report = await self._report_state(request.get("report_id"))
+        resp, raw_bytes = self._stored_report(request, report, parse_mode)
+        if resp is not None:
+            return resp, raw_bytes if compress else None, True
+        resp, raw_bytes = await self._send_with_retry(
+            request, timings, compress=True, parse_mode=parse_mode)
+        self._store_report(request, report, resp, raw_bytes)
+        return resp, raw_bytes if compress else None, False
+
+    async def _report_state(self, uuid):
+        """Returns a report's metadata, without its results."""
+        request = etree.Element("get_reports", report_id=uuid, details="0")
+        return (await self._command(request, cb=_report_record)).data
+
+    async def _send_with_retry(self, request, timings=None, compress=False,
+                               parse_mode=None, parser=None):
+        """Send a request, reconnecting when the connection was dropped,
+        see `Client._send_with_retry`.
+
+        The connection is held from the check to the response, so that
+        coroutines failing together reconnect only once.
+        """
+        async with self._async_lock:
+            self._check_idle()
+            if self._credentials is not None and not self.is_alive():
+                await self.reconnect()
+
+            retries = self.retries if _idempotent(request) else 0
+            deadline = self._deadline(request)
+            while True:
+                attempt = parser
+                if attempt is None:
+                    attempt = self._response_parser(parse_mode, compress)
+                try:
+                    resp = await self._send_governed(request, attempt,
+                                                     timings, deadline)
+                    return resp, attempt.compressed
+                except CONNECTION_ERRORS + (RequestTimeout,) as error:
+                    if ((parser is not None and parser.bytes_received) or
+                            not self._retryable(error, retries)):
+                        raise
+                    retries -= 1
+                    await self.reconnect()
+
+    async def _send_envelope(self, envelope):
+        """Send the `<commands>` envelope of a batch, see
+        `Client._send_envelope`."""
+        timings = self._pre_command(envelope)
+        try:
+            resp, _ = await self._send_with_retry(envelope, timings,
+                                                  parse_mode=PARSE_TREE)
+            return resp
+        except Exception as error:
+            if timings is not None:
+                timings.error = type(error).__name__
+            raise
+        finally:
+            if timings is not None:
+                self._post_command(timings, None, False)
+
+    async def _write_request(self, request, timings=None, deadline=None):
+        """Send XML data to OpenVAS Manager."""
+        start = clock()
+        data = _serialize(request)
+        serialized = clock()
+        self._writer.write(data)
+        await _within(self._writer.drain(), deadline, TOTAL)
+        if deadline is not None:
+            deadline.bytes_sent += len(data)
+            deadline.begin(TTFB)
+        if timings is not None:
+            record_send(timings, start, serialized, clock(), len(data))
+
+    async def _recv(self, parser, block_size, deadline=None):
+        """Receive the next chunk of a response."""
+        if deadline is None:
+            data = await self._reader.read(block_size)
+        else:
+            phase = TOTAL if deadline.bytes_received else TTFB
+            data = await _within(self._reader.read(block_size), deadline,
+                                 phase)
+            deadline.bytes_received += len(data)
+        if not data:
+            raise ConnectionClosed(parser.bytes_received)
+        return data
+
+    async def _send_governed(self, request, parser, timings=None,
+                             deadline=None):
+        """Send a request within the limits of the client's governor,
+        waiting for it within the command's total time."""
+        governor = self.governor
+        if governor is None:
+            return await self._send_request(request, parser=parser,
+                                            timings=timings,
+                                            deadline=deadline)
+        await _within(acquire_async(governor, request.tag), deadline, TOTAL)
+        start, error = clock(), None
+        try:
+            resp = await self._send_request(request, parser=parser,
+                                            timings=timings,
+                                            deadline=deadline)
+            error = _server_error(resp)
+            return resp
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            governor.release(request.tag, clock() - start, error)
+
+    async def _send_request(self, request, parse_mode=None, parser=None,
+                            timings=None, deadline=None):
+        """Send XML data to OpenVAS Manager and get results"""
+        async with self._async_lock:
+            self._check_idle()
+            try:
+                return await self._exchange(request, parse_mode, parser,
+                                            timings, deadline)
+            except RequestTimeout:
+                self._drop_connection()
+                raise
+
+    async def _exchange(self, request, parse_mode, parser, timings,
+                        deadline):
+        await self._write_request(request, timings, deadline)
+
+        if parser is None:
+            parser = self._response_parser(parse_mode)
+        if timings is not None:
+            return await self._timed_read(parser, timings, deadline)
+        block_size = MIN_BLOCK_SIZE
+        while True:
+            data = await self._recv(parser, block_size, deadline)
+            block_size = next_block_size(block_size, data)
+            if parser.feed(data):
+                return parser.close()
+
+    async def _timed_read(self, parser, timings, deadline=None):
+        """Read a response, accounting receive and parse times."""
+        timings.parse_time = 0.0
+        block_size = MIN_BLOCK_SIZE
+        while True:
+            start = clock()
+            data = await self._recv(parser, block_size, deadline)
+            record_recv(timings, start, clock(), len(data))
+            block_size = next_block_size(block_size, data)
+            start = clock()
+            done = parser.feed(data)
+            timings.parse_time += clock() - start
+            if done:
+                break
+        start = clock()
+        root = parser.close()
+        timings.parse_time += clock() - start
+        return root
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncClient")
+
+    def __exit__(self, exc_type, ex_val, exc_tb):  # pragma: no cover
+        pass
+
+    async def __aenter__(self):
+        """Implements `async with` context manager syntax"""
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, ex_val, exc_tb):
+        """Implements `async with` context manager syntax"""
+        await self.close()
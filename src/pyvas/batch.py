@@ -0,0 +1,166 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas batches
+=============
+usage:
+
+> with cli.batch() as batch:
+>     deleted = [batch.delete_target(uuid) for uuid in stale]
+> for result in deleted:
+>     result.result()  # Response, or raises the command's exception
+
+Commands made on a batch are queued instead of sent. When the batch is sent
+they are wrapped in a single OMP `<commands>` envelope, written in one go,
+and the `<commands_response>` is split back into one `Response` per command.
+The envelope's response is always parsed to a tree to keep commands in order.
+Envelopes are sent like single commands: within the client's governor and
+hooks, and again after a dropped connection if they only read.
+"""
+
+from __future__ import unicode_literals
+
+import functools
+
+from lxml import etree
+
+from .client import Client
+from .client import DEFAULT_SCANNER_NAME
+from .response import Response
+from .exceptions import Error
+from .exceptions import ElementNotFound
+from .exceptions import ResultError
+
+
+BATCHABLE_PREFIXES = (
+    "list_", "get_", "create_", "modify_", "delete_",
+    "start_", "stop_", "resume_",
+    "_list", "_get", "_create", "_modify", "_delete",
+)
+
+
+def _envelope(results):
+    """Wrap the requests of queued results in a `<commands>` element."""
+    envelope = etree.Element("commands")
+    for result in results:
+        envelope.append(result.request)
+    return envelope
+
+
+class BatchResult(object):
+    """Placeholder for the outcome of a batched command."""
+
+    def __init__(self, request, cb=None):
+        self.request = request
+        self.cb = cb
+        self.done = False
+        self.response = None
+        self.error = None
+
+    def set_response(self, resp):
+        """Build and validate the command's response."""
+        try:
+            self.response = Response(req=self.request, resp=resp, cb=self.cb)
+            self.response.raise_for_status()
+        except (Error, TypeError) as error:
+            self.error = error
+        self.done = True
+
+    def result(self):
+        """Returns the Response, or raises the command's exception."""
+        if not self.done:
+            raise RuntimeError("Batch has not been sent yet")
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+    def __repr__(self):
+        return "<BatchResult {} [{}]>".format(
+            self.request.tag, "done" if self.done else "pending")
+
+
+class Batch(object):
+    """Queue of OMP commands sent in a single `<commands>` request."""
+
+    def __init__(self, client):
+        self.client = client
+        self.pending = []
+
+    def __getattr__(self, name):
+        """Bind the client's command methods to this batch."""
+        if not name.startswith(BATCHABLE_PREFIXES):
+            raise AttributeError("{} can not be batched".format(name))
+        return functools.partial(getattr(Client, name), self)
+
+    @property
+    def records(self):
+        """The client's default for returning records from list commands."""
+        return self.client.records
+
+    def create_task(self, name, config_uuid, target_uuid,
+                    scanner_uuid=None, comment=None, schedule_uuid=None):
+        """Create a task, looking up the default scanner right away.
+
+        With an AsyncClient, scanner_uuid is required.
+        """
+        if scanner_uuid is None:
+            try:
+                scanners = self.client.list_scanners(name=DEFAULT_SCANNER_NAME)
+                scanner_uuid = scanners[0]["@id"]
+            except (ElementNotFound, IndexError, KeyError):
+                raise ElementNotFound('''Could not find default scanner,
+                                      please use scanner_uuid to specify a
+                                      scanner.''')
+        return Client.create_task(self, name, config_uuid, target_uuid,
+                                  scanner_uuid=scanner_uuid, comment=comment,
+                                  schedule_uuid=schedule_uuid)
+
+    def _command(self, request, cb=None):
+        """Queue a request, returns its BatchResult."""
+        result = BatchResult(request, cb)
+        self.pending.append(result)
+        return result
+
+    def _dispatch(self, root, results):
+        responses = list(root)
+        if len(responses) != len(results):
+            raise ResultError(root.tag, "expected {} responses, got {}".format(
+                len(results), len(responses)))
+        for result, resp in zip(results, responses):
+            result.set_response(resp)
+            if self.client.cache is not None:
+                self.client.cache.invalidate(result.request)
+        return [result.error or result.response for result in results]
+
+    def send(self):
+        """Send queued commands, returns their Responses or exceptions."""
+        results, self.pending = self.pending, []
+        if not results:
+            return []
+        root = self.client._send_envelope(_envelope(results))
+        return self._dispatch(root, results)
+
+    async def asend(self):
+        """Send queued commands with an AsyncClient."""
+        results, self.pending = self.pending, []
+        if not results:
+            return []
+        root = await self.client._send_envelope(_envelope(results))
+        return self._dispatch(root, results)
+
+    def __enter__(self):
+        """Implements `with` context manager syntax"""
+        return self
+
+    def __exit__(self, exc_type, ex_val, exc_tb):
+        """Send the batch, unless the block raised."""
+        if exc_type is None:
+            self.send()
+
+    async def __aenter__(self):
+        """Implements `async with` context manager syntax"""
+        return self
+
+    async def __aexit__(self, exc_type, ex_val, exc_tb):
+        """Send the batch, unless the block raised."""
+        if exc_type is None:
+            await self.asend()
@@ -0,0 +1,254 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas response cache
+~~~~~~~~~~~~~~~~~~~~
+Opt-in cache for read-mostly entities such as scanners, configs, report
+formats and port lists:
+
+> from pyvas.cache import ResponseCache
+> cli = Client(host, username=username, password=password,
+>              cache=ResponseCache(ttl=300, maxsize=256))
+
+Responses are keyed by the serialized request, i.e. the command and its
+filter or id, expire after `ttl` seconds and are evicted least recently used
+first. A `create_*`, `modify_*` or `delete_*` command drops all cached
+responses for the same entity type.
+
+Finished reports are kept on disk by a `ReportStore`:
+
+> from pyvas.cache import ReportStore
+> cli = Client(host, username=username, password=password,
+>              report_store=ReportStore("reports.db", max_bytes=2 ** 30))
+
+Stored reports are keyed by report, format and filter, and only served
+while the report's modification time, fetched with a request without the
+report's details, is unchanged.
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import copy
+import sqlite3
+import threading
+import time
+
+from lxml import etree
+
+
+CACHEABLE_COMMANDS = frozenset((
+    "get_scanners",
+    "get_configs",
+    "get_report_formats",
+    "get_port_lists",
+))
+
+WRITE_PREFIXES = ("create_", "modify_", "delete_")
+
+
+def _key(request):
+    if etree.iselement(request):
+        return etree.tostring(request)
+    return request
+
+
+def _tag(request):
+    return request.tag if etree.iselement(request) else None
+
+
+class ResponseCache(object):
+    """TTL and LRU bounded cache of server responses."""
+
+    def __init__(self, ttl=300, maxsize=256, commands=CACHEABLE_COMMANDS):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.commands = frozenset(commands)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def cacheable(self, request):
+        """Returns True if responses to request may be cached."""
+        return _tag(request) in self.commands
+
+    def get(self, request):
+        """Returns the cached response to request, or None."""
+        key = _key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            resp = entry[2]
+
+        if isinstance(resp, dict):
+            # dict parsed responses are handed out as is, keep ours intact
+            return copy.deepcopy(resp)
+        return resp
+
+    def put(self, request, resp):
+        """Cache the response to request."""
+        key = _key(request)
+        # get_port_lists caches entities of type port_list
+        data_type = _tag(request)[len("get_"):-1]
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, data_type, resp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, request):
+        """Drop responses made stale by a create, modify or delete request."""
+        tag = _tag(request)
+        if tag is None or not tag.startswith(WRITE_PREFIXES):
+            return
+        data_type = tag.split("_", 1)[1]
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry[1] == data_type]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Returns a dict of hit, miss, eviction and invalidation counts."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "size": len(self._entries),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": (self._stats["hits"] / float(lookups)
+                             if lookups else 0.0),
+                "expired": self._stats["expired"],
+                "evictions": self._stats["evictions"],
+                "invalidations": self._stats["invalidations"],
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ReportStore(object):
+    """SQLite file of compressed report responses, bounded to `max_bytes`.
+
+    Entries are evicted least recently used first.
+    """
+
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reports ("
+                "key BLOB PRIMARY KEY, report_id TEXT, modification_time TEXT,"
+                " data BLOB, size INTEGER, accessed REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS reports_accessed "
+                             "ON reports (accessed)")
+
+    @staticmethod
+    def cacheable(request):
+        """Returns True if request asks for a report's contents."""
+        return (_tag(request) == "get_reports" and
+                request.get("report_id") is not None and
+                request.get("details") != "0")
+
+    def get(self, request, modification_time):
+        """Returns the stored response to request, if stored for the given
+        modification time, or None. Stale entries are dropped."""
+        key = _key(request)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT modification_time, data FROM reports WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if row[0] != modification_time:
+                self._db.execute("DELETE FROM reports WHERE key = ?", (key,))
+                self._stats["misses"] += 1
+                self._stats["stale"] += 1
+                return None
+            self._db.execute("UPDATE reports SET accessed = ? WHERE key = ?",
+                             (time.time(), key))
+            self._stats["hits"] += 1
+            return bytes(row[1])
+
+    def put(self, request, modification_time, data):
+        """Store data, the compressed response to request."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?)",
+                (_key(request), request.get("report_id"), modification_time,
+                 data, len(data), time.time()))
+            self._evict()
+
+    def _evict(self):
+        size = self._size()
+        if size <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM reports ORDER BY accessed").fetchall()
+        for key, entry_size in rows:
+            if size <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM reports WHERE key = ?", (key,))
+            size -= entry_size
+            self._stats["evictions"] += 1
+
+    def _size(self):
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM reports").fetchone()[0]
+
+    def invalidate(self, report_id):
+        """Drop all stored responses for a report."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM reports WHERE report_id = ?",
+                             (report_id,))
+
+    def clear(self):
+        """Drop all stored responses."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM reports")
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        """Returns a dict of hit, miss, stale and eviction counts."""
+        with self._lock:
+            count, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reports"
+            ).fetchone()
+            return {
+                "size": count,
+                "bytes": size,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "stale": self._stats["stale"],
+                "evictions": self._stats["evictions"],
+            }
+
+    def __len__(self):
+        return self.stats()["size"]
@@ -0,0 +1,149 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas change feeds
+==================
+usage:
+
+> feed = cli.changes("target", state=saved_state)
+> for change in feed.poll():
+>     print(change.kind, change.uuid, change.data["name"])
+> saved_state = feed.state
+
+The feeds of an `AsyncClient` are polled with `await feed.poll()`, and
+followed with `async for change in feed.follow()`.
+
+Each poll only asks gvmd for objects modified after the feed's watermark,
+the highest `modification_time` seen so far. Objects created after the
+watermark are reported as "created", others as "modified". The state is a
+JSON serializable dict, persist it to resume incrementally after a restart.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+import collections
+import datetime
+import json
+import time
+
+from .utils import parse_time as _parse_time
+
+CREATED = "created"
+MODIFIED = "modified"
+
+Change = collections.namedtuple("Change", "kind data_type uuid data")
+
+
+def _format_time(value):
+    """Format a timestamp for use in a filter, in UTC."""
+    return value.astimezone(datetime.timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%SZ")
+
+
+class ChangeFeed(object):
+    """Incremental feed of created and modified objects of one type."""
+
+    def __init__(self, client, data_type, state=None):
+        """Initialize feed, resuming from a previous feed's state."""
+        state = state or {}
+        self.client = client
+        self.data_type = data_type
+        self.watermark = state.get("watermark")
+        # objects modified at the watermark, the filter has 1s resolution
+        self._seen = set(state.get("seen", ()))
+
+    @property
+    def state(self):
+        """JSON serializable state to resume the feed from."""
+        return {"watermark": self.watermark, "seen": sorted(self._seen)}
+
+    def save(self, path):
+        """Write the feed's state to a JSON file."""
+        with open(path, "w") as fp:
+            json.dump(self.state, fp)
+
+    @classmethod
+    def load(cls, client, data_type, path):
+        """Create a feed resuming from a JSON state file, if it exists."""
+        try:
+            with open(path) as fp:
+                state = json.load(fp)
+        except (IOError, OSError):
+            state = None
+        return cls(client, data_type, state=state)
+
+    def _filter_terms(self):
+        terms = "rows=-1 sort=modified"
+        if self.watermark is None:
+            return terms
+        # objects modified in the watermark's second may not all have been
+        # seen, include that second and skip the ones which were
+        since = _parse_time(self.watermark) - datetime.timedelta(seconds=1)
+        return "{} modified>\"{}\"".format(terms, _format_time(since))
+
+    def poll(self):
+        """Returns a list of Changes since the last poll."""
+        return self._changes(self.client._list(
+            self.data_type, filter_terms=self._filter_terms(), records=False))
+
+    def _changes(self, response):
+        """Returns the Changes in a list response since the watermark, and
+        advances it."""
+        watermark = self.watermark
+        since = None if watermark is None else _parse_time(watermark)
+
+        changes = []
+        latest, seen = since, set(self._seen)
+        for item in response.data:
+            uuid = item.get("@id")
+            modified = _parse_time(item["modification_time"])
+            if since is not None and (
+                    modified < since or
+                    modified == since and uuid in self._seen):
+                continue
+
+            kind = MODIFIED
+            if since is None:
+                kind = CREATED
+            elif item.get("creation_time"):
+                created = _parse_time(item["creation_time"])
+                if created > since or (created == since and
+                                       uuid not in self._seen):
+                    kind = CREATED
+            changes.append(Change(kind, self.data_type, uuid, item))
+
+            if latest is None or modified > latest:
+                latest, watermark, seen = (modified,
+                                           item["modification_time"], set())
+            if modified == latest:
+                seen.add(uuid)
+
+        self.watermark, self._seen = watermark, seen
+        return changes
+
+    def follow(self, interval=60):
+        """Poll forever, yielding Changes as they are found."""
+        while True:
+            for change in self.poll():
+                yield change
+            time.sleep(interval)
+
+    def __repr__(self):
+        return "<{} {} since {}>".format(type(self).__name__,
+                                         self.data_type, self.watermark)
+
+
+class AsyncChangeFeed(ChangeFeed):
+    """ChangeFeed of an `AsyncClient`."""
+
+    async def poll(self):
+        """Returns a list of Changes since the last poll."""
+        return self._changes(await self.client._list(
+            self.data_type, filter_terms=self._filter_terms(), records=False))
+
+    async def follow(self, interval=60):
+        """Poll forever, yielding Changes as they are found."""
+        while True:
+            for change in await self.poll():
+                yield change
+            await asyncio.sleep(interval)
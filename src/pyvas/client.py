@@ -14,22 +14,64 @@ usage:
 
 from __future__ import unicode_literals, print_function
 
+import contextlib
+import contextvars
 import os
+import select
 import socket
 import ssl
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
 import six
 from lxml import etree
 
+from .metrics import CommandTimings
+from .metrics import clock
+from .metrics import default_hooks
+from .metrics import dispatch_hook
+from .metrics import record_send
+from .records import RECORD_TYPES
+from .records import Report
+from .records import Result
+from .response import KEEP_RAW
+from .response import RAW_BYTES_ONLY
+from .response import RETENTION_POLICIES
 from .response import Response
+from .stream import ResponseParser
+from .stream import ReportTarget
+from .stream import ResponseReader
+from .timeouts import TOTAL
+from .timeouts import Deadline
+from .timeouts import Timeouts
+from .timeouts import sendall
+from .transport import TLSTransport
+from .utils import DictTarget
 from .utils import dict_to_lxml
 from .utils import lxml_to_dict
 from .exceptions import AuthenticationError
+from .exceptions import ConnectionClosed
 from .exceptions import HTTPError
+from .exceptions import RequestTimeout
+from .exceptions import ServerError
 from .exceptions import ElementNotFound
+from .exceptions import WaitTimeout
 
 
 DEFAULT_PORT = os.environ.get("OPENVASMD_PORT", 9390)
 DEFAULT_SCANNER_NAME = "OpenVAS Default"
+DEFAULT_PAGE_SIZE = 100
+TERMINAL_TASK_STATUSES = frozenset((
+    "Done", "Stopped", "Interrupted", "Internal Error",
+))
+
+PARSE_TREE = "tree"
+PARSE_DICT = "dict"
+
+# errors after which a connection can not be reused
+CONNECTION_ERRORS = (socket.error, ssl.SSLError, ConnectionClosed)
 
 
 def print_xml(element):  # pragma: no cover noqa
@@ -37,36 +79,403 @@ def print_xml(element):  # pragma: no cover noqa
     print(etree.tostring(element, pretty_print=True))
 
 
+def _check_retention(retention):
+    if retention not in RETENTION_POLICIES:
+        raise ValueError("retention must be one of {}".format(
+            ", ".join(RETENTION_POLICIES)))
+
+
+def _idempotent(request):
+    """Returns True if request can safely be sent again."""
+    if request.tag == "commands":
+        return all(_idempotent(command) for command in request)
+    return request.tag.startswith("get_")
+
+
+def _set_filter(request, kwargs, terms=None):
+    """Set the request's filter attribute using key="value" terms.
+
+    terms is an optional filter string used as is, for terms which can not
+    be expressed as keyword arguments.
+    """
+    filters = [terms] if terms else []
+    filters.extend("{}=\"{}\"".format(k, v)
+                   for k, v in six.iteritems(kwargs) if v)
+    if filters:
+        request.set("filter", " ".join(filters))
+
+
+def _no_data(resp):
+    """Response callback for responses only checked for their status."""
+    return None
+
+
+def _root(tree):
+    """Returns the root value of an `lxml_to_dict` converted response."""
+    return next(iter(tree.values()))
+
+
+def _children(tree, tag):
+    """Returns the `tag` children of a converted response's root as a list,
+    like `findall` does for elements."""
+    root = _root(tree)
+    if not isinstance(root, dict) or tag not in root:
+        return []
+    value = root[tag]
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _status(resp):
+    """Returns the status and status text of a parsed response."""
+    if isinstance(resp, dict):
+        root = _root(resp)
+        attrib = root if isinstance(root, dict) else {}
+        return attrib.get("@status"), attrib.get("@status_text")
+    return resp.get("status"), resp.get("status_text")
+
+
+def _ok(resp):
+    """Returns True if a parsed response has a 2xx status."""
+    return (_status(resp)[0] or "").startswith("2")
+
+
+def _server_error(resp):
+    """Returns a ServerError for a parsed response with a 5xx status."""
+    status, reason = _status(resp)
+    if (status or "").startswith("5"):
+        return ServerError(reason)
+    return None
+
+
+def _report_record(resp):
+    """Response callback returning a report as a `pyvas.records.Report`."""
+    if isinstance(resp, dict):
+        return Report.from_dict(_children(resp, "report")[0])
+    return Report.from_element(resp.find("report"))
+
+
+def _filtered_count(response, data_type):
+    """Number of rows matching a list request's filter, if reported."""
+    if response.tree is not None:
+        count = _root(response.tree).get("{}_count".format(data_type))
+        if isinstance(count, dict):
+            return count.get("filtered")
+        return None
+    return response.xml.findtext("{}_count/filtered".format(data_type))
+
+
+def _serialize(request):
+    """Encode an element, or XML text, for sending to the server."""
+    if etree.iselement(request):
+        return etree.tostring(request, encoding="utf-8")
+    if isinstance(request, six.text_type):
+        return request.encode("utf-8")
+    return request
+
+
+def _report_request(uuid, format_uuid, kwargs):
+    """Build a get_reports request for a report's contents."""
+    request = etree.Element("get_reports")
+
+    request.set("report_id", uuid)
+
+    if format_uuid is not None:
+        request.set("format_id", format_uuid)
+
+    _set_filter(request, kwargs)
+
+    return request
+
+
+def _report_results_request(uuid, kwargs):
+    """Build a get_reports request for all of a report's results."""
+    request = etree.Element("get_reports")
+    request.set("report_id", uuid)
+    request.set("details", "1")
+    request.set("ignore_pagination", "1")
+    _set_filter(request, kwargs)
+    return request
+
+
+def _report_contents(response, as_element_tree=False):
+    """Extract the report element or its decoded contents from a response."""
+    report = response.xml.find("report")
+
+    if report.attrib["content_type"] == "text/xml" or as_element_tree:
+        return report
+    report = response.xml.find(".//report_format").tail
+    try:
+        return report.decode("base64")
+    except AttributeError:
+        return report
+
+
+@contextlib.contextmanager
+def _output_file(fileobj):
+    """Yield fileobj, or the file opened at path fileobj.
+
+    A file opened here is removed again if writing to it fails.
+    """
+    if hasattr(fileobj, "write"):
+        yield fileobj
+        return
+
+    with open(fileobj, "wb") as out:
+        try:
+            yield out
+        except BaseException:
+            out.close()
+            os.remove(fileobj)
+            raise
+
+
+def _task_progress(task):
+    """Parse a task's progress, -1 when unknown or finished."""
+    progress = task.get("progress")
+    if isinstance(progress, dict):
+        progress = progress.get("#text")
+    try:
+        return int(progress)
+    except (TypeError, ValueError):
+        return -1
+
+
+class _TaskWaiter(object):
+    """Poll state shared by the blocking and asyncio wait_for_tasks."""
+
+    # progress from which a task is considered close to done
+    NEAR_DONE = 90
+
+    def __init__(self, uuids, timeout, on_progress, min_interval,
+                 max_interval):
+        self.pending = set(uuids)
+        self.finished = {}
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.deadline = None if timeout is None else time.time() + timeout
+        self._progress = {}
+
+    def filter_terms(self):
+        """Filter matching all pending tasks."""
+        terms = " or ".join("uuid={}".format(uuid)
+                            for uuid in sorted(self.pending))
+        return "rows=-1 " + terms
+
+    def update(self, tasks):
+        """Process a poll, returns seconds to wait before the next one."""
+        seen = {}
+        for task in tasks:
+            seen[task.get("@id")] = task
+
+        moved = near_done = False
+        for uuid in sorted(self.pending):
+            task = seen.get(uuid)
+            if task is None:
+                self.finished[uuid] = None
+                self.pending.discard(uuid)
+                continue
+
+            status = task.get("status")
+            progress = _task_progress(task)
+            if self.on_progress is not None:
+                self.on_progress(uuid, status, progress)
+
+            if status in TERMINAL_TASK_STATUSES:
+                self.finished[uuid] = task
+                self.pending.discard(uuid)
+                continue
+
+            moved = moved or self._progress.get(uuid) != progress
+            near_done = near_done or progress >= self.NEAR_DONE
+            self._progress[uuid] = progress
+
+        if not self.pending:
+            return 0
+
+        if near_done:
+            self.interval = self.min_interval
+        elif moved:
+            self.interval = max(self.min_interval, self.interval / 2.0)
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+        if self.deadline is None:
+            return self.interval
+
+        remaining = self.deadline - time.time()
+        if remaining <= 0:
+            raise WaitTimeout(sorted(self.pending), self.finished)
+        return min(self.interval, remaining)
+
+
 class Client(object):
     """OpenVAS OMP Client"""
 
-    def __init__(self, host, username=None, password=None, port=DEFAULT_PORT):
-        """Initialize OMP client."""
+    def __init__(self, host, username=None, password=None, port=DEFAULT_PORT,
+                 max_response_size=None, parse_mode=PARSE_TREE, cache=None,
+                 hooks=None, retries=1, transport=None, retention=KEEP_RAW,
+                 records=False, report_store=None, governor=None,
+                 timeouts=None):
+        """Initialize OMP client.
+
+        max_response_size limits the number of bytes accepted for a single
+        response, ResponseTooLarge is raised once it is exceeded.
+
+        With parse_mode "dict", responses are converted to dicts while they
+        are received instead of building an element tree first, the tree is
+        only rebuilt if `Response.xml` is used.
+
+        cache is an optional `pyvas.cache.ResponseCache` for responses to
+        commands on read-mostly entities.
+
+        hooks maps events to lists of instrumentation callbacks, see
+        `pyvas.metrics`.
+
+        When the connection has been dropped, the client reconnects,
+        resuming the TLS session, and authenticates again with the last
+        credentials used. Read only (get_*) commands which failed on a
+        broken connection are retried up to `retries` times.
+
+        transport connects the client to the manager, by default over TCP
+        and TLS to host and port, see `pyvas.transport`.
+
+        retention is the policy for the XML of responses once their data
+        has been built, "keep_raw", "drop_raw" or "raw_bytes_only", see
+        `Response`. Use `retention_policy` to change it for some calls.
+
+        With records, tasks, targets, reports and report results are listed
+        as compact `pyvas.records` objects instead of dicts. List calls and
+        `iter_report_results` take a `records` argument overriding it.
+
+        report_store is an optional `pyvas.cache.ReportStore` keeping the
+        responses of `get_report` and `download_report` for finished reports
+        on disk.
+
+        governor is an optional `pyvas.governor` limiting the commands sent
+        to the manager, usually shared with other clients.
+
+        timeouts is an optional `pyvas.timeouts.Timeouts` bounding the time
+        to connect and the time taken by each command, `deadline` changes
+        them for some calls. A command which timed out before the end of
+        the total timeout is retried like one which lost its connection.
+        """
+        if parse_mode not in (PARSE_TREE, PARSE_DICT):
+            raise ValueError("parse_mode must be 'tree' or 'dict'")
+        _check_retention(retention)
         self.host = host
         self.port = port
         self.username = username
         self.password = password
+        self.max_response_size = max_response_size
+        self.parse_mode = parse_mode
+        self.cache = cache
+        self.hooks = default_hooks()
+        for event, hook_list in six.iteritems(hooks or {}):
+            for hook in hook_list:
+                self.register_hook(event, hook)
+        self.retries = retries
+        self.reconnects = 0
         self.socket = None
         self.session = None
+        self._lock = threading.RLock()
+        self._streaming = False
+        self.transport = (transport if transport is not None
+                          else TLSTransport(host, port))
+        self._credentials = None
+        self.retention = retention
+        self.records = records
+        self.report_store = report_store
+        self.governor = governor
+        self.timeouts = timeouts
+        # overrides of retention and timeouts, local to a thread or task
+        self._local_retention = contextvars.ContextVar(
+            "pyvas_retention", default=None)
+        self._local_timeouts = contextvars.ContextVar(
+            "pyvas_timeouts", default=None)
 
     def open(self, username=None, password=None):
         """Open socket connection and authenticate client."""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket = sock = ssl.wrap_socket(sock)
-        sock.connect((self.host, self.port))
+        self._connect()
         self.authenticate(username, password)
 
     def close(self):
-        """Close client's socket connection to server."""
-        self.socket.close()
-        self.socket = None
+        """Close client's socket connection to server, if any."""
+        sock, self.socket = self.socket, None
+        if sock is not None:
+            self.transport.close(sock)
+
+    def _connect(self):
+        """Connect through the client's transport."""
+        timeouts = self._timeouts()
+        if timeouts is None:
+            self.socket = self.transport.connect()
+        else:
+            self.socket = self.transport.connect(timeouts)
+
+    def _drop_connection(self):
+        """Close a connection left out of sync by an incomplete command,
+        the next command reconnects."""
+        sock, self.socket = self.socket, None
+        if sock is not None:
+            try:
+                self.transport.close(sock)
+            except CONNECTION_ERRORS:
+                pass
+
+    def reconnect(self):
+        """Replace the connection and authenticate with the last
+        credentials used."""
+        with self._lock:
+            self._check_idle()
+            if self.socket is not None:
+                try:
+                    self.close()
+                except CONNECTION_ERRORS:
+                    self.socket = None
+            self.reconnects += 1
+            self._connect()
+            if self._credentials is not None:
+                self.authenticate(*self._credentials)
+
+    def is_alive(self):
+        """Returns True if the connection looks usable.
+
+        The manager never sends unsolicited data, so an idle socket which is
+        readable has either been closed by the peer or is out of sync.
+        """
+        if self.socket is None:
+            return False
+        try:
+            readable, _, _ = select.select([self.socket], [], [], 0)
+        except (ValueError, select.error, socket.error):
+            return False
+        if not readable:
+            return True
+        if not isinstance(self.socket, ssl.SSLSocket):
+            return False
+
+        # TLS records such as session tickets make the socket readable
+        # without there being any data
+        timeout = self.socket.gettimeout()
+        self.socket.settimeout(0)
+        try:
+            self.socket.recv(1)
+        except ssl.SSLWantReadError:
+            return True
+        except CONNECTION_ERRORS:
+            pass
+        finally:
+            self.socket.settimeout(timeout)
+        return False
 
     def authenticate(self, username=None, password=None):
         """Authenticate Client using username and password."""
         if self.socket is None:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket = sock = ssl.wrap_socket(sock)
-            sock.connect((self.host, self.port))
+            self._connect()
 
         if username is None:
             username = self.username
@@ -83,14 +492,104 @@ class Client(object):
         )
 
         try:
-            return self._command(request)
+            response = self._command(request)
         except HTTPError:
             raise AuthenticationError(username)
+        self._credentials = (username, password)
+        return response
+
+    @contextlib.contextmanager
+    def retention_policy(self, retention):
+        """Context manager applying a retention policy to the commands
+        made by the current thread, or asyncio task, within it."""
+        _check_retention(retention)
+        token = self._local_retention.set(retention)
+        try:
+            yield self
+        finally:
+            self._local_retention.reset(token)
+
+    def _retention(self):
+        """The retention policy for the current command."""
+        return self._local_retention.get() or self.retention
+
+    @contextlib.contextmanager
+    def deadline(self, **timeouts):
+        """Context manager changing the client's timeouts, e.g. total=5,
+        for the commands made by the current thread, or asyncio task,
+        within it."""
+        token = self._local_timeouts.set(
+            (self._timeouts() or Timeouts()).replace(**timeouts))
+        try:
+            yield self
+        finally:
+            self._local_timeouts.reset(token)
+
+    def _timeouts(self):
+        """The timeouts for the current command."""
+        return self._local_timeouts.get() or self.timeouts
+
+    def _deadline(self, request):
+        """Returns the Deadline of a command, if its time is limited."""
+        timeouts = self._timeouts()
+        if timeouts is None or not timeouts.limits_commands:
+            return None
+        return Deadline(timeouts, request.tag)
+
+    @contextlib.contextmanager
+    def _within(self, deadline):
+        """Use the socket in non-blocking mode for a command with a
+        deadline. A command which timed out leaves the rest of its response
+        to be read as the next one's, its connection is dropped."""
+        if deadline is None:
+            yield
+            return
+        sock = self.socket
+        previous = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            yield
+        except RequestTimeout:
+            self._drop_connection()
+            raise
+        finally:
+            if self.socket is sock:
+                sock.settimeout(previous)
+
+    def register_hook(self, event, hook):
+        """Register an instrumentation hook for event."""
+        if event not in self.hooks:
+            raise ValueError("Unknown hook event: {}".format(event))
+        self.hooks[event].append(hook)
+
+    def deregister_hook(self, event, hook):
+        """Deregister a hook, returns True if it was registered."""
+        try:
+            self.hooks[event].remove(hook)
+            return True
+        except (KeyError, ValueError):
+            return False
+
+    def batch(self):
+        """Returns a Batch queuing commands for a single round trip."""
+        from .batch import Batch
+        return Batch(self)
+
+    def changes(self, data_type, state=None):
+        """Returns a ChangeFeed of created and modified objects of a type."""
+        from .changes import ChangeFeed
+        return ChangeFeed(self, data_type, state=state)
 
     def list_port_lists(self, **kwargs):
         """Returns list of port lists, filtering via kwargs"""
         return self._list("port_list", **kwargs)
 
+    def iter_port_lists(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                        **kwargs):
+        """Lazily iterate over port lists, filtering via kwargs"""
+        return self._iter("port_list", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_port_list(self, uuid):
         """Returns a single port list using an @id"""
         return self._get("port_list", uuid=uuid)
@@ -117,6 +616,12 @@ class Client(object):
         """Returns list of targets, filtering via kwargs"""
         return self._list("target", **kwargs)
 
+    def iter_targets(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                     **kwargs):
+        """Lazily iterate over targets, filtering via kwargs"""
+        return self._iter("target", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_target(self, uuid):
         """Returns a single target using an @id."""
         return self._get("target", uuid=uuid)
@@ -152,6 +657,12 @@ class Client(object):
         """List configs and filter using kwargs."""
         return self._list("config", **kwargs)
 
+    def iter_configs(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                     **kwargs):
+        """Lazily iterate over configs and filter using kwargs."""
+        return self._iter("config", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_config(self, uuid):
         """Get config using uuid."""
         return self._get("config", uuid=uuid)
@@ -174,6 +685,12 @@ class Client(object):
         """List scanners and filter using kwargs."""
         return self._list("scanner", **kwargs)
 
+    def iter_scanners(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                      **kwargs):
+        """Lazily iterate over scanners and filter using kwargs."""
+        return self._iter("scanner", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_scanner(self, uuid):
         """Get scanner with uuid."""
         return self._get("scanner", uuid=uuid)
@@ -182,6 +699,12 @@ class Client(object):
         """List report formats with kwargs filters."""
         return self._list("report_format", **kwargs)
 
+    def iter_report_formats(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                            **kwargs):
+        """Lazily iterate over report formats, filtering via kwargs."""
+        return self._iter("report_format", page_size=page_size,
+                          prefetch=prefetch, **kwargs)
+
     def get_report_format(self, uuid):
         """Get report format with uuid."""
         return self._get("report_format", uuid=uuid)
@@ -190,6 +713,12 @@ class Client(object):
         """List tasks with kwargs filtering."""
         return self._list("task", **kwargs)
 
+    def iter_tasks(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                   **kwargs):
+        """Lazily iterate over tasks with kwargs filtering."""
+        return self._iter("task", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_task(self, uuid):
         """Get task with uuid."""
         return self._get("task", uuid=uuid)
@@ -238,6 +767,29 @@ class Client(object):
 
         return self._create(request)
 
+    def wait_for_tasks(self, uuids, timeout=None, on_progress=None,
+                       min_interval=2, max_interval=30):
+        """Wait for tasks to reach a terminal state.
+
+        All watched tasks are polled with a single get_tasks request per
+        cycle, finished tasks are dropped from the next poll. The interval
+        between polls shrinks to min_interval while a task is close to done
+        and backs off up to max_interval while there is no progress.
+
+        on_progress(uuid, status, progress) is called for every task on
+        each poll. Returns a dict of uuid to final task data (None for tasks
+        which no longer exist), or raises WaitTimeout after timeout seconds.
+        """
+        waiter = _TaskWaiter(uuids, timeout, on_progress,
+                             min_interval, max_interval)
+        while waiter.pending:
+            tasks = self._list("task", filter_terms=waiter.filter_terms(),
+                               records=False)
+            delay = waiter.update(tasks.data)
+            if delay:
+                time.sleep(delay)
+        return waiter.finished
+
     def start_task(self, uuid):
         """Start a task."""
         request = etree.Element("start_task")
@@ -264,6 +816,12 @@ class Client(object):
         """List task reports."""
         return self._list("report", **kwargs)
 
+    def iter_reports(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                     **kwargs):
+        """Lazily iterate over task reports."""
+        return self._iter("report", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def get_report(self, uuid, **kwargs):
         """Get task report by uuid."""
         return self._get('report', uuid=uuid)
@@ -271,39 +829,91 @@ class Client(object):
     def download_report(self, uuid, format_uuid=None, as_element_tree=False,
                         **kwargs):
         """Get XML or base64 encoded report contents"""
-        request = etree.Element("get_reports")
-
-        request.set("report_id", uuid)
-
-        if format_uuid is not None:
-            request.set("format_id", format_uuid)
-
-        if kwargs is not {}:
-
-            def filter_str(k, v):
-                return "{}=\"{}\"".format(k, v)
-
-            filters = [filter_str(k, v) for k, v in six.iteritems(kwargs) if v]
-
-            if filters:
-                request.set("filter", " ".join(filters))
-
-        response = self._command(request)
+        request = _report_request(uuid, format_uuid, kwargs)
+        # the contents of non-XML reports are text after report_format,
+        # which dicts do not keep
+        response = self._command(request, parse_mode=PARSE_TREE)
+        return _report_contents(response, as_element_tree)
+
+    def download_report_to(self, uuid, fileobj, format_uuid=None, **kwargs):
+        """Write report contents to a file object or path.
+
+        Base64 encoded reports (PDF, CSV, TXT...) are decoded and written
+        while they are read off the socket, so memory use does not grow
+        with the size of the report. Returns the Response, without the
+        report contents.
+
+        It is sent again after a dropped connection only while nothing has
+        been written yet.
+        """
+        request = _report_request(uuid, format_uuid, kwargs)
+        with _output_file(fileobj) as out:
+            parser = ResponseParser(max_response_size=self.max_response_size,
+                                    target=ReportTarget(out))
+            resp, _ = self._send_with_retry(request, parser=parser)
+            response = Response(req=request, resp=resp)
+            response.raise_for_status()
+        return response
 
-        report = response.xml.find("report")
-
-        if report.attrib["content_type"] == "text/xml" or as_element_tree:
-            return report
-        report = response.xml.find(".//report_format").tail
-        try:
-            return report.decode("base64")
-        except AttributeError:
-            return report
+    def iter_report_results(self, uuid, records=None, **kwargs):
+        """Yield the results of a report one at a time, as dicts or, with
+        records, as `pyvas.records.Result`.
+
+        The response is parsed while it is read off the socket and each
+        result is discarded once the next one is requested, so memory use
+        stays flat regardless of the size of the report. The connection is
+        held, and other threads kept waiting, until the generator is
+        exhausted or closed. Commands sent by the same thread meanwhile
+        raise RuntimeError.
+
+        It is sent again after a dropped connection only while no result
+        has been received yet.
+        """
+        request = _report_results_request(uuid, kwargs)
+        convert = self._result_converter(records)
+        deadline = self._deadline(request)
+        retries = self.retries
+
+        with self._lock:
+            self._check_idle()
+            if self._credentials is not None and not self.is_alive():
+                self.reconnect()
+            while True:
+                parser = ResponseParser(
+                    max_response_size=self.max_response_size,
+                    tag="result", parent="results")
+                try:
+                    with self._within(deadline):
+                        self._write_request(request, deadline=deadline)
+                        reader = ResponseReader(self.socket, parser,
+                                                deadline=deadline)
+                        self._streaming = True
+                        try:
+                            for result in reader.iterparse():
+                                yield convert(result)
+                        finally:
+                            self._streaming = False
+                    break
+                except CONNECTION_ERRORS + (RequestTimeout,) as error:
+                    if (parser.bytes_received or
+                            not self._retryable(error, retries)):
+                        raise
+                    retries -= 1
+                    self.reconnect()
+
+        Response(req=request, resp=parser.close(),
+                 cb=_no_data).raise_for_status()
 
     def list_schedules(self, **kwargs):
         """List schedules and filter by kwargs."""
         return self._list("schedule", **kwargs)
 
+    def iter_schedules(self, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+                       **kwargs):
+        """Lazily iterate over schedules and filter by kwargs."""
+        return self._iter("schedule", page_size=page_size, prefetch=prefetch,
+                          **kwargs)
+
     def create_schedule(self, name, comment=None, copy=None, first_time=None,
                         duration=None, duration_unit=None, period=None,
                         period_unit=None, timezone=None):
@@ -362,16 +972,181 @@ class Client(object):
         """Delete a schedule."""
         return self._delete('schedule', uuid=uuid)
 
-    def _command(self, request, cb=None):
+    def _command(self, request, cb=None, parse_mode=None):
         """Send, build and validate response."""
-        resp = self._send_request(request)
-
-        response = Response(req=request, resp=resp, cb=cb)
-        # validate response, raise exceptions, if any
-        response.raise_for_status()
+        timings = self._pre_command(request)
+        response, cached = None, False
+        retention, raw_bytes = self._retention(), None
+        try:
+            resp, raw_bytes, cached = self._fetch(request, timings, retention,
+                                                  parse_mode)
+
+            response = Response(req=request, resp=resp, cb=cb,
+                                retention=retention, raw_bytes=raw_bytes)
+            if not cached:
+                self._cache_update(request, resp, response.status_code)
+            # validate response, raise exceptions, if any
+            response.raise_for_status()
+        except Exception as error:
+            if timings is not None:
+                timings.error = type(error).__name__
+            raise
+        finally:
+            if timings is not None:
+                self._post_command(timings, response, cached)
 
         return response
 
+    def _fetch(self, request, timings, retention, parse_mode=None):
+        """Returns the response to request, from the caches or the manager,
+        its compressed bytes if retained and whether it was cached."""
+        compress = retention == RAW_BYTES_ONLY
+        resp = self._cache_get(request)
+        if resp is not None:
+            return resp, None, True
+        if (self.report_store is None or
+                not self.report_store.cacheable(request)):
+            resp, raw_bytes = self._send_with_retry(request, timings,
+                                                    compress=compress,
+                                                    parse_mode=parse_mode)
+            return resp, raw_bytes, False
+
+        report = self._report_state(request.get("report_id"))
+        resp, raw_bytes = self._stored_report(request, report, parse_mode)
+        if resp is not None:
+            return resp, raw_bytes if compress else None, True
+        resp, raw_bytes = self._send_with_retry(request, timings,
+                                                compress=True,
+                                                parse_mode=parse_mode)
+        self._store_report(request, report, resp, raw_bytes)
+        return resp, raw_bytes if compress else None, False
+
+    def _report_state(self, uuid):
+        """Returns a report's metadata, without its results."""
+        request = etree.Element("get_reports", report_id=uuid, details="0")
+        return self._command(request, cb=_report_record).data
+
+    def _stored_report(self, request, report, parse_mode=None):
+        """Returns the stored response to a report request and its
+        compressed bytes, if the report is unchanged since."""
+        if report.modification_time is None:
+            return None, None
+        raw_bytes = self.report_store.get(
+            request, report.modification_time.isoformat())
+        if raw_bytes is None:
+            return None, None
+        parser = self._response_parser(parse_mode)
+        parser.feed(zlib.decompress(raw_bytes))
+        return parser.close(), raw_bytes
+
+    def _store_report(self, request, report, resp, raw_bytes):
+        """Store the response to a report request, once it is finished."""
+        if (report.modification_time is not None and _ok(resp) and
+                report.scan_run_status in TERMINAL_TASK_STATUSES):
+            self.report_store.put(
+                request, report.modification_time.isoformat(), raw_bytes)
+
+    def _send_with_retry(self, request, timings=None, compress=False,
+                         parse_mode=None, parser=None):
+        """Send a request, reconnecting when the connection was dropped.
+
+        Only idempotent requests are sent again after a failure, others may
+        have been executed before the connection broke. A given parser is
+        used for every attempt, so only while it has received nothing.
+        Returns the parsed response and, with compress, its compressed
+        bytes.
+        """
+        with self._lock:
+            self._check_idle()
+            if self._credentials is not None and not self.is_alive():
+                self.reconnect()
+
+            retries = self.retries if _idempotent(request) else 0
+            deadline = self._deadline(request)
+            while True:
+                attempt = parser
+                if attempt is None:
+                    attempt = self._response_parser(parse_mode, compress)
+                try:
+                    resp = self._send_governed(request, attempt, timings,
+                                               deadline)
+                    return resp, attempt.compressed
+                except CONNECTION_ERRORS + (RequestTimeout,) as error:
+                    if ((parser is not None and parser.bytes_received) or
+                            not self._retryable(error, retries)):
+                        raise
+                    retries -= 1
+                    self.reconnect()
+
+    def _send_envelope(self, envelope):
+        """Send the `<commands>` envelope of a batch, returns its response
+        parsed to a tree.
+
+        Hooks see the envelope as a single command. It is sent again after
+        a dropped connection if all of its commands are idempotent.
+        """
+        timings = self._pre_command(envelope)
+        try:
+            resp, _ = self._send_with_retry(envelope, timings,
+                                            parse_mode=PARSE_TREE)
+            return resp
+        except Exception as error:
+            if timings is not None:
+                timings.error = type(error).__name__
+            raise
+        finally:
+            if timings is not None:
+                self._post_command(timings, None, False)
+
+    def _check_idle(self):
+        """Raise RuntimeError while the connection is reading the results
+        of `iter_report_results`, another command would be sent in their
+        midst."""
+        if self._streaming:
+            raise RuntimeError("iter_report_results is reading the "
+                               "connection, exhaust or close it first")
+
+    def _retryable(self, error, retries):
+        """Whether a command which failed with error is sent again."""
+        return (retries > 0 and self._credentials is not None and
+                getattr(error, "phase", None) != TOTAL)
+
+    def _pre_command(self, request):
+        """Call pre_command hooks, returns a CommandTimings if timed."""
+        dispatch_hook(self.hooks, "pre_command", request)
+        if self.hooks["post_command"] or self.hooks["post_convert"]:
+            return CommandTimings(request.tag)
+        return None
+
+    def _post_command(self, timings, response, cached):
+        """Complete timings and call post_command hooks."""
+        timings.total_time = clock() - timings.started
+        timings.cached = cached
+        if response is not None:
+            timings.status_code = response.status_code
+            if self.hooks["post_convert"]:
+                def on_convert(response):
+                    timings.convert_time = response.convert_time
+                    dispatch_hook(self.hooks, "post_convert", timings)
+                response.on_convert = on_convert
+        dispatch_hook(self.hooks, "post_command", timings)
+
+    def _cache_get(self, request):
+        """Returns a cached response to request, if any."""
+        if self.cache is None or not self.cache.cacheable(request):
+            return None
+        return self.cache.get(request)
+
+    def _cache_update(self, request, resp, status_code):
+        """Cache a fresh response, or invalidate what request changed."""
+        if self.cache is None:
+            return
+        if self.cache.cacheable(request):
+            if 200 <= status_code < 300:
+                self.cache.put(request, resp)
+        else:
+            self.cache.invalidate(request)
+
     def _get(self, data_type, uuid, cb=None):
         """Generic get function."""
         request = etree.Element("get_{}s".format(data_type))
@@ -380,31 +1155,99 @@ class Client(object):
 
         if cb is None:
             def cb(resp):
+                if isinstance(resp, dict):
+                    return _children(resp, data_type)[0]
                 return list(
                     lxml_to_dict(resp.find(data_type)).values()
                 )[0]
 
         return self._command(request, cb)
 
-    def _list(self, data_type, cb=None, **kwargs):
-        """Generic list function."""
+    def _result_converter(self, records=None):
+        """Returns the conversion of report result elements."""
+        if records is None:
+            records = self.records
+        if records:
+            return Result.from_element
+        return lambda result: lxml_to_dict(result, True)
+
+    def _list(self, data_type, cb=None, filter_terms=None, records=None,
+              **kwargs):
+        """Generic list function.
+
+        With records, or the client's records default, supported entities
+        are returned as `pyvas.records` objects.
+        """
         request = etree.Element("get_{}s".format(data_type))
 
-        if kwargs is not {}:
-            def filter_str(k, v):
-                return "{}=\"{}\"".format(k, v)
-            filters = [filter_str(k, v) for k, v in six.iteritems(kwargs) if v]
-            if filters:
-                request.set("filter", " ".join(filters))
+        _set_filter(request, kwargs, filter_terms)
 
-        if cb is None:
+        if records is None:
+            records = self.records
+        record_type = RECORD_TYPES.get(data_type) if records else None
+
+        if cb is None and record_type is not None:
             def cb(resp):
+                if isinstance(resp, dict):
+                    return [record_type.from_dict(i)
+                            for i in _children(resp, data_type)]
+                return [record_type.from_element(i)
+                        for i in resp.findall(data_type)]
+        elif cb is None:
+            def cb(resp):
+                if isinstance(resp, dict):
+                    return _children(resp, data_type)
                 return [lxml_to_dict(i, True) for i in resp.findall(data_type)]
 
         response = self._command(request, cb=cb)
 
         return response
 
+    def _iter(self, data_type, page_size=DEFAULT_PAGE_SIZE, prefetch=False,
+              **kwargs):
+        """Generic lazy list function, fetching `page_size` rows at a time.
+
+        With prefetch, page N+1 is requested in a background thread while
+        the caller works through page N, within the caller's `deadline` and
+        `retention_policy`.
+        """
+        def fetch(first):
+            return self._list(data_type, first=first, rows=page_size,
+                              **kwargs)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        first = 1
+        page = fetch(first)
+        try:
+            while True:
+                # read before data, which may release the raw response
+                count = _filtered_count(page, data_type)
+                items = page.data
+                if count is not None:
+                    more = first + page_size <= int(count)
+                else:
+                    more = len(items) >= page_size
+
+                if more:
+                    first += page_size
+                    if executor is not None:
+                        next_page = executor.submit(
+                            contextvars.copy_context().run, fetch, first)
+
+                for item in items:
+                    yield item
+
+                if not more:
+                    break
+
+                if executor is not None:
+                    page = next_page.result()
+                else:
+                    page = fetch(first)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
     def _create(self, request):
         """generic create function."""
         return self._command(request)
@@ -425,30 +1268,63 @@ class Client(object):
 
         return self._command(request)
 
-    def _send_request(self, request):
-        """Send XML data to OpenVAS Manager and get results"""
-
-        block_size = 1024
-
-        if etree.iselement(request):
-            root = etree.ElementTree(request)
-            root.write(self.socket, encoding="utf-8")
-
+    def _write_request(self, request, timings=None, deadline=None):
+        """Send XML data to OpenVAS Manager."""
+        if timings is None:
+            self._sendall(_serialize(request), deadline)
+            return
+
+        start = clock()
+        data = _serialize(request)
+        serialized = clock()
+        self._sendall(data, deadline)
+        record_send(timings, start, serialized, clock(), len(data))
+
+    def _sendall(self, data, deadline=None):
+        if deadline is None:
+            self.socket.sendall(data)
         else:
-            if isinstance(request, six.text_type):
-                request = request.encode("utf-8")
-            self.socket.send(request)
-
-        parser = etree.XMLTreeBuilder()
-
-        while True:
-            response = self.socket.recv(block_size)
-            parser.feed(response)
-            if len(response) < block_size:
-                break
-
-        root = parser.close()
-        return root
+            sendall(self.socket, data, deadline)
+
+    def _response_parser(self, parse_mode=None, compress=False):
+        """Returns a ResponseParser for the client's parse mode."""
+        if parse_mode is None:
+            parse_mode = self.parse_mode
+        target = DictTarget() if parse_mode == PARSE_DICT else None
+        return ResponseParser(max_response_size=self.max_response_size,
+                              target=target, compress=compress)
+
+    def _send_governed(self, request, parser, timings=None, deadline=None):
+        """Send a request within the limits of the client's governor."""
+        governor = self.governor
+        if governor is None:
+            return self._send_request(request, parser=parser,
+                                      timings=timings, deadline=deadline)
+        governor.acquire(request.tag)
+        start, error = clock(), None
+        try:
+            resp = self._send_request(request, parser=parser, timings=timings,
+                                      deadline=deadline)
+            error = _server_error(resp)
+            return resp
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            governor.release(request.tag, clock() - start, error)
+
+    def _send_request(self, request, parse_mode=None, parser=None,
+                      timings=None, deadline=None):
+        """Send XML data to OpenVAS Manager and get results"""
+        with self._lock:
+            self._check_idle()
+            with self._within(deadline):
+                self._write_request(request, timings, deadline)
+
+                if parser is None:
+                    parser = self._response_parser(parse_mode)
+                return ResponseReader(self.socket, parser, timings=timings,
+                                      deadline=deadline).read()
 
     def __enter__(self):
         """Implements `with` context manager syntax"""
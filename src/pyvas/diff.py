@@ -0,0 +1,128 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas report diff
+~~~~~~~~~~~~~~~~~
+Compare the results of two reports, e.g. to gate CI on new findings:
+
+> from pyvas.diff import NEW, diff_reports
+> new = [d for d in diff_reports(cli, baseline_uuid, report_uuid)
+>        if d.kind == NEW]
+
+Results are identified by (host, port, NVT OID) and joined on that key in
+linear time: the baseline's results are hashed, then the other report's
+results are streamed against them. Further results with a key already seen
+on the same side are ignored.
+
+Only the baseline's results are held in memory, as compact
+`pyvas.records.Result`. With `partitions`, both reports are first spilled to
+that many temporary files by key and joined one partition at a time,
+which divides the memory needed accordingly.
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import pickle
+import tempfile
+
+from .records import Result
+
+
+NEW = "new"
+FIXED = "fixed"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+Difference = collections.namedtuple("Difference", "kind key old new")
+Difference.__doc__ = """A result's change between two reports, old or new
+is None for results only in one of them."""
+
+
+def _record(result):
+    if isinstance(result, dict):
+        return Result.from_dict(result)
+    return result
+
+
+def result_key(result):
+    """Returns the (host, port, NVT OID) key of a result record."""
+    return (result.host, result.port, result.nvt_oid)
+
+
+def _join(old, new):
+    build = {}
+    for result in old:
+        build.setdefault(result_key(result), result)
+
+    seen = set()
+    for result in new:
+        key = result_key(result)
+        if key in seen:
+            continue
+        seen.add(key)
+        previous = build.pop(key, None)
+        if previous is None:
+            yield Difference(NEW, key, None, result)
+        elif previous.severity != result.severity:
+            yield Difference(CHANGED, key, previous, result)
+        else:
+            yield Difference(UNCHANGED, key, previous, result)
+
+    for key, result in build.items():
+        yield Difference(FIXED, key, result, None)
+
+
+def _spill(results, partitions):
+    """Write results to temporary files by key."""
+    files = [tempfile.TemporaryFile() for _ in range(partitions)]
+    for result in results:
+        pickle.dump(result, files[hash(result_key(result)) % partitions],
+                    pickle.HIGHEST_PROTOCOL)
+    for spilled in files:
+        spilled.seek(0)
+    return files
+
+
+def _load(spilled):
+    while True:
+        try:
+            yield pickle.load(spilled)
+        except EOFError:
+            return
+
+
+def diff_results(old, new, partitions=1):
+    """Yield a `Difference` for each result of two iterables of results,
+    either `pyvas.records.Result` or dicts.
+
+    Baseline results missing from new are yielded last, as FIXED.
+    """
+    old = (_record(result) for result in old)
+    new = (_record(result) for result in new)
+    if partitions <= 1:
+        for difference in _join(old, new):
+            yield difference
+        return
+
+    old_files = _spill(old, partitions)
+    new_files = []
+    try:
+        new_files = _spill(new, partitions)
+        for old_file, new_file in zip(old_files, new_files):
+            for difference in _join(_load(old_file), _load(new_file)):
+                yield difference
+    finally:
+        for spilled in old_files + new_files:
+            spilled.close()
+
+
+def diff_reports(client, old_uuid, new_uuid, partitions=1, **kwargs):
+    """Yield the `Difference`s between the results of two reports.
+
+    The reports are streamed with `Client.iter_report_results`, kwargs
+    filter both.
+    """
+    return diff_results(
+        client.iter_report_results(old_uuid, records=True, **kwargs),
+        client.iter_report_results(new_uuid, records=True, **kwargs),
+        partitions=partitions)
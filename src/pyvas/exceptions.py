@@ -22,6 +22,82 @@ class AuthenticationError(Error):
     """Authentication Failed"""
 
 
+class ConnectionClosed(Error):
+    """Server closed the connection before the response was complete."""
+
+    def __str__(self):
+        return ("Connection closed by server after %s bytes of response" %
+                self.args)
+
+
+class ResponseTooLarge(Error):
+    """Response exceeded the client's maximum response size."""
+
+    def __str__(self):
+        return "Response exceeded maximum size of %s bytes" % self.args
+
+
+class Timeout(Error):
+    """An operation did not complete within its time budget."""
+
+
+class PoolTimeout(Timeout):
+    """No pooled connection became available in time."""
+
+    def __str__(self):
+        return ("No connection available in pool of %s after %s seconds" %
+                self.args)
+
+
+class WaitTimeout(Timeout):
+    """Tasks did not finish in time.
+
+    `pending` lists the unfinished task ids and `finished` maps those that
+    did finish to their task data.
+    """
+
+    def __init__(self, pending, finished=None):
+        super(WaitTimeout, self).__init__(pending)
+        self.pending = pending
+        self.finished = finished or {}
+
+    def __str__(self):
+        return "Timed out waiting for tasks: %s" % ", ".join(self.pending)
+
+
+class DeadlineExceeded(Timeout):
+    """A manager did not answer before the call's deadline."""
+
+    def __str__(self):
+        return "Manager %s did not answer within %s seconds" % self.args
+
+
+class RequestTimeout(Timeout):
+    """A connection or command ran out of time.
+
+    `phase` is the budget which ran out, "connect", "handshake", "ttfb" or
+    "total", and `timeout` its number of seconds. `elapsed`, `bytes_sent`
+    and `bytes_received` tell how far the transfer got.
+    """
+
+    def __init__(self, command, phase, timeout, elapsed=None, bytes_sent=0,
+                 bytes_received=0):
+        super(RequestTimeout, self).__init__(command, phase, timeout)
+        self.command = command
+        self.phase = phase
+        self.timeout = timeout
+        self.elapsed = elapsed
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+
+    def __str__(self):
+        return ("%s timed out: %s timeout of %s seconds exceeded after "
+                "%.3f seconds, %s bytes sent, %s bytes received" % (
+                    self.command, self.phase, self.timeout,
+                    self.elapsed or 0.0, self.bytes_sent,
+                    self.bytes_received))
+
+
 class RequestError(Error):
     """There was an ambiguous exception that occured while handling you
     request.
@@ -0,0 +1,248 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas governors
+~~~~~~~~~~~~~~~
+Client side limits on the load put on a manager. A governor shared by
+several clients, e.g. those of a `ClientPool`, holds back their commands:
+
+> from pyvas.governor import AIMDLimit
+> pool = ClientPool(host, username=username, password=password, size=16,
+>                   governor=AIMDLimit(initial=4, maximum=16))
+
+- `TokenBucket` limits the rate of commands,
+- `AIMDLimit` limits the number of commands in flight, halving the limit
+  when the manager slows down or fails with 5xx errors and growing it
+  again by one per window of successful commands,
+- `Chain` applies several governors.
+
+A governor provides `acquire(command)`, called before a command is sent,
+and `release(command, latency, error)`, called once its response has been
+received or sending it failed. error is the exception raised, or a
+`ServerError` for responses with a 5xx status.
+
+`AsyncClient` awaits a governor's `acquire_async(command)` coroutine, which
+must not hold anything when cancelled while waiting. Governors without one
+are acquired in a thread.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+import threading
+import time
+
+from .exceptions import ConnectionClosed
+from .exceptions import ServerError
+from .exceptions import Timeout
+
+
+class TokenBucket(object):
+    """Allow `rate` commands per second, in bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token, returns 0 or the seconds until one is due."""
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, command=None):
+        """Wait for a token."""
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self, command=None):
+        """Wait for a token without blocking the event loop."""
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+    def release(self, command=None, latency=None, error=None):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {"rate": self.rate, "tokens": self._tokens}
+
+
+class AIMDLimit(object):
+    """Limit commands in flight with additive increase, multiplicative
+    decrease.
+
+    A command is congested when it fails with a `ServerError`, a timeout
+    or a broken connection, or takes longer than `latency` seconds. Without
+    latency, the threshold is `tolerance` times a baseline per command, so
+    slow commands such as report downloads are not held against fast ones.
+    The baseline is the fastest time seen, rising slowly with slower ones
+    so that a single outlier does not stick.
+
+    The limit is multiplied by `backoff` on congestion, at most once per
+    `cooldown` seconds, and increased by one after each window of `limit`
+    uncongested commands.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5,
+                 latency=None, tolerance=2.0, cooldown=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency = latency
+        self.tolerance = tolerance
+        self.cooldown = cooldown
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._baselines = {}
+        self._decreased = 0.0
+        self._cond = threading.Condition()
+        # (loop, future) of coroutines waiting for a release
+        self._waiters = []
+        self.decreases = 0
+
+    @property
+    def limit(self):
+        """Current number of commands allowed in flight."""
+        return int(self._limit)
+
+    def acquire(self, command=None):
+        """Wait until fewer than `limit` commands are in flight."""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self, command=None):
+        """Wait until fewer than `limit` commands are in flight, without
+        blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            # a cancelled waiter has not taken a slot
+            await waiter
+
+    def release(self, command=None, latency=None, error=None):
+        """Account a completed command and adjust the limit."""
+        with self._cond:
+            self._in_flight -= 1
+            if self._congested(command, latency, error):
+                now = time.time()
+                if now - self._decreased >= self.cooldown:
+                    self._decreased = now
+                    self.decreases += 1
+                    self._limit = max(self.minimum,
+                                      self._limit * self.backoff)
+            elif error is None and latency is not None:
+                self._limit = min(self.maximum,
+                                  self._limit + 1.0 / int(self._limit))
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # the loop has been closed
+                pass
+
+    def _congested(self, command, latency, error):
+        if error is not None:
+            return isinstance(error, (ServerError, Timeout, ConnectionClosed,
+                                      EnvironmentError))
+        if latency is None:
+            return False
+        if self.latency is not None:
+            return latency > self.latency
+        baseline = self._baselines.get(command)
+        if baseline is None or latency < baseline:
+            self._baselines[command] = latency
+            return False
+        self._baselines[command] = baseline + (latency - baseline) * 0.01
+        return latency > baseline * self.tolerance
+
+    def stats(self):
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self._in_flight,
+                    "decreases": self.decreases}
+
+
+class Chain(object):
+    """Apply several governors, in order."""
+
+    def __init__(self, *governors):
+        self.governors = governors
+
+    def acquire(self, command=None):
+        acquired = []
+        try:
+            for governor in self.governors:
+                governor.acquire(command)
+                acquired.append(governor)
+        except BaseException:
+            for governor in reversed(acquired):
+                governor.release(command)
+            raise
+
+    async def acquire_async(self, command=None):
+        acquired = []
+        try:
+            for governor in self.governors:
+                await acquire_async(governor, command)
+                acquired.append(governor)
+        except BaseException:
+            for governor in reversed(acquired):
+                governor.release(command)
+            raise
+
+    def release(self, command=None, latency=None, error=None):
+        for governor in reversed(self.governors):
+            governor.release(command, latency, error)
+
+    def stats(self):
+        return [governor.stats() for governor in self.governors]
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+async def acquire_async(governor, command=None):
+    """Acquire a governor from a coroutine.
+
+    Governors without `acquire_async` are acquired in a thread. If the
+    coroutine is cancelled meanwhile, they are released again as soon as
+    the thread has acquired them.
+    """
+    if hasattr(governor, "acquire_async"):
+        await governor.acquire_async(command)
+        return
+
+    def release_acquired(future):
+        if not future.cancelled() and future.exception() is None:
+            governor.release(command)
+
+    future = asyncio.get_running_loop().run_in_executor(
+        None, governor.acquire, command)
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(release_acquired)
+        raise
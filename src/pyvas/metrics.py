@@ -0,0 +1,199 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas metrics
+~~~~~~~~~~~~~
+Per-command instrumentation:
+
+> from pyvas.metrics import MetricsCollector
+> metrics = MetricsCollector()
+> cli = Client(host, username=username, password=password)
+> metrics.register(cli)
+> ...
+> metrics.summary()["get_tasks"]["ttfb"]["p99"]
+
+Hooks are registered on a client by event:
+
+- `pre_command(request)`, before a command is sent,
+- `post_command(timings)`, once its response has been validated,
+- `post_convert(timings)`, once its response data has been converted, which
+  happens lazily on first use of `Response.data`.
+
+Timings are only taken while a `post_*` hook is registered. All durations
+are in seconds, measured with `time.perf_counter`.
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import math
+import threading
+import time
+
+
+HOOK_EVENTS = ("pre_command", "post_command", "post_convert")
+
+TIMINGS = (
+    "serialize_time",
+    "send_time",
+    "ttfb",
+    "recv_time",
+    "parse_time",
+    "convert_time",
+    "total_time",
+)
+
+PERCENTILES = (50, 90, 99)
+
+
+clock = time.perf_counter
+
+
+def default_hooks():
+    """Returns an empty hook registry."""
+    return dict((event, []) for event in HOOK_EVENTS)
+
+
+def dispatch_hook(hooks, event, data):
+    """Call each hook registered for event with data."""
+    for hook in hooks.get(event, ()):
+        hook(data)
+
+
+def record_send(timings, start, serialized, sent, size):
+    """Account a request serialized and sent at the given times."""
+    timings.serialize_time = serialized - start
+    timings.send_time = sent - serialized
+    timings.sent = sent
+    timings.bytes_out = size
+
+
+def record_recv(timings, start, end, size):
+    """Account a recv call which started and ended at the given times.
+
+    The first call's wait counts towards the time to first byte, the
+    following ones towards the receive time.
+    """
+    timings.bytes_in += size
+    if timings.ttfb is None:
+        timings.ttfb = end - (timings.sent or start)
+        timings.recv_time = 0.0
+    else:
+        timings.recv_time += end - start
+
+
+class CommandTimings(object):
+    """Timings and sizes of a single OMP command."""
+
+    def __init__(self, command):
+        self.command = command
+        self.timestamp = time.time()
+        self.started = clock()
+        self.serialize_time = None
+        self.send_time = None
+        self.ttfb = None
+        self.recv_time = None
+        self.parse_time = None
+        self.convert_time = None
+        self.total_time = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.status_code = None
+        self.error = None
+        self.cached = False
+        # clock() at the end of the send, ttfb is measured from here
+        self.sent = None
+
+    def as_dict(self):
+        """Returns the timings as a dict, e.g. for export."""
+        data = dict((name, getattr(self, name)) for name in TIMINGS)
+        data.update(command=self.command, timestamp=self.timestamp,
+                    bytes_out=self.bytes_out, bytes_in=self.bytes_in,
+                    status_code=self.status_code, error=self.error,
+                    cached=self.cached)
+        return data
+
+    def __repr__(self):
+        return "<CommandTimings {} [{}]>".format(self.command,
+                                                 self.status_code)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of sorted values: the smallest value with
+    at least pct percent of values less than or equal to it."""
+    if not values:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(values)))
+    return values[max(0, rank - 1)]
+
+
+class MetricsCollector(object):
+    """In-process aggregator of command timings.
+
+    Keeps the last `maxlen` samples of each timing per command, and running
+    totals of counts, errors and bytes.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self.reset()
+
+    def register(self, client):
+        """Register the collector's hooks on a client."""
+        client.register_hook("post_command", self.record)
+        client.register_hook("post_convert", self.record_convert)
+
+    def _sample(self, command, name, value):
+        key = (command, name)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = collections.deque(
+                maxlen=self.maxlen)
+        samples.append(value)
+
+    def record(self, timings):
+        """post_command hook recording a command's timings."""
+        with self._lock:
+            totals = self._totals[timings.command]
+            totals["count"] += 1
+            totals["errors"] += timings.error is not None
+            totals["cached"] += timings.cached
+            totals["bytes_out"] += timings.bytes_out
+            totals["bytes_in"] += timings.bytes_in
+            for name in TIMINGS:
+                value = getattr(timings, name)
+                if value is not None and name != "convert_time":
+                    self._sample(timings.command, name, value)
+
+    def record_convert(self, timings):
+        """post_convert hook recording a response's conversion time."""
+        with self._lock:
+            self._sample(timings.command, "convert_time",
+                         timings.convert_time)
+
+    def summary(self):
+        """Returns per command totals and timing percentiles.
+
+        e.g. {"get_tasks": {"count": 2, ..., "ttfb": {"p50": 0.01, ...}}}
+        """
+        with self._lock:
+            summary = dict((command, dict(totals))
+                           for command, totals in self._totals.items())
+            samples = [(key, sorted(values))
+                       for key, values in self._samples.items()]
+
+        for (command, name), values in samples:
+            stats = {
+                "mean": sum(values) / len(values),
+                "max": values[-1],
+            }
+            for pct in PERCENTILES:
+                stats["p{}".format(pct)] = percentile(values, pct)
+            summary.setdefault(command, {})[name] = stats
+        return summary
+
+    def reset(self):
+        """Drop all recorded samples."""
+        with self._lock:
+            self._totals = collections.defaultdict(collections.Counter)
+            self._samples = {}
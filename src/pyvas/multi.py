@@ -0,0 +1,182 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas multi-manager client
+==========================
+usage:
+
+> from pyvas.multi import MultiClient
+> with MultiClient(["gvmd-eu.example.com", ("gvmd-us.example.com", 9390)],
+>                  username=username, password=password, timeout=30) as multi:
+>     response = multi.list_tasks()
+>     for manager, task in response.data:
+>         ...
+>     response.errors  # e.g. {"gvmd-us.example.com:9390": DeadlineExceeded}
+
+Read commands, `list_*` and `get_*`, run on all managers in parallel, each
+on a connection of its own `pyvas.pool.ClientPool`. A manager which fails or
+does not answer before the call's deadline is reported in `errors` and
+does not hold up the others.
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+import six
+
+from .client import Client
+from .client import DEFAULT_PORT
+from .exceptions import DeadlineExceeded
+from .pool import ClientPool
+
+
+READ_PREFIXES = ("list_", "get_")
+
+
+def _endpoint(manager):
+    """Returns the name and ClientPool arguments of a manager endpoint,
+    given as host, (host, port) or a dict of keyword arguments."""
+    if isinstance(manager, six.string_types):
+        manager = {"host": manager}
+    elif isinstance(manager, (tuple, list)):
+        manager = {"host": manager[0], "port": manager[1]}
+    kwargs = dict(manager)
+    kwargs.setdefault("port", DEFAULT_PORT)
+    name = kwargs.pop("name", None) or "{}:{}".format(kwargs["host"],
+                                                      kwargs["port"])
+    return name, kwargs
+
+
+class MultiResponse(object):
+    """Responses of several managers to the same command.
+
+    `responses` maps manager names to the `Response` of those which
+    answered, `errors` to the exception raised for the others.
+    """
+
+    def __init__(self, command, responses, errors, elapsed=None):
+        self.command = command
+        self.responses = responses
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def data(self):
+        """Merged response data as (manager, item) pairs, one per item of
+        list responses."""
+        merged = []
+        for manager, response in six.iteritems(self.responses):
+            data = response.data
+            if isinstance(data, list):
+                merged.extend((manager, item) for item in data)
+            else:
+                merged.append((manager, data))
+        return merged
+
+    @property
+    def ok(self):
+        """Returns True if all managers answered successfully."""
+        return not self.errors
+
+    def raise_for_errors(self):
+        """Raise the first manager's error, if any."""
+        for error in six.itervalues(self.errors):
+            raise error
+
+    def __repr__(self):
+        return "<MultiResponse {} [{} ok, {} failed]>".format(
+            self.command, len(self.responses), len(self.errors))
+
+
+class MultiClient(object):
+    """Run read commands on several managers in parallel."""
+
+    def __init__(self, managers, username=None, password=None, timeout=None,
+                 size=1, client_class=Client, **kwargs):
+        """Initialize a client of managers.
+
+        managers are host names, (host, port) tuples or dicts of keyword
+        arguments for their client, with an optional "name" used to tell
+        them apart, host:port by default.
+
+        timeout is the default deadline of a call in seconds, None waits
+        for all managers. Each manager gets a pool of at most `size`
+        connections and threads of its own, so that a stuck manager only
+        delays calls to itself. Other keyword arguments are passed on to
+        `client_class`.
+        """
+        self.timeout = timeout
+        self.pools = collections.OrderedDict()
+        self._executors = {}
+        for manager in managers:
+            name, endpoint = _endpoint(manager)
+            client_kwargs = dict(kwargs, username=username,
+                                 password=password)
+            client_kwargs.update(endpoint)
+            self.pools[name] = ClientPool(
+                client_kwargs.pop("host"), size=size,
+                client_class=client_class, **client_kwargs)
+            # one more thread to fail fast while all connections are stuck
+            self._executors[name] = ThreadPoolExecutor(max_workers=size + 1)
+
+    def _run(self, pool, method, args, kwargs, timeout):
+        with pool.connection(timeout) as cli:
+            response = getattr(cli, method)(*args, **kwargs)
+            # convert in this worker, in parallel with the other managers
+            response.data
+            return response
+
+    def call(self, method, *args, **kwargs):
+        """Call a client method on all managers, returns a MultiResponse.
+
+        `deadline` is the number of seconds to wait for the managers,
+        defaulting to the client's timeout.
+        """
+        deadline = kwargs.pop("deadline", self.timeout)
+        start = time.time()
+        futures = collections.OrderedDict(
+            (self._executors[name].submit(self._run, pool, method, args,
+                                          kwargs, deadline), name)
+            for name, pool in six.iteritems(self.pools))
+        wait(futures, timeout=deadline)
+
+        responses, errors = collections.OrderedDict(), {}
+        for future, name in six.iteritems(futures):
+            if not future.done():
+                # left to finish in the background, its connection is
+                # returned to the pool then
+                future.cancel()
+                errors[name] = DeadlineExceeded(name, deadline)
+            elif future.exception() is not None:
+                errors[name] = future.exception()
+            else:
+                responses[name] = future.result()
+        return MultiResponse(method, responses, errors, time.time() - start)
+
+    def __getattr__(self, name):
+        if not name.startswith(READ_PREFIXES) or not hasattr(Client, name):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+        call.__name__ = str(name)
+        call.__doc__ = getattr(Client, name).__doc__
+        return call
+
+    def close(self):
+        """Close all idle connections."""
+        for pool in six.itervalues(self.pools):
+            pool.close()
+
+    def __enter__(self):
+        """Implements `with` context manager syntax"""
+        return self
+
+    def __exit__(self, exc_type, ex_val, exc_tb):
+        """Implements `with` context manager syntax"""
+        for executor in six.itervalues(self._executors):
+            executor.shutdown(wait=False)
+        self.close()
@@ -0,0 +1,202 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas connection pool
+=====================
+usage:
+
+> from pyvas.pool import ClientPool
+> pool = ClientPool(host, username=username, password=password, size=8)
+> with pool.connection() as cli:
+>     targets = cli.list_targets()
+
+Connections are opened and authenticated once, then handed out to one thread
+at a time. Broken connections are replaced, and re-authenticated, on
+checkout.
+"""
+
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import threading
+import time
+
+from .client import CONNECTION_ERRORS
+from .client import Client
+from .client import DEFAULT_PORT
+from .exceptions import PoolTimeout
+
+
+class ClientPool(object):
+    """Thread-safe pool of authenticated OMP clients."""
+
+    def __init__(self, host, username=None, password=None, port=DEFAULT_PORT,
+                 size=4, timeout=None, client_class=Client, **kwargs):
+        """Initialize pool of at most `size` connections.
+
+        `timeout` is the default number of seconds to wait for a connection
+        before raising PoolTimeout, None waits forever. Other keyword
+        arguments are passed on to `client_class`.
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.client_class = client_class
+        self.client_kwargs = kwargs
+        self._idle = collections.deque()
+        self._connections = 0
+        self._cond = threading.Condition()
+        self._waiters = 0
+        self._stats = collections.Counter()
+        self._checkout_time = 0.0
+        self._checkout_time_max = 0.0
+
+    def _open(self):
+        """Open and authenticate a new client."""
+        client = self.client_class(self.host, username=self.username,
+                                   password=self.password, port=self.port,
+                                   **self.client_kwargs)
+        client.open()
+        with self._cond:
+            self._stats["opened"] += 1
+        return client
+
+    def _close(self, client):
+        """Close a client, ignoring errors from a broken connection."""
+        try:
+            if client.socket is not None:
+                client.close()
+        except CONNECTION_ERRORS:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    def checkout(self, timeout=None):
+        """Take a connection from the pool, opening one if there is room.
+
+        Waits for a connection to be checked in when the pool is exhausted.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        start = time.time()
+        client = None
+
+        with self._cond:
+            waiting = False
+            try:
+                while True:
+                    if self._idle:
+                        client = self._idle.pop()
+                        break
+                    if self._connections < self.size:
+                        self._connections += 1
+                        break
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (time.time() - start)
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(self.size, timeout)
+                    if not waiting:
+                        # only callers which block count as waiters
+                        waiting = True
+                        self._waiters += 1
+                        self._stats["max_waiters"] = max(
+                            self._stats["max_waiters"], self._waiters)
+                    self._cond.wait(remaining)
+            finally:
+                if waiting:
+                    self._waiters -= 1
+
+        try:
+            if client is None:
+                client = self._open()
+            elif not client.is_alive():
+                self._close(client)
+                with self._cond:
+                    self._stats["reconnects"] += 1
+                client = self._open()
+        except Exception:
+            with self._cond:
+                self._connections -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.time() - start
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._checkout_time += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+
+        return client
+
+    def checkin(self, client):
+        """Return a connection to the pool."""
+        with self._cond:
+            self._idle.append(client)
+            self._cond.notify()
+
+    def discard(self, client):
+        """Close a connection instead of returning it to the pool."""
+        self._close(client)
+        with self._cond:
+            self._connections -= 1
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Context manager checking out a connection and returning it.
+
+        Connections which raised a socket error are discarded.
+        """
+        client = self.checkout(timeout)
+        try:
+            yield client
+        except CONNECTION_ERRORS:
+            self.discard(client)
+            raise
+        except BaseException:
+            self.checkin(client)
+            raise
+        else:
+            self.checkin(client)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._cond:
+            idle, self._idle = self._idle, collections.deque()
+            self._connections -= len(idle)
+        for client in idle:
+            self._close(client)
+
+    def metrics(self):
+        """Returns a dict of pool usage statistics."""
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "size": self.size,
+                "connections": self._connections,
+                "idle": len(self._idle),
+                "waiters": self._waiters,
+                "max_waiters": self._stats["max_waiters"],
+                "checkouts": checkouts,
+                "checkout_time_avg": (self._checkout_time / checkouts
+                                      if checkouts else 0.0),
+                "checkout_time_max": self._checkout_time_max,
+                "timeouts": self._stats["timeouts"],
+                "opened": self._stats["opened"],
+                "closed": self._stats["closed"],
+                "reconnects": self._stats["reconnects"],
+            }
+
+    def __enter__(self):
+        """Implements `with` context manager syntax"""
+        return self
+
+    def __exit__(self, exc_type, ex_val, exc_tb):
+        """Implements `with` context manager syntax"""
+        self.close()
@@ -0,0 +1,190 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas records
+~~~~~~~~~~~~~
+Compact, typed alternatives to the `lxml_to_dict` dicts of tasks, targets,
+reports and report results:
+
+> cli = Client(host, username=username, password=password, records=True)
+> for task in cli.list_tasks().data:
+>     print(task.name, task.progress)
+
+Records only have `__slots__`, short repeated strings are interned and
+numbers and timestamps are parsed once, when the record is built. Fields
+missing from the response are None.
+"""
+
+from __future__ import unicode_literals
+
+import sys
+
+from .utils import parse_time
+
+
+_intern = sys.intern
+
+
+def _text(value):
+    return value
+
+
+def _int(value):
+    return int(value)
+
+
+def _float(value):
+    return float(value)
+
+
+def _lookup(element, path):
+    """Text of the element or attribute at path, e.g. "nvt/@oid"."""
+    path, _, attr = path.partition("@")
+    if path:
+        element = element.find(path.rstrip("/"))
+        if element is None:
+            return None
+    return element.get(attr) if attr else element.text
+
+
+def _dict_lookup(data, path):
+    """As `_lookup`, for the output of `lxml_to_dict`."""
+    path, _, attr = path.partition("@")
+    for key in path.rstrip("/").split("/") if path else ():
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+        if isinstance(data, list):
+            data = data[0]
+    if attr:
+        return data.get("@" + attr) if isinstance(data, dict) else None
+    if isinstance(data, dict):
+        return data.get("#text")
+    return data
+
+
+class Record(object):
+    """Base class of records.
+
+    `FIELDS` lists (name, path, converter) tuples, where path is relative
+    to the entity's element as in `Element.find`, with a trailing
+    "@attribute" for attributes, or a tuple of paths tried in turn.
+    """
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def __init__(self, **kwargs):
+        for name, _, _ in self.FIELDS:
+            setattr(self, name, kwargs.pop(name, None))
+        if kwargs:
+            raise TypeError("unexpected fields {}".format(sorted(kwargs)))
+
+    @classmethod
+    def _build(cls, lookup, source):
+        record = cls.__new__(cls)
+        for name, paths, converter in cls.FIELDS:
+            value = None
+            for path in paths if isinstance(paths, tuple) else (paths,):
+                value = lookup(source, path)
+                if value is not None:
+                    value = value.strip()
+                    if value:
+                        break
+            setattr(record, name, converter(value) if value else None)
+        return record
+
+    @classmethod
+    def from_element(cls, element):
+        """Build a record from an lxml element."""
+        return cls._build(_lookup, element)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from the `lxml_to_dict` conversion of an element."""
+        return cls._build(_dict_lookup, data)
+
+    def as_dict(self):
+        """Returns the record's fields as a dict."""
+        return dict((name, getattr(self, name))
+                    for name, _, _ in self.FIELDS)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<{} {}>".format(type(self).__name__, getattr(self, "id", ""))
+
+
+def _record_type(name, fields):
+    """Create a Record subclass with a slot per field."""
+    return type(str(name), (Record,), {
+        "__slots__": tuple(str(field[0]) for field in fields),
+        "FIELDS": fields,
+        "__doc__": "Compact {} record.".format(name.lower()),
+    })
+
+
+_ENTITY = (
+    ("id", "@id", _intern),
+    ("name", "name", _text),
+    ("owner", "owner/name", _intern),
+    ("comment", "comment", _text),
+    ("creation_time", "creation_time", parse_time),
+    ("modification_time", "modification_time", parse_time),
+)
+
+Task = _record_type("Task", _ENTITY + (
+    ("status", "status", _intern),
+    ("progress", "progress", _int),
+    ("config_id", "config/@id", _intern),
+    ("target_id", "target/@id", _intern),
+    ("scanner_id", "scanner/@id", _intern),
+    ("schedule_id", "schedule/@id", _intern),
+    ("report_count", "report_count", _int),
+    ("last_report_id", "last_report/report/@id", _intern),
+    ("severity", "last_report/report/severity", _float),
+))
+
+Target = _record_type("Target", _ENTITY + (
+    ("hosts", "hosts", _text),
+    ("exclude_hosts", "exclude_hosts", _text),
+    ("max_hosts", "max_hosts", _int),
+    ("port_list_id", "port_list/@id", _intern),
+    ("in_use", "in_use", _int),
+))
+
+Report = _record_type("Report", _ENTITY + (
+    ("task_id", "task/@id", _intern),
+    # details are in a nested report element, except in older managers
+    ("scan_run_status", ("report/scan_run_status", "scan_run_status"),
+     _intern),
+    ("severity", ("report/severity/full", "report/severity", "severity"),
+     _float),
+    ("scan_start", ("report/scan_start", "scan_start"), parse_time),
+    ("scan_end", ("report/scan_end", "scan_end"), parse_time),
+    ("result_count", ("report/result_count/full", "result_count/full"),
+     _int),
+))
+
+Result = _record_type("Result", _ENTITY + (
+    ("host", "host", _intern),
+    ("port", "port", _intern),
+    ("nvt_oid", "nvt/@oid", _intern),
+    ("nvt_name", "nvt/name", _intern),
+    ("threat", "threat", _intern),
+    ("severity", "severity", _float),
+    ("qod", "qod/value", _int),
+    ("description", "description", _text),
+))
+
+RECORD_TYPES = {
+    "task": Task,
+    "target": Target,
+    "report": Report,
+    "result": Result,
+}
@@ -6,6 +6,12 @@ pyvas Response
 
 from __future__ import unicode_literals
 
+import zlib
+
+from lxml import etree
+
+from .metrics import clock
+from .utils import dict_to_lxml
 from .utils import lxml_to_dict
 from .exceptions import ResultError
 from .exceptions import HTTPError
@@ -15,27 +21,92 @@ from .exceptions import InvalidArgumentError
 from .exceptions import ServerError
 
 
+_MISSING = object()
+
+# what a Response keeps of the XML response once `data` has been built
+KEEP_RAW = "keep_raw"
+DROP_RAW = "drop_raw"
+RAW_BYTES_ONLY = "raw_bytes_only"
+RETENTION_POLICIES = (KEEP_RAW, DROP_RAW, RAW_BYTES_ONLY)
+
+
 class Response(dict):
-    """Object which contains an server response to an OMP request."""
+    """Object which contains an server response to an OMP request.
+
+    The status is validated when the response is built, while `data` is
+    only converted from the XML response when it is first used.
+
+    `resp` is either the response's root element or, when parsed with a
+    `DictTarget`, its `lxml_to_dict` conversion. Callbacks are given `resp`
+    as is.
 
-    def __init__(self, req=None, resp=None, cb=None):
+    `retention` decides what is kept once `data` has been built: with
+    "keep_raw" the tree stays, with "drop_raw" it is released and `xml` is
+    None from then on, with "raw_bytes_only" it is released and `xml`
+    parses it again from the zlib compressed `raw_bytes` on each use.
+    """
+
+    def __init__(self, req=None, resp=None, cb=None, retention=KEEP_RAW,
+                 raw_bytes=None):
         super(Response, self).__init__()
+        if isinstance(resp, dict):
+            # already converted by a DictTarget
+            tag, root = next(iter(resp.items()))
+            attrib = root if isinstance(root, dict) else {}
+            status = attrib.get("@status")
+            self.reason = attrib.get("@status_text", None)
+            self.tree = resp
+            self.raw = None
+        else:
+            status = resp.get("status")
+            self.reason = resp.get("status_text", None)
+            tag = resp.tag
+            self.tree = None
+            self.raw = resp
+
         try:
-            self.status_code = int(resp.get("status"))
+            self.status_code = int(status)
         except (ValueError, TypeError):
             raise TypeError("The status code must be an integer.")
 
-        self.reason = resp.get("status_text", None)
-        self.command = resp.tag.replace("_response", "")
-        self.raw = resp
+        self.command = tag.replace("_response", "")
         self.request = req
-        if cb is None:
-            try:
-                self.data = list(lxml_to_dict(resp).values())[0]
-            except (KeyError, TypeError):
-                raise ResultError(self.command, self.reason)
-        else:
-            self.data = cb(resp)
+        if (cb is None and self.tree is None and
+                not etree.iselement(resp)):
+            raise ResultError(self.command, self.reason)
+        self._cb = cb
+        self._data = _MISSING
+        self.retention = retention
+        self.raw_bytes = raw_bytes
+        # called with the response once data has been converted
+        self.on_convert = None
+        self.convert_time = None
+
+    @property
+    def data(self):
+        """Response data, converted from the XML response on first access."""
+        if self._data is _MISSING:
+            start = clock()
+            if self._cb is not None:
+                self._data = self._cb(self.raw if self.tree is None
+                                      else self.tree)
+            elif self.tree is not None:
+                self._data = list(self.tree.values())[0]
+            else:
+                try:
+                    self._data = list(lxml_to_dict(self.raw).values())[0]
+                except (KeyError, TypeError):
+                    raise ResultError(self.command, self.reason)
+            self.convert_time = clock() - start
+            if self.retention != KEEP_RAW:
+                self.raw = self.tree = None
+            if self.on_convert is not None:
+                self.on_convert(self)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
 
     def __str__(self):
         return str(self.data)
@@ -87,7 +158,17 @@ class Response(dict):
 
     @property
     def xml(self):
-        """Returns response in lxml element tree object"""
+        """Returns response in lxml element tree object
+
+        Responses parsed straight to dicts are converted back to an element
+        tree on first access. Once released by the retention policy, the
+        tree is parsed again from `raw_bytes`, if kept.
+        """
+        if self.raw is None and self.tree is not None:
+            tag, root = next(iter(self.tree.items()))
+            self.raw = dict_to_lxml(tag, root)
+        if self.raw is None and self.raw_bytes is not None:
+            return etree.fromstring(zlib.decompress(self.raw_bytes))
         return self.raw
 
     def raise_for_status(self):
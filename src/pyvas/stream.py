@@ -0,0 +1,281 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas streaming
+~~~~~~~~~~~~~~~
+Incremental reading of OMP responses off a socket.
+
+OMP does not frame its messages, a response is complete once its root
+`*_response` element has been closed. `ResponseParser` feeds data to an lxml
+pull parser and watches for the end of the root element, while
+`ResponseReader` pulls data off the socket with a buffer size that grows
+with the throughput of the connection.
+
+For very large responses the parser can also hand out selected elements as
+soon as they are complete, see `ResponseReader.iterparse`, or write a
+report's contents to a file while it is read, see `ReportTarget`.
+"""
+
+from __future__ import unicode_literals
+
+import base64
+import collections
+import zlib
+
+from lxml import etree
+
+from .metrics import clock
+from .metrics import record_recv
+from .timeouts import recv as deadline_recv
+from .exceptions import ConnectionClosed
+from .exceptions import ResponseTooLarge
+
+
+MIN_BLOCK_SIZE = 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+
+# favour speed, responses are compressed while they are received
+COMPRESS_LEVEL = 1
+
+
+class ResponseParser(object):
+    """Incremental parser for a single OMP response document.
+
+    When `tag` is given, completed elements with that tag (and, optionally,
+    a parent tagged `parent`) are queued in `elements` while parsing.
+
+    Alternatively, a parser `target` such as `DictTarget` receives the parse
+    events instead of a tree being built. The target must set `done` once
+    the root element has been closed.
+
+    With `compress`, the response's bytes are zlib compressed while they
+    are fed and available as `compressed` after `close`.
+    """
+
+    def __init__(self, max_response_size=None, tag=None, parent=None,
+                 target=None, compress=False):
+        self.max_response_size = max_response_size
+        self.tag = tag
+        self.parent = parent
+        self.elements = collections.deque()
+        self.bytes_received = 0
+        self.done = False
+        self.target = target
+        self.compressed = None
+        self._compressor = (zlib.compressobj(COMPRESS_LEVEL) if compress
+                            else None)
+        self._chunks = []
+        if target is None:
+            self._parser = etree.XMLPullParser(events=("end",))
+        else:
+            self._parser = etree.XMLParser(target=target)
+
+    def feed(self, data):
+        """Feed a chunk of data, returns True once the root element closed."""
+        self.bytes_received += len(data)
+        if (self.max_response_size is not None and
+                self.bytes_received > self.max_response_size):
+            raise ResponseTooLarge(self.max_response_size)
+
+        if self._compressor is not None:
+            self._chunks.append(self._compressor.compress(data))
+
+        self._parser.feed(data)
+
+        if self.target is not None:
+            self.done = self.target.done
+            return self.done
+
+        for _, element in self._parser.read_events():
+            parent = element.getparent()
+            if parent is None:
+                self.done = True
+            elif element.tag == self.tag and (self.parent is None or
+                                              parent.tag == self.parent):
+                self.elements.append(element)
+
+        return self.done
+
+    def close(self):
+        """Finish parsing and return the root element, or the result of
+        the parser target."""
+        if self._compressor is not None:
+            self._chunks.append(self._compressor.flush())
+            self.compressed = b"".join(self._chunks)
+            self._compressor, self._chunks = None, []
+        return self._parser.close()
+
+
+class ResponseReader(object):
+    """Read a complete OMP response off a connected socket."""
+
+    def __init__(self, sock, parser=None, min_block_size=MIN_BLOCK_SIZE,
+                 max_block_size=MAX_BLOCK_SIZE, timings=None, deadline=None):
+        """Initialize reader, `timings` is an optional CommandTimings
+        updated with receive and parse times.
+
+        With a `pyvas.timeouts.Deadline`, the socket must be non-blocking
+        and is waited for within the deadline.
+        """
+        if parser is None:
+            parser = ResponseParser()
+        self.timings = timings
+        self.deadline = deadline
+        self.socket = sock
+        self.parser = parser
+        self.min_block_size = min_block_size
+        self.max_block_size = max_block_size
+        self.block_size = min_block_size
+        self.recv_calls = 0
+
+    @property
+    def bytes_received(self):
+        return self.parser.bytes_received
+
+    def recv(self):
+        """Receive the next chunk, growing the buffer on full reads."""
+        if self.timings is None:
+            data = self._recv()
+        else:
+            start = clock()
+            data = self._recv()
+            record_recv(self.timings, start, clock(), len(data))
+        self.recv_calls += 1
+
+        if not data:
+            raise ConnectionClosed(self.bytes_received)
+
+        self.block_size = next_block_size(self.block_size, data,
+                                          self.max_block_size)
+        return data
+
+    def _recv(self):
+        if self.deadline is None:
+            return self.socket.recv(self.block_size)
+        return deadline_recv(self.socket, self.block_size, self.deadline)
+
+    def read(self):
+        """Read until the response is complete, returns the root element."""
+        if self.timings is not None:
+            return self._timed_read()
+        while not self.parser.feed(self.recv()):
+            pass
+        return self.parser.close()
+
+    def _timed_read(self):
+        timings = self.timings
+        timings.parse_time = 0.0
+        while True:
+            data = self.recv()
+            start = clock()
+            done = self.parser.feed(data)
+            timings.parse_time += clock() - start
+            if done:
+                break
+        start = clock()
+        root = self.parser.close()
+        timings.parse_time += clock() - start
+        return root
+
+    def iterparse(self):
+        """Yield the parser's queued elements while reading the response.
+
+        Each element is cleared, together with its preceding siblings, once
+        the consumer asks for the next one so memory use does not grow with
+        the size of the response. If the consumer stops early the rest of
+        the response is still read off the socket.
+        """
+        try:
+            while not self.parser.done:
+                self.parser.feed(self.recv())
+                while self.parser.elements:
+                    element = self.parser.elements.popleft()
+                    yield element
+                    release(element)
+        except GeneratorExit:
+            while not self.parser.done:
+                self.parser.feed(self.recv())
+                while self.parser.elements:
+                    release(self.parser.elements.popleft())
+            raise
+
+
+def next_block_size(block_size, data, max_block_size=MAX_BLOCK_SIZE):
+    """Double the read size after a read which filled the buffer."""
+    if len(data) == block_size and block_size < max_block_size:
+        return min(block_size * 2, max_block_size)
+    return block_size
+
+
+def release(element):
+    """Free a processed element and the siblings processed before it."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+class ReportTarget(object):
+    """lxml parser target writing a report's contents to a file object.
+
+    The base64 encoded contents of non-XML reports are decoded and written
+    as they are fed to the parser, only a few bytes are held back between
+    chunks. The rest of the response, and XML reports, is built into an
+    element tree which `close` returns; XML reports are written at close.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.bytes_written = 0
+        self.done = False
+        self._builder = etree.TreeBuilder()
+        self._depth = 0
+        self._encoded = False
+        self._contents = False
+        self._pending = b""
+
+    def start(self, tag, attrib):
+        self._depth += 1
+        if self._depth == 2 and tag == "report":
+            self._encoded = attrib.get("content_type") != "text/xml"
+        self._builder.start(tag, attrib)
+
+    def data(self, data):
+        # contents are the tail of the report_format element
+        if self._contents and self._depth == 2:
+            self._decode(data)
+        else:
+            self._builder.data(data)
+
+    def end(self, tag):
+        self._builder.end(tag)
+        self._depth -= 1
+        if self._depth == 2 and tag == "report_format":
+            self._contents = self._encoded
+        elif self._depth == 1 and tag == "report":
+            self._contents = False
+            if self._pending:
+                self._write(base64.b64decode(self._pending))
+                self._pending = b""
+        elif self._depth == 0:
+            self.done = True
+
+    def close(self):
+        """Write XML report contents, returns the response's root element."""
+        root = self._builder.close()
+        report = root.find("report/report")
+        if not self._encoded and report is not None:
+            self._write(etree.tostring(report))
+        return root
+
+    def _decode(self, data):
+        encoded = self._pending + "".join(data.split()).encode("ascii")
+        # decode whole 4 character groups, keep the rest for the next chunk
+        end = len(encoded) - len(encoded) % 4
+        self._pending = encoded[end:]
+        if end:
+            self._write(base64.b64decode(encoded[:end]))
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self.bytes_written += len(data)
@@ -0,0 +1,566 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas testing
+~~~~~~~~~~~~~
+In-process stand-in for an OpenVAS Manager, speaking enough OMP over TLS to
+test and load test clients without a live scanner:
+
+> from pyvas.testing import FakeManager
+> with FakeManager(latency=0.01, report_size=1000) as manager:
+>     with Client("127.0.0.1", username="admin", password="admin",
+>                 port=manager.port) as cli:
+>         target = cli.create_target("target", "127.0.0.1")
+
+Supported commands are `authenticate`, `commands`, get/create/modify/delete
+of targets, tasks, reports and schedules, `start_task`, `stop_task` and
+`resume_task`, as well as listing a fixed set of scanners, configs, port
+lists and report formats.
+
+With `unix_socket`, the manager listens on a Unix socket without TLS
+instead, like gvmd does by default.
+
+Started tasks report progress until `scan_duration` seconds have passed,
+their report then holds `report_size` synthetic results. Each response is
+delayed by `latency` seconds, give or take up to `jitter` seconds.
+"""
+
+from __future__ import unicode_literals
+
+import base64
+import os
+import random
+import shlex
+import socket
+import socketserver
+import ssl
+import threading
+import time
+import uuid as uuid_module
+
+from lxml import etree
+
+from .stream import ResponseParser
+from .exceptions import ConnectionClosed
+
+
+CERTFILE = os.path.join(os.path.dirname(__file__), "testing.pem")
+
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+XML_FORMAT = "a994b278-1f62-11e1-96ac-406186ea4fc5"
+
+FIXTURES = {
+    "scanner": [("08b69003-5fc2-4037-a479-93b440211c73", "OpenVAS Default")],
+    "config": [("daba56c8-73ec-11df-a475-002264764cea", "Full and fast"),
+               ("085569ce-73ed-11df-83c3-002264764cea", "empty")],
+    "port_list": [("33d0cd82-57c6-11e1-8ed1-406186ea4fc5",
+                   "All IANA assigned TCP")],
+    "report_format": [(XML_FORMAT, "XML"),
+                      ("c1645568-627a-11e3-a660-406186ea4fc5", "CSV Results"),
+                      ("c402cc3e-b531-11e1-9163-406186ea4fc5", "PDF")],
+}
+
+ENTITIES = ("target", "task", "report", "schedule")
+
+SORT_FIELDS = {"created": "creation_time", "modified": "modification_time"}
+
+RESULT = (
+    '<result id="{uuid}-{0:08d}"><name>Synthetic result {0}</name>'
+    '<owner><name>admin</name></owner><comment/>'
+    '<creation_time>{time}</creation_time>'
+    '<modification_time>{time}</modification_time>'
+    '<host>10.0.{1}.{2}<asset asset_id=""/></host><port>{3}/tcp</port>'
+    '<nvt oid="1.3.6.1.4.1.25623.1.0.{4}"><type>nvt</type>'
+    '<name>Synthetic NVT {4}</name><family>General</family>'
+    '<cvss_base>{5}</cvss_base><tags>summary=Synthetic.</tags></nvt>'
+    '<threat>{6}</threat><severity>{5}</severity><qod><value>80</value>'
+    '<type>remote_banner</type></qod><description>Synthetic finding.'
+    '</description></result>'
+)
+
+THREATS = ((7.0, "High"), (4.0, "Medium"), (0.1, "Low"), (0.0, "Log"))
+
+
+def _now():
+    return time.strftime(TIME_FORMAT, time.gmtime())
+
+
+def _response(command, status="200", status_text="OK", body=b"", **attrib):
+    """Serialize a `<command>_response` element around body."""
+    root = etree.Element(command + "_response", status=status,
+                         status_text=status_text, **attrib)
+    if not body:
+        return etree.tostring(root)
+    head = etree.tostring(root)[:-2] + b">"
+    return head + body + b"</" + root.tag.encode() + b">"
+
+
+def _filter_terms(value):
+    """Split a filter into (keyword, operator, value) terms."""
+    try:
+        words = shlex.split(value or "")
+    except ValueError:
+        words = (value or "").split()
+
+    terms = []
+    for word in words:
+        for op in ("=", ">", "<", "~"):
+            if op in word:
+                key, term = word.split(op, 1)
+                terms.append((key, op, term))
+                break
+    return terms
+
+
+def _threat(severity):
+    for minimum, threat in THREATS:
+        if severity >= minimum:
+            return threat
+    return "Log"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serve the OMP requests of one connection."""
+
+    def setup(self):
+        with self.server.lock:
+            self.server.connections.add(self.request)
+
+    def finish(self):
+        with self.server.lock:
+            self.server.connections.discard(self.request)
+
+    def handle(self):
+        server = self.server
+        sock = self.request
+        if isinstance(sock, ssl.SSLSocket):
+            try:
+                sock.do_handshake()
+            except (ssl.SSLError, socket.error):
+                return
+
+        session = {"authenticated": False}
+        while True:
+            parser = ResponseParser(max_response_size=server.max_request_size)
+            try:
+                while not parser.feed(self._recv(sock, parser)):
+                    pass
+                request = parser.close()
+            except (ConnectionClosed, ssl.SSLError, socket.error,
+                    etree.XMLSyntaxError):
+                return
+
+            response = server.manager.handle(request, session)
+            server.manager.delay()
+            try:
+                sock.sendall(response)
+            except (ssl.SSLError, socket.error):
+                return
+
+    @staticmethod
+    def _recv(sock, parser):
+        data = sock.recv(65536)
+        if not data:
+            raise ConnectionClosed(parser.bytes_received)
+        return data
+
+
+class _UnixServer(socketserver.ThreadingMixIn,
+                  socketserver.UnixStreamServer):
+    daemon_threads = True
+    max_request_size = 16 * 1024 * 1024
+
+    def __init__(self, address, manager):
+        socketserver.UnixStreamServer.__init__(self, address, _Handler)
+        self.manager = manager
+        self.connections = set()
+        self.lock = threading.Lock()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    max_request_size = 16 * 1024 * 1024
+
+    def __init__(self, address, manager, context):
+        socketserver.TCPServer.__init__(self, address, _Handler)
+        self.manager = manager
+        self.context = context
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        sock, address = socketserver.TCPServer.get_request(self)
+        # handshake in the connection's thread, not the accepting one
+        return (self.context.wrap_socket(sock, server_side=True,
+                                         do_handshake_on_connect=False),
+                address)
+
+
+class FakeManager(object):
+    """TLS OMP server with in-memory state, running in a thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, users=None, latency=0.0,
+                 jitter=0.0, report_size=100, scan_duration=0.0,
+                 certfile=CERTFILE, seed=None, unix_socket=None):
+        """Initialize server, port 0 picks a free port.
+
+        users maps user names to passwords, by default admin/admin.
+        """
+        self.host = host
+        self.port = port
+        self.users = users if users is not None else {"admin": "admin"}
+        self.latency = latency
+        self.jitter = jitter
+        self.report_size = report_size
+        self.scan_duration = scan_duration
+        self.certfile = certfile
+        self.unix_socket = unix_socket
+        self.commands = {}
+        self._random = random.Random(seed)
+        self._entities = dict((data_type, {}) for data_type in ENTITIES)
+        # task id -> (start time, report id) of its latest run
+        self._runs = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def start(self):
+        """Start serving in a background thread."""
+        if self.unix_socket is not None:
+            self._server = _UnixServer(self.unix_socket, self)
+        else:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.certfile)
+            self._server = _Server((self.host, self.port), self, context)
+            self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="FakeManager")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            if self.unix_socket is not None:
+                os.remove(self.unix_socket)
+
+    def drop_connections(self):
+        """Close all client connections, like a manager restart would."""
+        with self._server.lock:
+            connections = list(self._server.connections)
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except (ssl.SSLError, socket.error):
+                pass
+        return len(connections)
+
+    def delay(self):
+        """Sleep for the configured latency and jitter."""
+        if self.latency or self.jitter:
+            delay = self.latency + self._random.uniform(-self.jitter,
+                                                        self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+    def handle(self, request, session):
+        """Returns the serialized response to a request element."""
+        command = request.tag
+        with self._lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+        if command == "authenticate":
+            return self._authenticate(request, session)
+        if not session["authenticated"]:
+            return _response(command, "401", "Authenticate first")
+        if command == "commands":
+            return _response(command, body=b"".join(
+                self.handle(child, session) for child in request))
+
+        with self._lock:
+            action, _, data_type = command.partition("_")
+            if data_type == "task" and action in ("start", "stop",
+                                                  "resume"):
+                return self._run_task(action, request)
+            if action == "get" and data_type.endswith("s"):
+                data_type = data_type[:-1]
+                if data_type == "report" and request.get("report_id"):
+                    return self._get_report(request)
+                if data_type in FIXTURES:
+                    return self._get_fixtures(request, data_type)
+                if data_type in ENTITIES:
+                    return self._get(request, data_type)
+            if data_type in ENTITIES:
+                if action == "create":
+                    return self._create(request, data_type)
+                if action == "modify":
+                    return self._modify(request, data_type)
+                if action == "delete":
+                    return self._delete(request, data_type)
+
+        return _response(command, "400", "Bogus command name")
+
+    def _authenticate(self, request, session):
+        username = request.findtext("credentials/username")
+        password = request.findtext("credentials/password")
+        if username in self.users and self.users[username] == password:
+            session["authenticated"] = True
+            return _response("authenticate", body=(
+                b"<role>Admin</role><timezone>UTC</timezone>"))
+        return _response("authenticate", "400", "Authentication failed")
+
+    def _get_fixtures(self, request, data_type):
+        terms = _filter_terms(request.get("filter"))
+        names = [term for key, op, term in terms if key == "name"]
+        body = []
+        for uuid, name in FIXTURES[data_type]:
+            if not names or name in names:
+                element = etree.Element(data_type, id=uuid)
+                etree.SubElement(element, "name").text = name
+                body.append(etree.tostring(element))
+        return _response("get_{}s".format(data_type), body=b"".join(body))
+
+    def _find(self, request, data_type):
+        uuid = request.get("{}_id".format(data_type))
+        return self._entities[data_type].get(uuid)
+
+    def _get(self, request, data_type):
+        command = "get_{}s".format(data_type)
+        uuid = request.get("{}_id".format(data_type))
+        if uuid is not None:
+            entities = [self._entities[data_type].get(uuid)]
+            if entities[0] is None:
+                return _response(command, "404", "Failed to find {} '{}'"
+                                 .format(data_type, uuid))
+        else:
+            entities = list(self._entities[data_type].values())
+
+        first, rows, sort = 1, -1, None
+        uuids, names, compare = set(), set(), []
+        for key, op, term in _filter_terms(request.get("filter")):
+            if key == "first":
+                first = int(term)
+            elif key == "rows":
+                rows = int(term)
+            elif key == "sort":
+                sort = SORT_FIELDS.get(term, term)
+            elif key == "uuid":
+                uuids.add(term)
+            elif key == "name" and op == "=":
+                names.add(term)
+            elif key in SORT_FIELDS and op in "<>":
+                compare.append((SORT_FIELDS[key], op, term))
+
+        matches = []
+        for entity in entities:
+            if uuids and entity.get("id") not in uuids:
+                continue
+            if names and entity.findtext("name") not in names:
+                continue
+            if not all(entity.findtext(tag) > term if op == ">"
+                       else entity.findtext(tag) < term
+                       for tag, op, term in compare):
+                continue
+            if data_type == "task":
+                self._update_task(entity)
+            matches.append(entity)
+
+        if sort is not None:
+            matches.sort(key=lambda entity: entity.findtext(sort) or "")
+        page = matches[first - 1:] if rows < 0 else \
+            matches[first - 1:first - 1 + rows]
+        body = b"".join(etree.tostring(entity) for entity in page)
+        body += ("<{0}_count>{1}<filtered>{2}</filtered><page>{3}</page>"
+                 "</{0}_count>").format(data_type, len(entities),
+                                        len(matches), len(page)).encode()
+        return _response(command, body=body)
+
+    def _new_entity(self, data_type, name, uuid=None):
+        now = _now()
+        entity = etree.Element(data_type, id=uuid or str(uuid_module.uuid4()))
+        owner = etree.SubElement(entity, "owner")
+        etree.SubElement(owner, "name").text = "admin"
+        etree.SubElement(entity, "name").text = name
+        etree.SubElement(entity, "comment")
+        etree.SubElement(entity, "creation_time").text = now
+        etree.SubElement(entity, "modification_time").text = now
+        etree.SubElement(entity, "writable").text = "1"
+        etree.SubElement(entity, "in_use").text = "0"
+        self._entities[data_type][entity.get("id")] = entity
+        return entity
+
+    def _create(self, request, data_type):
+        command = "create_{}".format(data_type)
+        name = request.findtext("name")
+        if not name:
+            return _response(command, "400", "A name is required")
+        if any(entity.findtext("name") == name
+               for entity in self._entities[data_type].values()):
+            return _response(command, "400",
+                             "{} exists already".format(data_type.title()))
+        for child in request:
+            if child.get("id") and not self._exists(child.tag,
+                                                    child.get("id")):
+                return _response(command, "404", "Failed to find {} '{}'"
+                                 .format(child.tag, child.get("id")))
+
+        entity = self._new_entity(data_type, name)
+        self._set_fields(entity, request)
+        if data_type == "task":
+            etree.SubElement(entity, "status").text = "New"
+            etree.SubElement(entity, "progress").text = "-1"
+            etree.SubElement(entity, "report_count").text = "0"
+        return _response(command, "201", "OK, resource created",
+                         id=entity.get("id"))
+
+    def _exists(self, data_type, uuid):
+        if data_type in FIXTURES:
+            return any(uuid == fixture[0] for fixture in FIXTURES[data_type])
+        if data_type in ENTITIES:
+            return uuid in self._entities[data_type]
+        # references to types which are not modelled are accepted
+        return True
+
+    def _set_fields(self, entity, request):
+        for child in request:
+            if child.tag == "name" or (not len(child) and not child.text and
+                                       not child.attrib):
+                continue
+            existing = entity.find(child.tag)
+            if existing is not None:
+                entity.remove(existing)
+            entity.append(etree.fromstring(etree.tostring(child)))
+
+    def _modify(self, request, data_type):
+        command = "modify_{}".format(data_type)
+        entity = self._find(request, data_type)
+        if entity is None:
+            return _response(command, "404", "Failed to find {}"
+                             .format(data_type))
+        if request.findtext("name"):
+            entity.find("name").text = request.findtext("name")
+        self._set_fields(entity, request)
+        entity.find("modification_time").text = _now()
+        return _response(command, "200", "OK")
+
+    def _delete(self, request, data_type):
+        command = "delete_{}".format(data_type)
+        entity = self._find(request, data_type)
+        if entity is None:
+            return _response(command, "404", "Failed to find {}"
+                             .format(data_type))
+        del self._entities[data_type][entity.get("id")]
+        return _response(command, "200", "OK")
+
+    def _run_task(self, action, request):
+        command = "{}_task".format(action)
+        task = self._find(request, "task")
+        if task is None:
+            return _response(command, "404", "Failed to find task")
+
+        if action == "stop":
+            self._update_task(task)
+            if task.findtext("status") == "Running":
+                task.find("status").text = "Stopped"
+            return _response(command, "202", "OK, request submitted")
+
+        report = self._new_entity("report", task.findtext("name"))
+        etree.SubElement(report, "task", id=task.get("id"))
+        etree.SubElement(report, "scan_run_status").text = "Running"
+        self._runs[task.get("id")] = (time.time(), report.get("id"))
+        task.find("status").text = "Running"
+        task.find("progress").text = "0"
+        count = task.find("report_count")
+        count.text = str(int(count.text) + 1)
+        return _response(command, "202", "OK, request submitted",
+                         body=("<report_id>{}</report_id>".format(
+                             report.get("id"))).encode())
+
+    def _update_task(self, task):
+        """Advance a running task's progress with the time passed."""
+        if task.findtext("status") != "Running":
+            return
+        started, report_uuid = self._runs[task.get("id")]
+        elapsed = time.time() - started
+        if elapsed < self.scan_duration:
+            task.find("progress").text = str(
+                int(100 * elapsed / self.scan_duration))
+            return
+        task.find("status").text = "Done"
+        task.find("progress").text = "-1"
+        task.find("modification_time").text = _now()
+        report = self._entities["report"].get(report_uuid)
+        if report is not None:
+            report.find("scan_run_status").text = "Done"
+            report.find("modification_time").text = _now()
+
+    def results(self, uuid, count=None):
+        """Synthetic results of a report, as bytes."""
+        now = _now()
+        count = self.report_size if count is None else count
+        return "".join(RESULT.format(
+            i, i // 250 % 250, i % 250, 1 + i % 1024, i % 5000,
+            i % 101 / 10.0, _threat(i % 101 / 10.0), uuid=uuid[:8], time=now)
+            for i in range(count)).encode("utf-8")
+
+    def _get_report(self, request):
+        report = self._find(request, "report")
+        if report is None:
+            return _response("get_reports", "404", "Failed to find report")
+
+        task = self._entities["task"].get(report.find("task").get("id"))
+        if task is not None:
+            self._update_task(task)
+
+        if request.get("details") == "0":
+            return _response("get_reports", body=etree.tostring(report))
+
+        uuid = report.get("id")
+        format_uuid = request.get("format_id") or XML_FORMAT
+        if format_uuid != XML_FORMAT:
+            if not self._exists("report_format", format_uuid):
+                return _response("get_reports", "404",
+                                 "Failed to find report format")
+            rows = ("{},{},{}\n".format(uuid, i, i % 101 / 10.0)
+                    for i in range(self.report_size))
+            contents = base64.encodebytes(
+                "".join(rows).encode("utf-8")).replace(b"\n", b"")
+            body = ('<report id="{0}" format_id="{1}" extension="csv" '
+                    'content_type="text/csv"><owner><name>admin</name>'
+                    '</owner><name>{2}</name><report_format id="{1}">'
+                    '<name>CSV Results</name></report_format>'.format(
+                        uuid, format_uuid, report.findtext("name")
+                    ).encode("utf-8") + contents + b"</report>")
+            return _response("get_reports", body=body)
+
+        count = self.report_size
+        body = ('<report id="{0}" format_id="{1}" extension="xml" '
+                'content_type="text/xml"><owner><name>admin</name></owner>'
+                '<name>{2}</name><report_format id="{1}"><name>XML</name>'
+                '</report_format><report id="{0}"><scan_run_status>{3}'
+                '</scan_run_status><results start="1" max="-1">'.format(
+                    uuid, format_uuid, report.findtext("name"),
+                    report.findtext("scan_run_status")).encode("utf-8") +
+                self.results(uuid, count) +
+                ('</results><result_count>{0}<full>{0}</full>'
+                 '<filtered>{0}</filtered></result_count></report>'
+                 '</report>'.format(count)).encode("utf-8"))
+        return _response("get_reports", body=body)
+
+    def __enter__(self):
+        """Implements `with` context manager syntax"""
+        return self.start()
+
+    def __exit__(self, exc_type, ex_val, exc_tb):
+        """Implements `with` context manager syntax"""
+        self.stop()
@@ -0,0 +1,183 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas timeouts
+~~~~~~~~~~~~~~
+Time budgets for connections and commands:
+
+> from pyvas.timeouts import Timeouts
+> cli = Client(host, username=username, password=password,
+>              timeouts=Timeouts(connect=5, handshake=5, ttfb=30, total=300))
+> with cli.deadline(total=10):
+>     cli.list_tasks()
+
+- connect, to establish the connection,
+- handshake, for the TLS handshake,
+- ttfb, from the end of sending a command to the first byte of its
+  response,
+- total, for a whole command, retries included.
+
+Phases without a timeout are not limited. While a command has a deadline,
+its socket is used in non-blocking mode and waited for with `selectors`.
+Running out of time raises `RequestTimeout`, with the bytes transferred so
+far.
+"""
+
+from __future__ import unicode_literals
+
+import errno
+import os
+import selectors
+import socket
+import ssl
+
+from .metrics import clock
+from .exceptions import RequestTimeout
+
+
+CONNECT = "connect"
+HANDSHAKE = "handshake"
+TTFB = "ttfb"
+TOTAL = "total"
+PHASES = (CONNECT, HANDSHAKE, TTFB, TOTAL)
+
+
+class Timeouts(object):
+    """Timeouts in seconds of each phase, None for no timeout."""
+
+    def __init__(self, connect=None, handshake=None, ttfb=None, total=None):
+        self.connect = connect
+        self.handshake = handshake
+        self.ttfb = ttfb
+        self.total = total
+
+    def replace(self, **kwargs):
+        """Returns a copy with the given timeouts replaced."""
+        timeouts = dict((phase, getattr(self, phase)) for phase in PHASES)
+        timeouts.update(kwargs)
+        return Timeouts(**timeouts)
+
+    @property
+    def limits_connect(self):
+        return self.connect is not None or self.handshake is not None
+
+    @property
+    def limits_commands(self):
+        return self.ttfb is not None or self.total is not None
+
+    def __repr__(self):
+        return "<Timeouts {}>".format(" ".join(
+            "{}={}".format(phase, getattr(self, phase)) for phase in PHASES))
+
+
+class Deadline(object):
+    """Time budget of a single command or connection."""
+
+    def __init__(self, timeouts, command=None):
+        self.timeouts = timeouts
+        self.command = command
+        self.started = clock()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._phases = {}
+
+    def begin(self, phase):
+        """Start the clock of a phase."""
+        self._phases[phase] = clock()
+
+    def remaining(self, phase=TOTAL):
+        """Seconds left in phase, or None when unlimited.
+
+        Raises RequestTimeout once the phase's or the total budget is spent.
+        """
+        now = clock()
+        budgets = []
+        if self.timeouts.total is not None:
+            budgets.append((self.timeouts.total - (now - self.started),
+                            TOTAL))
+        timeout = getattr(self.timeouts, phase)
+        if phase != TOTAL and timeout is not None:
+            started = self._phases.get(phase, self.started)
+            budgets.append((timeout - (now - started), phase))
+        if not budgets:
+            return None
+        left, spent = min(budgets)
+        if left <= 0:
+            raise self.expired(spent)
+        return left
+
+    def expired(self, phase):
+        """Returns the RequestTimeout of phase."""
+        return RequestTimeout(self.command, phase,
+                              getattr(self.timeouts, phase),
+                              clock() - self.started, self.bytes_sent,
+                              self.bytes_received)
+
+    def wait(self, sock, events, phase):
+        """Wait until sock is ready for events, within phase's budget."""
+        with selectors.DefaultSelector() as selector:
+            selector.register(sock, events)
+            # loops in case the selector wakes up a little early
+            while not selector.select(self.remaining(phase)):
+                pass
+
+
+def connect(sock, address, deadline):
+    """Connect a non-blocking socket within the connect budget."""
+    deadline.begin(CONNECT)
+    sock.setblocking(False)
+    error = sock.connect_ex(address)
+    if error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+        deadline.wait(sock, selectors.EVENT_WRITE, CONNECT)
+        error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    if error:
+        raise socket.error(error, os.strerror(error))
+
+
+def handshake(sock, deadline):
+    """Complete the TLS handshake of a non-blocking socket."""
+    deadline.begin(HANDSHAKE)
+    while True:
+        try:
+            sock.do_handshake()
+            return
+        except ssl.SSLWantReadError:
+            deadline.wait(sock, selectors.EVENT_READ, HANDSHAKE)
+        except ssl.SSLWantWriteError:
+            deadline.wait(sock, selectors.EVENT_WRITE, HANDSHAKE)
+
+
+def sendall(sock, data, deadline):
+    """Send all of data on a non-blocking socket, then start the time to
+    first byte."""
+    view = memoryview(data)
+    while view:
+        deadline.remaining(TOTAL)
+        try:
+            sent = sock.send(view)
+        except (BlockingIOError, ssl.SSLWantWriteError):
+            deadline.wait(sock, selectors.EVENT_WRITE, TOTAL)
+            continue
+        except ssl.SSLWantReadError:
+            deadline.wait(sock, selectors.EVENT_READ, TOTAL)
+            continue
+        deadline.bytes_sent += sent
+        view = view[sent:]
+    deadline.begin(TTFB)
+
+
+def recv(sock, size, deadline):
+    """Receive up to size bytes from a non-blocking socket, until the first
+    byte within the time to first byte."""
+    phase = TOTAL if deadline.bytes_received else TTFB
+    while True:
+        deadline.remaining(phase)
+        try:
+            data = sock.recv(size)
+        except (BlockingIOError, ssl.SSLWantReadError):
+            deadline.wait(sock, selectors.EVENT_READ, phase)
+            continue
+        except ssl.SSLWantWriteError:
+            deadline.wait(sock, selectors.EVENT_WRITE, phase)
+            continue
+        deadline.bytes_received += len(data)
+        return data
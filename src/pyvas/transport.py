@@ -0,0 +1,130 @@
+# -*- encoding: utf-8 -*-
+"""
+pyvas transports
+~~~~~~~~~~~~~~~~
+How a client reaches the manager. By default it connects over TCP and TLS,
+a manager on the same host can be reached over its Unix socket instead,
+without the cost of TLS:
+
+> from pyvas.transport import UnixTransport
+> cli = Client(None, username=username, password=password,
+>              transport=UnixTransport("/run/gvmd/gvmd.sock"))
+
+A transport provides `connect(timeouts=None)` returning a connected
+socket, `close(sock)` and, for `AsyncClient`, `open_connection()`
+returning asyncio streams. The connect and handshake timeouts of a
+`pyvas.timeouts.Timeouts` bound the time taken to connect.
+"""
+
+from __future__ import unicode_literals
+
+import asyncio
+import socket
+import ssl
+
+from .timeouts import Deadline
+from .timeouts import connect
+from .timeouts import handshake
+
+
+def ssl_context():
+    """TLS context matching the `ssl.wrap_socket` defaults pyvas used."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class TLSTransport(object):
+    """TCP connections with TLS, resuming the previous TLS session."""
+
+    def __init__(self, host, port, context=None):
+        self.host = host
+        self.port = port
+        self.context = context if context is not None else ssl_context()
+        self.session = None
+
+    def connect(self, timeouts=None):
+        """Returns a new connected TLS socket."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            if timeouts is not None and timeouts.limits_connect:
+                sock = self._connect_within(sock, timeouts)
+            else:
+                sock = self.context.wrap_socket(
+                    sock, server_hostname=self.host, session=self.session)
+                sock.connect((self.host, self.port))
+        except ssl.SSLError:
+            sock.close()
+            if self.session is None:
+                raise
+            # the server may refuse a stale session, start afresh
+            self.session = None
+            return self.connect(timeouts)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def _connect_within(self, sock, timeouts):
+        """Connect and handshake in non-blocking mode, within timeouts."""
+        deadline = Deadline(timeouts.replace(total=None), "connect")
+        connect(sock, (self.host, self.port), deadline)
+        sock = self.context.wrap_socket(sock, server_hostname=self.host,
+                                        session=self.session,
+                                        do_handshake_on_connect=False)
+        try:
+            handshake(sock, deadline)
+        except BaseException:
+            # the wrapped socket owns the connection now
+            sock.close()
+            raise
+        sock.setblocking(True)
+        return sock
+
+    def close(self, sock):
+        """Close a socket, keeping its TLS session for the next connect."""
+        session = getattr(sock, "session", None)
+        if session is not None:
+            self.session = session
+        sock.close()
+
+    def open_connection(self):
+        """Returns a coroutine opening asyncio streams."""
+        return asyncio.open_connection(self.host, self.port,
+                                       ssl=self.context)
+
+    def __repr__(self):
+        return "<TLSTransport {}:{}>".format(self.host, self.port)
+
+
+class UnixTransport(object):
+    """Unix domain socket connections, without TLS."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self, timeouts=None):
+        """Returns a new connected Unix socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            if timeouts is not None and timeouts.connect is not None:
+                connect(sock, self.path,
+                        Deadline(timeouts.replace(total=None), "connect"))
+                sock.setblocking(True)
+            else:
+                sock.connect(self.path)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def close(self, sock):
+        sock.close()
+
+    def open_connection(self):
+        """Returns a coroutine opening asyncio streams."""
+        return asyncio.open_unix_connection(self.path)
+
+    def __repr__(self):
+        return "<UnixTransport {}>".format(self.path)
@@ -4,11 +4,30 @@ pyvas utilities
 ~~~~~~~~~~~~~~~
 """
 
-import collections
+import datetime
+import functools
+
 import six
 from lxml import etree
 
 
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_time(value):
+    """Parse an OMP timestamp such as 2018-01-01T10:00:00Z to a datetime.
+
+    Results are cached, equal timestamps share one datetime object.
+    """
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+0000"
+    elif value[-3:-2] == ":":
+        value = value[:-3] + value[-2:]
+    return datetime.datetime.strptime(value, TIME_FORMAT)
+
+
 def dict_to_lxml(root, dct):
     """Convert dict to ElementTree"""
     try:
@@ -26,6 +45,11 @@ def dict_to_lxml(root, dct):
                     # Use @tag to set attributes
                     # print(tag)
                     parent.set(tag[1:], child)
+                elif isinstance(child, list):
+                    # repeated elements, as built by lxml_to_dict
+                    for item in child:
+                        elem = etree.SubElement(parent, tag)
+                        inner_dict_to_xml(elem, item)
                 else:
                     elem = etree.Element(tag)
                     parent.append(elem)
@@ -40,31 +64,126 @@ def dict_to_lxml(root, dct):
 
 
 def lxml_to_dict(tree, strip_root=False):
-    """Convert XML ElementTree to dictionary"""
-    try:
-        dct = {tree.tag: {} if tree.attrib else None}
-    except AttributeError:
+    """Convert XML ElementTree to dictionary
+
+    Elements become dicts of their children, "@"-prefixed attributes and
+    "#text", or just their text (or None) when they have neither children
+    nor attributes. Repeated children are collected in a list. The tree is
+    walked with lxml's iterwalk rather than recursively, and dicts are only
+    created for elements that need one.
+    """
+    if not etree.iselement(tree):
         raise TypeError("tree must be an XML ElementTree")
 
-    children = list(tree)
-    if children:
-        default_dict = collections.defaultdict(list)
-        for child in [lxml_to_dict(child) for child in children]:
-            for key, value in six.iteritems(child):
-                default_dict[key].append(value)
-        dct = {tree.tag: {key: value[0] if len(value) == 1 else value
-                          for key, value in six.iteritems(default_dict)}}
-    if tree.attrib:
-        dct[tree.tag].update(("@" + key, value)
-                             for key, value in six.iteritems(tree.attrib))
-    if tree.text:
-        text = tree.text.strip()
-        if children or tree.attrib:
-            dct[tree.tag]["#text"] = text
+    # stack of the values of open elements, None until a child is added
+    stack = [{}]
+    push = stack.append
+    pop = stack.pop
+
+    for event, element in etree.iterwalk(tree, events=("start", "end")):
+        if event == "start":
+            push(None)
+            continue
+
+        value = pop()
+        attrib = element.attrib
+        if attrib:
+            if value is None:
+                value = {}
+            for key, attr in attrib.items():
+                value["@" + key] = attr
+
+        text = element.text
+        if text:
+            text = text.strip()
+            if value is None:
+                value = text
+            else:
+                value["#text"] = text
+
+        parent = stack[-1]
+        if parent is None:
+            stack[-1] = parent = {}
+
+        tag = element.tag
+        if tag in parent:
+            # values are never lists, so a list means repeated children
+            existing = parent[tag]
+            if type(existing) is list:
+                existing.append(value)
+            else:
+                parent[tag] = [existing, value]
         else:
-            dct[tree.tag] = text
+            parent[tag] = value
+
+    dct = stack[0]
 
     if strip_root:
         return list(dct.values())[0]
 
     return dct
+
+
+class DictTarget(object):
+    """lxml parser target building `lxml_to_dict` output from parse events.
+
+    Used as `etree.XMLParser(target=DictTarget())`, the document is turned
+    into dicts while it is fed to the parser, without building an element
+    tree. `done` is set once the root element has been closed.
+    """
+
+    def __init__(self):
+        # one frame per open element: [attrib, children, text], text is a
+        # list collecting data until the first child starts, then a string
+        self._stack = [[None, None, ""]]
+        self.done = False
+
+    def start(self, tag, attrib):
+        parent = self._stack[-1]
+        if type(parent[2]) is list:
+            parent[2] = "".join(parent[2])
+        self._stack.append([attrib, None, []])
+
+    def data(self, data):
+        text = self._stack[-1][2]
+        if type(text) is list:
+            text.append(data)
+
+    def end(self, tag):
+        attrib, value, text = self._stack.pop()
+
+        if attrib:
+            if value is None:
+                value = {}
+            for key, attr in attrib.items():
+                value["@" + key] = attr
+
+        if type(text) is list:
+            text = "".join(text)
+        if text:
+            text = text.strip()
+            if value is None:
+                value = text
+            else:
+                value["#text"] = text
+
+        parent = self._stack[-1]
+        children = parent[1]
+        if children is None:
+            parent[1] = children = {}
+
+        if tag in children:
+            existing = children[tag]
+            if type(existing) is list:
+                existing.append(value)
+            else:
+                children[tag] = [existing, value]
+        else:
+            children[tag] = value
+
+        if len(self._stack) == 1:
+            self.done = True
+
+    def close(self):
+        """Returns the converted document, like `lxml_to_dict`."""
+        return self._stack[0][1]
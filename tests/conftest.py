@@ -11,8 +11,50 @@ from conftest import slow
 @slow
 def test_poorly_coded_slow_test_that_takes_ages_and_ages():
     pass
+
+`SocketStandIn` answers a client's requests without a server:
+
+from conftest import SocketStandIn
+
+class EchoSocket(SocketStandIn):
+    def handle(self, request):
+        return b"<" + request.tag.encode() + b'_response status="200"/>'
 """
+from __future__ import unicode_literals
+
+import pytest
+from lxml import etree
 
 
 def pytest_addoption(parser):
     parser.addoption("--slow", action="store_true", help="run slow tests")
+
+
+class SocketStandIn(object):
+    """Socket stand-in buffering the answers of `handle(request)`, an
+    element or bytes, for recv."""
+
+    def __init__(self):
+        self.requests = []
+        self.data = b""
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    def sendall(self, data):
+        request = etree.fromstring(data)
+        self.requests.append(request)
+        response = self.handle(request)
+        if etree.iselement(response):
+            response = etree.tostring(response)
+        self.data += response
+
+    def recv(self, size):
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+@pytest.fixture(params=["tree", "dict"])
+def parse_mode(request):
+    """Runs a test with each of the clients' parse modes."""
+    return request.param
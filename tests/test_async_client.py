@@ -0,0 +1,139 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas AsyncClient
+===========================
+The server side is replaced by in-memory streams answering from a handler.
+"""
+from __future__ import unicode_literals
+
+import asyncio
+
+import pytest
+from lxml import etree
+
+from pyvas import AsyncClient, Response, exceptions
+
+
+class FakeWriter(object):
+    """Stream writer stand-in passing each request to `handler`."""
+
+    def __init__(self, reader, handler):
+        self.reader = reader
+        self.handler = handler
+        self.requests = []
+
+    def write(self, data):
+        request = etree.fromstring(data)
+        self.requests.append(request)
+        self.reader.feed_data(self.handler(request))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.reader.feed_eof()
+
+    async def wait_closed(self):
+        pass
+
+
+def handler(request):
+    if request.tag == "authenticate":
+        return b'<authenticate_response status="200" status_text="OK"/>'
+    if request.tag == "get_targets":
+        flt = request.get("filter", "")
+        if 'first="' in flt:
+            first = int(flt.split('first="')[1].split('"')[0])
+            rows = int(flt.split('rows="')[1].split('"')[0])
+        else:
+            first, rows = 1, 5
+        ids = range(first, min(first + rows, 6))
+        targets = b"".join(b'<target id="%d"><name>t</name></target>' % i
+                           for i in ids)
+        return (b'<get_targets_response status="200" status_text="OK">' +
+                targets + b'<target_count><filtered>5</filtered>'
+                b'</target_count></get_targets_response>')
+    if request.tag == "get_scanners":
+        return (b'<get_scanners_response status="200" status_text="OK">'
+                b'<scanner id="s1"><name>OpenVAS Default</name></scanner>'
+                b'</get_scanners_response>')
+    if request.tag == "create_task":
+        assert request.find("scanner").get("id") == "s1"
+        return (b'<create_task_response status="201" status_text="OK" '
+                b'id="t1"/>')
+    if request.tag == "get_reports":
+        return (b'<get_reports_response status="200" status_text="OK">'
+                b'<report id="r" content_type="text/xml"><report id="r">'
+                b'<results><result id="1"/><result id="2"/></results>'
+                b'</report></report></get_reports_response>')
+    return (b'<' + request.tag.encode() +
+            b'_response status="404" status_text="Not found"/>')
+
+
+def run(coro_func, parse_mode="tree"):
+    async def main():
+        reader = asyncio.StreamReader()
+        writer = FakeWriter(reader, handler)
+
+        async def connect():
+            client._reader, client._writer = reader, writer
+
+        client = AsyncClient("localhost", username="u", password="p",
+                             parse_mode=parse_mode)
+        client._connect = connect
+        async with client:
+            return await coro_func(client)
+
+    return asyncio.run(main())
+
+
+def test_async_client_requires_async_with():
+    with pytest.raises(TypeError):
+        with AsyncClient("localhost"):
+            pass
+
+
+def test_async_list_and_delete():
+    async def go(cli):
+        targets = await cli.list_targets()
+        assert isinstance(targets, Response)
+        assert [t["@id"] for t in targets.data] == ["1", "2", "3", "4", "5"]
+        with pytest.raises(exceptions.ElementNotFound):
+            await cli.delete_task("missing")
+    run(go)
+
+
+@pytest.mark.parametrize("parse_mode", ["tree", "dict"])
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_async_iter_targets(prefetch, parse_mode):
+    async def go(cli):
+        return [t["@id"] async for t in cli.iter_targets(page_size=2,
+                                                          prefetch=prefetch)]
+    assert run(go, parse_mode) == ["1", "2", "3", "4", "5"]
+
+
+def test_async_create_task_default_scanner():
+    async def go(cli):
+        response = await cli.create_task("task", "c1", "t1")
+        assert response.status_code == 201
+    run(go)
+
+
+def test_async_report():
+    async def go(cli):
+        report = await cli.download_report("r")
+        assert etree.iselement(report)
+        return [r["@id"] async for r in cli.iter_report_results("r")]
+    assert run(go) == ["1", "2"]
+
+
+def test_async_timings():
+    async def go(cli):
+        timings = []
+        cli.register_hook("post_command", timings.append)
+        await cli.list_targets()
+        return timings
+    timings = run(go)
+    assert timings[0].command == "get_targets"
+    assert timings[0].bytes_in > 0
+    assert timings[0].parse_time >= 0
@@ -0,0 +1,97 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas batches
+=======================
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+from pyvas import Client, Response, exceptions
+from pyvas.records import Target
+
+from conftest import SocketStandIn
+
+
+class CommandsSocket(SocketStandIn):
+    """Socket stand-in answering `<commands>` envelopes."""
+
+    def handle(self, request):
+        responses = []
+        for command in request:
+            if command.get("target_id") == "missing":
+                status = b'status="404" status_text="Failed to find target"'
+            else:
+                status = b'status="200" status_text="OK"'
+            body = b""
+            if command.tag == "get_targets":
+                body = b'<target id="t"><name>t</name></target>'
+            responses.append(b"<" + command.tag.encode() + b"_response " +
+                             status + b">" + body + b"</" +
+                             command.tag.encode() + b"_response>")
+        return (b"<commands_response>" + b"".join(responses) +
+                b"</commands_response>")
+
+
+@pytest.fixture()
+def client(parse_mode):
+    cli = Client("localhost", parse_mode=parse_mode)
+    cli.socket = CommandsSocket()
+    return cli
+
+
+def test_batch_single_round_trip(client):
+    with client.batch() as batch:
+        first = batch.delete_target("a")
+        missing = batch.delete_target("missing")
+        started = batch.start_task("t")
+        with pytest.raises(RuntimeError):
+            first.result()
+
+    assert len(client.socket.requests) == 1
+    envelope = client.socket.requests[0]
+    assert envelope.tag == "commands"
+    assert [c.tag for c in envelope] == ["delete_target", "delete_target",
+                                         "start_task"]
+
+    assert isinstance(first.result(), Response)
+    assert first.result().command == "delete_target"
+    assert started.result().ok
+    with pytest.raises(exceptions.ElementNotFound):
+        missing.result()
+
+
+def test_batch_send_returns_results_in_order(client):
+    batch = client.batch()
+    batch.delete_target("a")
+    batch.delete_target("missing")
+    results = batch.send()
+    assert isinstance(results[0], Response)
+    assert isinstance(results[1], exceptions.ElementNotFound)
+    assert batch.send() == []
+
+
+def test_batch_list(client):
+    with client.batch() as batch:
+        targets = batch.list_targets()
+    assert targets.result()[0]["name"] == "t"
+
+    client.records = True
+    with client.batch() as batch:
+        targets = batch.list_targets()
+        dicts = batch.list_targets(records=False)
+    assert targets.result()[0] == Target(id="t", name="t")
+    assert dicts.result()[0]["@id"] == "t"
+
+
+def test_batch_not_sent_on_error(client):
+    with pytest.raises(ValueError):
+        with client.batch() as batch:
+            batch.delete_target("a")
+            raise ValueError
+    assert client.socket.requests == []
+
+
+def test_batch_rejects_unbatchable_commands(client):
+    with pytest.raises(AttributeError):
+        client.batch().download_report("r")
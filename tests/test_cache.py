@@ -0,0 +1,212 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas response cache
+==============================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import time
+
+import pytest
+from lxml import etree
+
+from pyvas import AsyncClient, Client
+from pyvas.cache import ReportStore
+from pyvas.cache import ResponseCache
+from pyvas.testing import FakeManager
+
+from conftest import SocketStandIn
+
+
+class CountingSocket(SocketStandIn):
+    """Socket stand-in answering every command with a canned response."""
+
+    def __init__(self):
+        super(CountingSocket, self).__init__()
+        # tags of the commands answered, batched ones included
+        self.commands = []
+
+    def handle(self, request):
+        if request.tag == "commands":
+            return (b"<commands_response>" +
+                    b"".join(self.handle(command) for command in request) +
+                    b"</commands_response>")
+        self.commands.append(request.tag)
+        if request.tag == "get_scanners":
+            body = b'<scanner id="s1"><name>OpenVAS Default</name></scanner>'
+        elif request.tag == "get_configs":
+            body = b'<config id="c1"><name>Full and fast</name></config>'
+        else:
+            body = b""
+        status = b"201" if request.tag.startswith("create_") else b"200"
+        tag = request.tag.encode()
+        return (b"<" + tag + b'_response status="' + status +
+                b'" status_text="OK">' + body + b"</" + tag + b"_response>")
+
+
+def get(tag, **attrib):
+    return etree.Element(tag, **attrib)
+
+
+@pytest.fixture()
+def client(parse_mode):
+    cli = Client("localhost", parse_mode=parse_mode,
+                 cache=ResponseCache(ttl=60))
+    cli.socket = CountingSocket()
+    return cli
+
+
+def test_cache_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("pyvas.cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    cache.put(get("get_configs"), "resp")
+    assert cache.get(get("get_configs")) == "resp"
+    now[0] += 11
+    assert cache.get(get("get_configs")) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expired"] == 1
+
+
+def test_cache_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    for name in ("a", "b"):
+        cache.put(get("get_configs", filter=name), name)
+    cache.get(get("get_configs", filter="a"))
+    cache.put(get("get_configs", filter="c"), "c")
+    assert cache.get(get("get_configs", filter="b")) is None
+    assert cache.get(get("get_configs", filter="a")) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_invalidation():
+    cache = ResponseCache()
+    cache.put(get("get_configs"), "configs")
+    cache.put(get("get_port_lists"), "port lists")
+    cache.invalidate(get("create_config"))
+    assert cache.get(get("get_configs")) is None
+    assert cache.get(get("get_port_lists")) == "port lists"
+    cache.invalidate(get("get_port_lists"))
+    assert len(cache) == 1
+
+
+def test_client_cache_hits(client):
+    first = client.list_scanners()
+    second = client.list_scanners()
+    assert first.data == second.data
+    assert client.socket.commands == ["get_scanners"]
+
+    client.list_scanners(name="other")
+    assert client.socket.commands == ["get_scanners", "get_scanners"]
+
+    client.list_tasks()
+    client.list_tasks()
+    assert client.socket.commands.count("get_tasks") == 2
+
+    stats = client.cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_client_cache_write_invalidation(client):
+    client.list_configs()
+    client.create_config("copy", copy_uuid="c1")
+    client.list_configs()
+    assert client.socket.commands == ["get_configs", "create_config",
+                                      "get_configs"]
+
+
+def test_client_cache_default_scanner(client):
+    for _ in range(3):
+        client.create_task("task", "c1", "t1")
+    assert client.socket.commands.count("get_scanners") == 1
+    assert client.socket.commands.count("create_task") == 3
+
+
+def test_client_cache_in_batch(client):
+    client.list_configs()
+    with client.batch() as batch:
+        batch.delete_config("c1")
+    assert client.cache.stats()["invalidations"] == 1
+
+
+def test_report_store(tmpdir):
+    store = ReportStore(str(tmpdir.join("reports.db")), max_bytes=10)
+    request = get("get_reports", report_id="r1")
+    assert store.cacheable(request)
+    assert not store.cacheable(get("get_reports", report_id="r1",
+                                   details="0"))
+    assert not store.cacheable(get("get_tasks"))
+
+    store.put(request, "t1", b"12345")
+    assert store.get(request, "t1") == b"12345"
+    # a different filter or format is a different report
+    assert store.get(get("get_reports", report_id="r1", filter="rows=1"),
+                     "t1") is None
+
+    # modified since: stale
+    assert store.get(request, "t2") is None
+    assert len(store) == 0
+
+    store.put(request, "t1", b"12345")
+    other = get("get_reports", report_id="r2")
+    store.put(other, "t1", b"123456")
+    store.put(get("get_reports", report_id="r3"), "t1", b"123")
+    # r1 was least recently used
+    assert store.get(request, "t1") is None
+    assert store.get(other, "t1") == b"123456"
+    stats = store.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == 9
+
+    store.invalidate("r2")
+    assert store.get(other, "t1") is None
+    store.close()
+
+
+@pytest.mark.parametrize("parse_mode", ["tree", "dict"])
+def test_client_report_store(tmpdir, parse_mode):
+    path = str(tmpdir.join("reports.db"))
+    csv = "c1645568-627a-11e3-a660-406186ea4fc5"
+    with FakeManager(report_size=20, scan_duration=0.1) as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port, parse_mode=parse_mode,
+                    report_store=ReportStore(path)) as cli:
+            config = cli.list_configs(name="empty")[0]["@id"]
+            target = cli.create_target("t", "127.0.0.1").xml.get("id")
+            task = cli.create_task("t", config, target).xml.get("id")
+            report = cli.start_task(task).xml.findtext("report_id")
+
+            # running reports are not stored
+            cli.download_report(report)
+            assert len(cli.report_store) == 0
+
+            cli.wait_for_tasks([task], min_interval=0.01)
+            first = etree.tostring(cli.download_report(report))
+            assert etree.tostring(cli.download_report(report)) == first
+            assert (cli.download_report(report, format_uuid=csv) ==
+                    cli.download_report(report, format_uuid=csv))
+            assert cli.get_report(report)["@id"] == report
+            assert cli.get_report(report)["@id"] == report
+            stats = cli.report_store.stats()
+            # get_report shares the stored response without a format
+            assert (stats["size"], stats["hits"]) == (2, 4)
+
+        # persisted, and validated against the modification time
+        time.sleep(1)
+        manager._entities["report"][report].find(
+            "modification_time").text = time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        async def run():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port,
+                                   report_store=ReportStore(path)) as cli:
+                await cli.download_report(report)
+                await cli.download_report(report)
+                return cli.report_store.stats()
+
+        stats = asyncio.run(run())
+        assert (stats["stale"], stats["hits"]) == (1, 1)
@@ -0,0 +1,117 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas change feeds
+============================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+
+import pytest
+from lxml import etree
+
+from pyvas import AsyncClient, Client
+from pyvas.changes import AsyncChangeFeed, ChangeFeed, CREATED, MODIFIED
+from pyvas.testing import FakeManager
+
+from conftest import SocketStandIn
+
+
+class TargetSocket(SocketStandIn):
+    """Socket stand-in answering get_targets from a dict of targets."""
+
+    def __init__(self):
+        super(TargetSocket, self).__init__()
+        # uuid -> (creation_time, modification_time)
+        self.targets = {}
+        self.filters = []
+
+    def handle(self, request):
+        self.filters.append(request.get("filter"))
+        response = etree.Element("get_targets_response", status="200",
+                                 status_text="OK")
+        for uuid, (created, modified) in sorted(self.targets.items(),
+                                                key=lambda i: i[1][1]):
+            target = etree.SubElement(response, "target", id=uuid)
+            etree.SubElement(target, "creation_time").text = created
+            etree.SubElement(target, "modification_time").text = modified
+        return response
+
+
+@pytest.fixture()
+def client(parse_mode):
+    cli = Client("localhost", parse_mode=parse_mode)
+    cli.socket = TargetSocket()
+    return cli
+
+
+def kinds(changes):
+    return [(change.kind, change.uuid) for change in changes]
+
+
+def test_change_feed(client):
+    targets = client.socket.targets
+    targets["a"] = ("2018-01-01T10:00:00Z", "2018-01-01T10:00:00Z")
+    targets["b"] = ("2018-01-01T10:00:00Z", "2018-01-01T11:00:00Z")
+
+    feed = client.changes("target")
+    assert kinds(feed.poll()) == [(CREATED, "a"), (CREATED, "b")]
+    assert feed.watermark == "2018-01-01T11:00:00Z"
+    assert "modified" not in client.socket.filters[0].split("sort=")[0]
+
+    # the fake server ignores the filter, already seen objects are skipped
+    assert feed.poll() == []
+    assert 'modified>"2018-01-01T10:59:59Z"' in client.socket.filters[1]
+
+    targets["a"] = ("2018-01-01T10:00:00Z", "2018-01-01T12:00:00+01:00")
+    targets["c"] = ("2018-01-01T11:00:00Z", "2018-01-01T11:00:00Z")
+    targets["d"] = ("2018-01-01T12:00:00Z", "2018-01-01T12:00:00Z")
+    assert kinds(feed.poll()) == [(CREATED, "c"), (MODIFIED, "a"),
+                                  (CREATED, "d")]
+    assert feed.state == {"watermark": "2018-01-01T12:00:00Z",
+                          "seen": ["d"]}
+
+
+def test_change_feed_records(client):
+    client.records = True
+    client.socket.targets["a"] = ("2018-01-01T10:00:00Z",
+                                  "2018-01-01T10:00:00Z")
+    assert kinds(client.changes("target").poll()) == [(CREATED, "a")]
+
+
+def test_change_feed_resume(client, tmpdir):
+    targets = client.socket.targets
+    targets["a"] = ("2018-01-01T10:00:00Z", "2018-01-01T10:00:00Z")
+    path = str(tmpdir.join("targets.json"))
+
+    feed = ChangeFeed.load(client, "target", path)
+    assert feed.watermark is None
+    feed.poll()
+    feed.save(path)
+
+    targets["a"] = ("2018-01-01T10:00:00Z", "2018-01-01T10:30:00Z")
+    targets["b"] = ("2018-01-01T10:00:00Z", "2018-01-01T10:00:00Z")
+    resumed = ChangeFeed.load(client, "target", path)
+    assert kinds(resumed.poll()) == [(CREATED, "b"), (MODIFIED, "a")]
+
+
+def test_async_change_feed():
+    with FakeManager() as manager:
+        async def go():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port,
+                                   records=True) as cli:
+                feed = cli.changes("target")
+                assert isinstance(feed, AsyncChangeFeed)
+                await cli.create_target("a", "127.0.0.1")
+                created = kinds(await feed.poll())
+
+                await cli.create_target("b", "127.0.0.1")
+                follow = feed.follow(interval=0)
+                change = await follow.__anext__()
+                await follow.aclose()
+                return created, [change.data["name"]]
+
+        created, followed = asyncio.run(go())
+    assert [kind for kind, _ in created] == [CREATED]
+    assert followed == ["b"]
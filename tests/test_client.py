@@ -133,6 +133,14 @@ class TestClientGenericMethods(object):
         response = client._list('target')
         assert response.ok
 
+    def test_list_dict_parse_mode(self, client):
+        with Client(HOST, username=USERNAME, password=PASSWORD,
+                    parse_mode="dict") as dict_client:
+            response = dict_client._list('target')
+            assert response.ok
+            assert response.raw is None
+            assert response.data == client._list('target').data
+
     def test_get(self, client):
         with pytest.raises(exceptions.ElementNotFound):
             client._get('target',
@@ -182,6 +190,15 @@ class TestTargets(object):
         assert response.ok
         assert isinstance(response.data, list)
 
+    def test_iter_targets(self, client, target):
+        targets = list(client.iter_targets(page_size=1))
+        assert target["@id"] in [t["@id"] for t in targets]
+        assert len(targets) == len(client.list_targets().data)
+
+    def test_iter_targets_prefetch(self, client, target):
+        targets = list(client.iter_targets(page_size=1, prefetch=True))
+        assert target["@id"] in [t["@id"] for t in targets]
+
     def test_list_filter_target(self, client):
         response = client.list_targets(name=NAME)
         assert response.ok
@@ -365,6 +382,14 @@ class TestReports(object):
         response = client.get_report(uuid=report["@id"])
         assert response.ok and response.status_code == 200
 
+    @slow
+    def test_iter_report_results(self, client, report):
+        results = client.iter_report_results(uuid=report["@id"])
+        for result in results:
+            assert "@id" in result
+        # the connection is usable once the results are consumed
+        assert client.get_report(uuid=report["@id"]).ok
+
     @slow
     def test_download_report_with_xml_format(self, client, report):
         response = client.download_report(uuid=report["@id"])
@@ -0,0 +1,88 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas report diff
+===========================
+"""
+from __future__ import unicode_literals
+
+import collections
+
+import pytest
+
+from pyvas import Client
+from pyvas.diff import CHANGED, FIXED, NEW, UNCHANGED
+from pyvas.diff import diff_reports, diff_results
+from pyvas.records import Result
+from pyvas.testing import FakeManager
+
+
+def result(host, oid, severity, port="80/tcp"):
+    return Result(host=host, port=port, nvt_oid=oid, severity=severity)
+
+
+OLD = [
+    result("10.0.0.1", "1.1", 5.0),
+    result("10.0.0.1", "1.2", 7.5),
+    result("10.0.0.2", "1.1", 5.0),
+    # duplicates of a key are ignored
+    result("10.0.0.2", "1.1", 9.0),
+]
+
+NEW_RESULTS = [
+    result("10.0.0.1", "1.1", 5.0),
+    result("10.0.0.2", "1.1", 6.0),
+    result("10.0.0.3", "1.1", 5.0),
+    result("10.0.0.3", "1.1", 5.0),
+    result("10.0.0.1", "1.1", 5.0, port="443/tcp"),
+]
+
+
+def kinds(differences):
+    return dict((d.key, d.kind) for d in differences)
+
+
+@pytest.mark.parametrize("partitions", [1, 3])
+def test_diff_results(partitions):
+    differences = list(diff_results(OLD, NEW_RESULTS, partitions))
+    assert len(differences) == 5
+    assert kinds(differences) == {
+        ("10.0.0.1", "80/tcp", "1.1"): UNCHANGED,
+        ("10.0.0.1", "80/tcp", "1.2"): FIXED,
+        ("10.0.0.2", "80/tcp", "1.1"): CHANGED,
+        ("10.0.0.3", "80/tcp", "1.1"): NEW,
+        ("10.0.0.1", "443/tcp", "1.1"): NEW,
+    }
+    changed = [d for d in differences if d.kind == CHANGED][0]
+    assert (changed.old.severity, changed.new.severity) == (5.0, 6.0)
+    fixed = [d for d in differences if d.kind == FIXED][0]
+    assert fixed.new is None and fixed.old.severity == 7.5
+
+
+def test_diff_results_dicts():
+    old = [{"@id": "r1", "host": {"#text": "10.0.0.1", "asset": None},
+            "port": "22/tcp", "nvt": {"@oid": "1.1"}, "severity": "5.0"}]
+    new = [{"@id": "r2", "host": "10.0.0.1", "port": "22/tcp",
+            "nvt": {"@oid": "1.1"}, "severity": "6.5"}]
+    difference, = diff_results(old, new)
+    assert difference.kind == CHANGED
+    assert difference.key == ("10.0.0.1", "22/tcp", "1.1")
+    assert difference.new.id == "r2"
+
+
+def test_diff_reports():
+    with FakeManager(report_size=50, scan_duration=0) as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port) as cli:
+            config = cli.list_configs(name="empty")[0]["@id"]
+            target = cli.create_target("t", "127.0.0.1").xml.get("id")
+            task = cli.create_task("t", config, target).xml.get("id")
+            first = cli.start_task(task).xml.findtext("report_id")
+            cli.wait_for_tasks([task], min_interval=0.01)
+            second = cli.start_task(task).xml.findtext("report_id")
+
+            counts = collections.Counter(
+                d.kind for d in diff_reports(cli, first, second,
+                                             partitions=2))
+            assert counts == {UNCHANGED: 50}
+            # the connection is usable afterwards
+            assert cli.get_report(second)["@id"] == second
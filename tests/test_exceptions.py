@@ -44,3 +44,29 @@ def test_invalid_argument():
 
 def test_server_error():
     assert exceptions.ServerError("")
+
+
+def test_connection_closed():
+    exc = exceptions.ConnectionClosed(0)
+    assert exc
+    assert str(exc)
+
+
+def test_response_too_large():
+    exc = exceptions.ResponseTooLarge(1024)
+    assert exc
+    assert str(exc)
+
+
+def test_pool_timeout():
+    exc = exceptions.PoolTimeout(4, 1.0)
+    assert exc
+    assert str(exc)
+
+
+def test_wait_timeout():
+    exc = exceptions.WaitTimeout(["t1"], {"t2": None})
+    assert isinstance(exc, exceptions.Timeout)
+    assert exc.pending == ["t1"]
+    assert exc.finished == {"t2": None}
+    assert "t1" in str(exc)
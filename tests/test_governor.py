@@ -0,0 +1,223 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas governors
+=========================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+from lxml import etree
+
+from pyvas import AsyncClient, Client, exceptions
+from pyvas.client import _server_error
+from pyvas.governor import AIMDLimit, Chain, TokenBucket, acquire_async
+from pyvas.testing import FakeManager
+
+
+class RecordingGovernor(object):
+    def __init__(self):
+        self.calls = []
+
+    def acquire(self, command=None):
+        self.calls.append(("acquire", command))
+
+    def release(self, command=None, latency=None, error=None):
+        self.calls.append(("release", command, error))
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, burst=2)
+    start = time.time()
+    for _ in range(7):
+        bucket.acquire()
+    # 2 at once, 5 more at 50/s
+    assert 0.08 <= time.time() - start < 0.5
+
+
+def test_aimd_decrease_and_increase():
+    limit = AIMDLimit(initial=8, maximum=10, cooldown=0)
+    limit.acquire("get_tasks")
+    limit.release("get_tasks", 0.1, exceptions.ServerError("busy"))
+    assert limit.limit == 4
+
+    # client errors say nothing about the manager's load
+    limit.acquire("get_tasks")
+    limit.release("get_tasks", 0.1, exceptions.ElementNotFound("nope"))
+    assert limit.limit == 4
+
+    # one more per window of `limit` successes
+    for _ in range(4):
+        limit.acquire("get_tasks")
+        limit.release("get_tasks", 0.1)
+    assert limit.limit == 5
+
+    # twice as slow as the baseline
+    limit.acquire("get_tasks")
+    limit.release("get_tasks", 0.3)
+    assert limit.limit == 2
+    assert limit.stats() == {"limit": 2, "in_flight": 0, "decreases": 2}
+
+
+def test_aimd_cooldown():
+    limit = AIMDLimit(initial=8, latency=0.5, cooldown=60)
+    for _ in range(3):
+        limit.acquire()
+        limit.release(latency=1.0)
+    assert limit.limit == 4
+
+
+def test_aimd_limits_in_flight():
+    limit = AIMDLimit(initial=2, maximum=2)
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        limit.acquire()
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        limit.release(latency=0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_aimd_cancelled_async_wait():
+    limit = AIMDLimit(initial=1, maximum=1)
+
+    class Threaded(object):
+        """Governor without acquire_async, acquired in a thread."""
+
+        def acquire(self, command=None):
+            limit.acquire(command)
+
+        def release(self, command=None, latency=None, error=None):
+            limit.release(command, latency, error)
+
+    async def run():
+        await limit.acquire_async()
+        for governor in (limit, Threaded(), Chain(TokenBucket(100), limit)):
+            waiting = asyncio.ensure_future(acquire_async(governor))
+            await asyncio.sleep(0.02)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+        limit.release()
+
+        # the cancelled waits hold no slot
+        for _ in range(100):
+            if limit.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(limit.acquire_async(), 1)
+        limit.release()
+
+    asyncio.run(run())
+    assert limit.stats()["in_flight"] == 0
+
+
+def test_chain_releases_on_failure():
+    class Failing(object):
+        def acquire(self, command=None):
+            raise exceptions.Timeout()
+
+    limit = AIMDLimit(initial=1)
+    with pytest.raises(exceptions.Timeout):
+        Chain(limit, Failing()).acquire()
+    assert limit.stats()["in_flight"] == 0
+
+
+def test_server_error():
+    assert _server_error(etree.fromstring(
+        '<get_tasks_response status="200" status_text="OK"/>')) is None
+    error = _server_error({"get_tasks_response": {
+        "@status": "503", "@status_text": "Service temporarily down"}})
+    assert isinstance(error, exceptions.ServerError)
+
+
+def test_client_governor():
+    governor = RecordingGovernor()
+    with FakeManager() as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port, governor=governor) as cli:
+            cli.list_targets()
+            with pytest.raises(exceptions.ElementNotFound):
+                cli.get_target("missing")
+
+        async def run():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port,
+                                   governor=governor) as cli:
+                await cli.list_targets()
+
+        asyncio.run(run())
+
+    assert governor.calls[:6] == [
+        ("acquire", "authenticate"), ("release", "authenticate", None),
+        ("acquire", "get_targets"), ("release", "get_targets", None),
+        ("acquire", "get_targets"), ("release", "get_targets", None),
+    ]
+    assert governor.calls[-2:] == [("acquire", "get_targets"),
+                                   ("release", "get_targets", None)]
+
+
+def test_async_client_governor_wait_is_bounded():
+    limit = AIMDLimit(initial=1, maximum=1)
+    with FakeManager(latency=0.3) as manager:
+        async def client():
+            cli = AsyncClient(manager.host, username="admin",
+                              password="admin", port=manager.port,
+                              governor=limit)
+            await cli.open()
+            return cli
+
+        async def run():
+            slow, waiting = await client(), await client()
+            busy = asyncio.ensure_future(slow.list_targets())
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(waiting.list_targets(), 0.05)
+            start = time.time()
+            with waiting.deadline(total=0.05):
+                with pytest.raises(exceptions.RequestTimeout) as error:
+                    await waiting.list_targets()
+            assert error.value.phase == "total"
+            # gave up waiting for the governor in time
+            assert time.time() - start < 0.15
+            assert not busy.done()
+
+            await busy
+            # neither wait kept a slot
+            assert limit.stats()["in_flight"] == 0
+            assert (await asyncio.wait_for(waiting.list_targets(), 1)).ok
+            await slow.close()
+            await waiting.close()
+
+        asyncio.run(run())
+
+
+def test_client_governor_connection_error():
+    governor = RecordingGovernor()
+    with FakeManager() as manager:
+        cli = Client(manager.host, username="admin", password="admin",
+                     port=manager.port, governor=governor, retries=0)
+        cli.open()
+        cli.socket.close()
+        with pytest.raises((socket.error, exceptions.ConnectionClosed)):
+            cli._send_governed(etree.Element("get_tasks"),
+                               cli._response_parser())
+    assert governor.calls[-1][0] == "release"
+    assert governor.calls[-1][2] is not None
@@ -0,0 +1,95 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas metrics
+=======================
+"""
+from __future__ import unicode_literals
+
+import pytest
+
+from pyvas import Client, exceptions
+from pyvas.metrics import MetricsCollector, percentile
+
+from conftest import SocketStandIn
+
+
+class EchoSocket(SocketStandIn):
+    """Socket stand-in answering get_* commands with one entity."""
+
+    def handle(self, request):
+        if request.tag == "get_configs":
+            return (b'<get_configs_response status="200" status_text="OK">'
+                    b'<config id="c1"><name>n</name></config>'
+                    b'</get_configs_response>')
+        return (b"<" + request.tag.encode() + b'_response status="404" '
+                b'status_text="Not found"/>')
+
+
+@pytest.fixture()
+def client(parse_mode):
+    cli = Client("localhost", parse_mode=parse_mode)
+    cli.socket = EchoSocket()
+    return cli
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile(values, 0) == 1
+    # nearest rank, not interpolated or rounded
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 51) == 3
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_hooks(client):
+    seen = []
+    client.register_hook("pre_command", lambda req: seen.append(req.tag))
+    client.register_hook("post_command", seen.append)
+    client.list_configs()
+    assert seen[0] == "get_configs"
+    timings = seen[1]
+    assert timings.status_code == 200
+    assert timings.bytes_in > 0 and timings.bytes_out > 0
+    assert timings.total_time >= timings.ttfb >= 0
+    assert timings.as_dict()["command"] == "get_configs"
+
+    with pytest.raises(ValueError):
+        client.register_hook("unknown", seen.append)
+    assert client.deregister_hook("post_command", seen.append)
+    assert not client.deregister_hook("post_command", seen.append)
+
+
+def test_collector(client):
+    metrics = MetricsCollector()
+    metrics.register(client)
+
+    for _ in range(3):
+        client.list_configs().data
+    with pytest.raises(exceptions.ElementNotFound):
+        client.get_task("t1")
+
+    summary = metrics.summary()
+    configs = summary["get_configs"]
+    assert configs["count"] == 3
+    assert configs["errors"] == 0
+    for name in ("serialize_time", "send_time", "ttfb", "recv_time",
+                 "parse_time", "convert_time", "total_time"):
+        assert configs[name]["p50"] <= configs[name]["p99"] <= \
+            configs[name]["max"]
+    assert summary["get_tasks"]["errors"] == 1
+
+    metrics.reset()
+    assert metrics.summary() == {}
+
+
+def test_response_convert_time(client):
+    timings = []
+    client.register_hook("post_convert", timings.append)
+    response = client.list_configs()
+    assert response.convert_time is None and not timings
+    response.data
+    assert timings[0].convert_time == response.convert_time >= 0
@@ -0,0 +1,82 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas MultiClient
+===========================
+"""
+from __future__ import unicode_literals
+
+import socket
+
+import pytest
+
+from pyvas import exceptions
+from pyvas.multi import MultiClient
+from pyvas.testing import FakeManager
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture(scope="module")
+def managers():
+    with FakeManager() as eu, FakeManager() as us, \
+            FakeManager(latency=1.0) as slow:
+        yield eu, us, slow
+
+
+def test_multi_client(managers):
+    eu, us, slow = managers
+    for manager in (eu, us):
+        with MultiClient([(manager.host, manager.port)], username="admin",
+                         password="admin") as multi:
+            pool = next(iter(multi.pools.values()))
+            with pool.connection() as cli:
+                cli.create_target("target", "127.0.0.1")
+
+    endpoints = [
+        {"name": "eu", "host": eu.host, "port": eu.port},
+        (us.host, us.port),
+        {"name": "slow", "host": slow.host, "port": slow.port},
+        {"name": "down", "host": "127.0.0.1", "port": closed_port()},
+    ]
+    with MultiClient(endpoints, username="admin", password="admin",
+                     timeout=0.5) as multi:
+        response = multi.list_targets(name="target")
+        assert not response.ok
+        assert sorted(response.responses) == sorted(
+            ["eu", "{}:{}".format(us.host, us.port)])
+        assert isinstance(response.errors["slow"],
+                          exceptions.DeadlineExceeded)
+        assert isinstance(response.errors["down"], socket.error)
+        # the slow manager did not hold up the others
+        assert response.elapsed < 0.9
+
+        managers = [manager for manager, _ in response.data]
+        assert sorted(managers) == sorted(response.responses)
+        assert all(target["name"] == "target"
+                   for _, target in response.data)
+
+        with pytest.raises(exceptions.Error):
+            response.raise_for_errors()
+
+        uuid = [target["@id"] for manager, target in response.data
+                if manager == "eu"][0]
+        response = multi.get_target(uuid, deadline=2)
+        assert list(response.responses) == ["eu"]
+        assert response.data == [("eu", response.responses["eu"].data)]
+        # not found on the others
+        assert isinstance(response.errors["{}:{}".format(us.host, us.port)],
+                          exceptions.ElementNotFound)
+
+
+def test_multi_client_reads_only():
+    with MultiClient([]) as multi:
+        with pytest.raises(AttributeError):
+            multi.create_target
+        with pytest.raises(AttributeError):
+            multi.list_unknown
@@ -0,0 +1,120 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas ClientPool
+==========================
+"""
+from __future__ import unicode_literals
+
+import socket
+import threading
+import time
+
+import pytest
+
+from pyvas import Client, exceptions
+from pyvas.pool import ClientPool
+
+
+class FakeClient(object):
+    """Client stand-in counting open calls."""
+    opened = 0
+
+    def __init__(self, host, username=None, password=None, port=None):
+        self.host = host
+        self.socket = None
+        self.alive = True
+
+    def open(self):
+        FakeClient.opened += 1
+        self.socket = object()
+
+    def close(self):
+        self.socket = None
+
+    def is_alive(self):
+        return self.alive
+
+
+@pytest.fixture()
+def pool():
+    FakeClient.opened = 0
+    with ClientPool("localhost", size=2, client_class=FakeClient) as pool:
+        yield pool
+
+
+def test_pool_reuses_connections(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    assert FakeClient.opened == 1
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 2
+    assert metrics["opened"] == 1
+    assert metrics["idle"] == 1
+
+
+def test_pool_is_bounded(pool):
+    first = pool.checkout()
+    second = pool.checkout()
+    assert first is not second
+    with pytest.raises(exceptions.PoolTimeout):
+        pool.checkout(timeout=0.01)
+    assert pool.metrics()["timeouts"] == 1
+    pool.checkin(first)
+    assert pool.checkout(timeout=0.01) is first
+
+
+def test_pool_waiters_are_woken(pool):
+    clients = [pool.checkout(), pool.checkout()]
+    # checkouts served at once do not wait
+    assert pool.metrics()["max_waiters"] == 0
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(pool.checkout()))
+    waiter.start()
+    deadline = time.time() + 1
+    while pool.metrics()["waiters"] == 0 and time.time() < deadline:
+        time.sleep(0.001)
+    assert pool.metrics()["waiters"] == 1
+    assert not result
+
+    pool.checkin(clients[0])
+    waiter.join(1)
+    assert result == [clients[0]]
+    metrics = pool.metrics()
+    assert metrics["max_waiters"] == 1
+    assert metrics["waiters"] == 0
+
+
+def test_pool_reconnects_dead_connections(pool):
+    with pool.connection() as client:
+        client.alive = False
+    with pool.connection() as client:
+        assert client.alive
+    metrics = pool.metrics()
+    assert metrics["reconnects"] == 1
+    assert metrics["closed"] == 1
+    assert metrics["opened"] == 2
+
+
+def test_pool_discards_broken_connections(pool):
+    with pytest.raises(socket.error):
+        with pool.connection():
+            raise socket.error("broken pipe")
+    assert pool.metrics()["connections"] == 0
+
+    with pytest.raises(exceptions.ElementNotFound):
+        with pool.connection():
+            raise exceptions.ElementNotFound("")
+    assert pool.metrics()["idle"] == 1
+
+
+def test_client_is_alive():
+    client = Client("localhost")
+    assert not client.is_alive()
+    client.socket, peer = socket.socketpair()
+    assert client.is_alive()
+    peer.close()
+    assert not client.is_alive()
+    client.close()
@@ -0,0 +1,140 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas records
+=======================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import datetime
+
+import pytest
+from lxml import etree
+
+from pyvas import AsyncClient, Client
+from pyvas.records import Report, Result, Target, Task
+from pyvas.testing import FakeManager
+from pyvas.utils import lxml_to_dict
+
+
+RESULT = etree.fromstring(
+    '<result id="r1"><name>SSH weak ciphers</name>'
+    '<owner><name>admin</name></owner><comment/>'
+    '<creation_time>2018-01-01T10:00:00Z</creation_time>'
+    '<modification_time>2018-01-01T10:00:00Z</modification_time>'
+    '<host>10.0.0.1<asset asset_id=""/></host><port>22/tcp</port>'
+    '<nvt oid="1.3.6.1.4.1.25623.1.0.105611"><name>SSH Weak</name></nvt>'
+    '<threat>Medium</threat><severity>4.3</severity>'
+    '<qod><value>95</value></qod><description> Weak. </description>'
+    '</result>'
+)
+
+REPORT = etree.fromstring(
+    '<report id="rep1"><name>2018-01-01T10:00:00Z</name>'
+    '<task id="t1"/><report id="rep1">'
+    '<scan_run_status>Done</scan_run_status>'
+    '<scan_start>2018-01-01T10:00:00+01:00</scan_start><scan_end/>'
+    '<result_count><full>12</full></result_count>'
+    '<severity><full>7.5</full><filtered>5.0</filtered></severity>'
+    '</report></report>'
+)
+
+
+def test_result_from_element():
+    result = Result.from_element(RESULT)
+    assert result.id == "r1"
+    assert result.host == "10.0.0.1"
+    assert result.port == "22/tcp"
+    assert result.nvt_oid == "1.3.6.1.4.1.25623.1.0.105611"
+    assert result.severity == 4.3
+    assert result.qod == 95
+    assert result.comment is None
+    assert result.description == "Weak."
+    assert result.creation_time == datetime.datetime(
+        2018, 1, 1, 10, tzinfo=datetime.timezone.utc)
+
+
+def test_result_from_dict_matches_element():
+    assert (Result.from_dict(lxml_to_dict(RESULT, True)) ==
+            Result.from_element(RESULT))
+
+
+def test_report_nested_fields():
+    report = Report.from_element(REPORT)
+    assert report.task_id == "t1"
+    assert report.scan_run_status == "Done"
+    assert report.severity == 7.5
+    assert report.result_count == 12
+    assert report.scan_start.utcoffset() == datetime.timedelta(hours=1)
+    assert report.scan_end is None
+    assert Report.from_dict(lxml_to_dict(REPORT, True)) == report
+
+
+def test_records_are_compact():
+    result = Result.from_element(RESULT)
+    assert not hasattr(result, "__dict__")
+    with pytest.raises(AttributeError):
+        result.other = 1
+
+    other = Result.from_element(RESULT)
+    # equal strings and timestamps are shared between records
+    assert other.port is result.port
+    assert other.creation_time is result.creation_time
+
+
+def test_record_init():
+    task = Task(id="t1", progress=50)
+    assert task.progress == 50 and task.name is None
+    assert task.as_dict()["id"] == "t1"
+    with pytest.raises(TypeError):
+        Task(unknown=1)
+
+
+@pytest.fixture(scope="module")
+def manager():
+    with FakeManager(report_size=10, scan_duration=0.1) as manager:
+        yield manager
+
+
+@pytest.mark.parametrize("parse_mode", ["tree", "dict"])
+def test_list_records(manager, parse_mode):
+    with Client(manager.host, username="admin", password="admin",
+                port=manager.port, parse_mode=parse_mode,
+                records=True) as cli:
+        uuid = cli.create_target("records " + parse_mode,
+                                 "127.0.0.1").xml.get("id")
+        targets = cli.list_targets(name="records " + parse_mode).data
+        assert [type(t) for t in targets] == [Target]
+        assert targets[0].id == uuid
+        assert targets[0].hosts == "127.0.0.1"
+
+        # dicts on request
+        assert cli.list_targets(uuid=uuid, records=False)[0]["@id"] == uuid
+        # entities without a record type are listed as dicts
+        assert cli.list_schedules().data == []
+        cli.delete_target(uuid)
+
+
+def test_iter_report_results_records(manager):
+    with Client(manager.host, username="admin", password="admin",
+                port=manager.port) as cli:
+        config = cli.list_configs(name="empty")[0]["@id"]
+        target = cli.create_target("results", "127.0.0.1").xml.get("id")
+        task = cli.create_task("results", config, target).xml.get("id")
+        report = cli.start_task(task).xml.findtext("report_id")
+
+        results = list(cli.iter_report_results(report, records=True))
+        assert len(results) == 10
+        assert all(isinstance(r, Result) for r in results)
+        assert results[1].severity == 0.1
+        assert isinstance(next(cli.iter_report_results(report)), dict)
+
+    async def run():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port,
+                               records=True) as cli:
+            return [r async for r in cli.iter_report_results(report)]
+
+    # results are timestamped when served, compare all but the times
+    assert ([(r.id, r.host, r.severity) for r in asyncio.run(run())] ==
+            [(r.id, r.host, r.severity) for r in results])
@@ -6,8 +6,10 @@ Tests for pyvas Response
 from __future__ import unicode_literals
 
 import collections
+import zlib
 import six
 import pytest
+from lxml import etree
 from lxml.etree import Element, SubElement, iselement
 
 from pyvas import Response
@@ -83,6 +85,74 @@ def test_response_callback():
     assert response.data == "a"
 
 
+def test_response_data_is_lazy():
+    req = Element("test")
+    resp = Element("test_response")
+    resp.set("status", "200")
+    resp.set("status_text", "OK")
+    calls = []
+
+    def cb(x):
+        calls.append(x)
+        return {"converted": True}
+
+    response = Response(req=req, resp=resp, cb=cb)
+    assert response.ok
+    assert response.status_code == 200
+    assert calls == []
+
+    assert response["converted"] is True
+    assert response.data is response.data
+    assert len(calls) == 1
+
+
+def test_response_from_dict():
+    tree = {"get_tasks_response": {
+        "@status": "200", "@status_text": "OK",
+        "task": [{"@id": "1", "name": "a"}, {"@id": "2", "name": "b"}],
+    }}
+    response = Response(req=Element("get_tasks"), resp=tree)
+    assert response.ok
+    assert response.command == "get_tasks"
+    assert response.reason == "OK"
+    assert response["task"][1]["name"] == "b"
+    # the element tree is rebuilt on demand
+    assert response.raw is None
+    assert iselement(response.xml)
+    assert [t.get("id") for t in response.xml.findall("task")] == ["1", "2"]
+
+    response = Response(resp=tree, cb=lambda resp: resp)
+    assert response.data is tree
+
+    with pytest.raises(exceptions.ServerError):
+        Response(resp={"x_response": {"@status": "500",
+                                      "@status_text": "err"}}
+                 ).raise_for_status()
+
+
+def test_response_retention():
+    raw = (b'<get_tasks_response status="200" status_text="OK">'
+           b'<task id="1"/></get_tasks_response>')
+
+    response = Response(resp=etree.fromstring(raw), retention="drop_raw")
+    assert iselement(response.xml)
+    assert response["task"]["@id"] == "1"
+    assert response.raw is None and response.xml is None
+
+    response = Response(resp=etree.fromstring(raw),
+                        retention="raw_bytes_only",
+                        raw_bytes=zlib.compress(raw))
+    response.data
+    assert response.raw is None
+    assert response.xml.find("task").get("id") == "1"
+    assert response.xml is not response.xml
+
+    response = Response(resp=utils.lxml_to_dict(etree.fromstring(raw)),
+                        retention="drop_raw")
+    response.data
+    assert response.tree is None
+
+
 @pytest.mark.parametrize(
     "test_input, expected",
     [
@@ -0,0 +1,201 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas streaming
+=========================
+"""
+from __future__ import unicode_literals
+
+import base64
+import io
+import os
+import zlib
+
+import pytest
+from lxml import etree
+
+from pyvas import Client, exceptions
+from pyvas.stream import ReportTarget
+from pyvas.stream import ResponseParser
+from pyvas.stream import ResponseReader
+from pyvas.utils import DictTarget
+from pyvas.utils import lxml_to_dict
+
+
+class FakeSocket(object):
+    """Socket stand-in returning at most `chunk_size` bytes per recv."""
+
+    def __init__(self, data, chunk_size=None):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.sizes = []
+
+    def recv(self, size):
+        self.sizes.append(size)
+        if self.chunk_size is not None:
+            size = min(size, self.chunk_size)
+        data, self.data = self.data[:size], self.data[size:]
+        return data
+
+
+def make_response(count):
+    items = b"".join(b'<task id="%d"><name>n</name></task>' % i
+                     for i in range(count))
+    return (b'<get_tasks_response status="200" status_text="OK">' +
+            items + b'</get_tasks_response>')
+
+
+def test_parser_detects_complete_response():
+    parser = ResponseParser()
+    assert not parser.feed(b'<get_tasks_response status="200">')
+    assert not parser.feed(b'<task id="1"/>')
+    assert parser.feed(b'</get_tasks_response>')
+    root = parser.close()
+    assert root.tag == "get_tasks_response"
+    assert len(root) == 1
+
+
+def test_parser_max_response_size():
+    parser = ResponseParser(max_response_size=10)
+    with pytest.raises(exceptions.ResponseTooLarge):
+        parser.feed(b'<get_tasks_response status="200">')
+
+
+def test_reader_does_not_stop_on_short_reads():
+    data = make_response(200)
+    sock = FakeSocket(data, chunk_size=100)
+    root = ResponseReader(sock).read()
+    assert etree.iselement(root)
+    assert len(root.findall("task")) == 200
+    assert sock.data == b""
+
+
+def test_parser_compress():
+    data = make_response(100)
+    parser = ResponseParser(compress=True)
+    sock = FakeSocket(data, chunk_size=100)
+    root = ResponseReader(sock, parser).read()
+    assert len(root) == 100
+    assert zlib.decompress(parser.compressed) == data
+    assert ResponseParser().compressed is None
+
+
+def test_reader_grows_block_size():
+    data = make_response(5000)
+    sock = FakeSocket(data)
+    reader = ResponseReader(sock, max_block_size=16384)
+    reader.read()
+    assert reader.block_size == 16384
+    assert reader.recv_calls < len(data) // 1024
+    assert reader.bytes_received == len(data)
+
+
+def test_reader_leaves_next_response_on_socket():
+    first, second = make_response(1), make_response(2)
+    sock = FakeSocket(first + second, chunk_size=len(first))
+    root = ResponseReader(sock).read()
+    assert len(root) == 1
+    assert sock.data == second
+
+
+def test_reader_connection_closed():
+    sock = FakeSocket(b'<get_tasks_response status="200"><task/>')
+    with pytest.raises(exceptions.ConnectionClosed):
+        ResponseReader(sock).read()
+
+
+REPORT = (b'<get_reports_response status="200" status_text="OK">'
+          b'<report id="r"><report id="r"><results>'
+          b'<result id="1"><detection><result id="d"/></detection></result>'
+          b'<result id="2"/><result id="3"/>'
+          b'</results></report></report></get_reports_response>')
+
+
+def test_reader_iterparse():
+    parser = ResponseParser(tag="result", parent="results")
+    reader = ResponseReader(FakeSocket(REPORT, chunk_size=16), parser)
+    ids = []
+    for element in reader.iterparse():
+        ids.append(element.get("id"))
+        if element.get("id") == "1":
+            assert element.find("detection/result") is not None
+    assert ids == ["1", "2", "3"]
+    root = parser.close()
+    assert root.get("status") == "200"
+    # processed results have been released
+    assert len(root.find("report/report/results")) == 1
+
+
+def test_reader_iterparse_drains_on_close():
+    parser = ResponseParser(tag="result", parent="results")
+    sock = FakeSocket(REPORT, chunk_size=16)
+    results = ResponseReader(sock, parser).iterparse()
+    assert next(results).get("id") == "1"
+    results.close()
+    assert parser.done
+    assert sock.data == b""
+
+
+def test_reader_with_dict_target():
+    parser = ResponseParser(target=DictTarget())
+    sock = FakeSocket(make_response(3), chunk_size=10)
+    result = ResponseReader(sock, parser).read()
+    assert result == lxml_to_dict(etree.fromstring(make_response(3)))
+    assert sock.data == b""
+
+
+def make_report(contents, status=b"200"):
+    encoded = base64.encodebytes(contents)
+    return (b'<get_reports_response status="' + status +
+            b'" status_text="OK"><report id="r" format_id="f" '
+            b'content_type="application/pdf"><owner><name>admin</name>'
+            b'</owner><report_format id="f"><name>PDF</name>'
+            b'</report_format>' + encoded + b'</report>'
+            b'</get_reports_response>')
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_report_target_decodes_while_parsing(chunk_size):
+    contents = os.urandom(10000)
+    out = io.BytesIO()
+    target = ReportTarget(out)
+    parser = ResponseParser(target=target)
+    sock = FakeSocket(make_report(contents), chunk_size=chunk_size)
+    root = ResponseReader(sock, parser).read()
+
+    assert out.getvalue() == contents
+    assert target.bytes_written == len(contents)
+    assert root.get("status") == "200"
+    report = root.find("report")
+    assert report.find("report_format/name").text == "PDF"
+    assert not (report.find("report_format").tail or "").strip()
+
+
+def test_report_target_xml_report():
+    data = (b'<get_reports_response status="200" status_text="OK">'
+            b'<report id="r" content_type="text/xml"><report id="r">'
+            b'<results><result id="1"/></results></report></report>'
+            b'</get_reports_response>')
+    out = io.BytesIO()
+    parser = ResponseParser(target=ReportTarget(out))
+    ResponseReader(FakeSocket(data, chunk_size=5), parser).read()
+    assert etree.fromstring(out.getvalue()).find("results/result") \
+        is not None
+
+
+def test_client_download_report_to(tmpdir):
+    contents = os.urandom(5000)
+    client = Client("localhost")
+    path = str(tmpdir.join("report.pdf"))
+
+    client.socket = FakeSocket(make_report(contents), chunk_size=512)
+    client.socket.sendall = lambda data: None
+    response = client.download_report_to("r", path, format_uuid="f")
+    assert response.ok
+    with open(path, "rb") as fp:
+        assert fp.read() == contents
+
+    client.socket = FakeSocket(make_report(b"", status=b"404"))
+    client.socket.sendall = lambda data: None
+    with pytest.raises(exceptions.ElementNotFound):
+        client.download_report_to("r", path)
+    assert not os.path.exists(path)
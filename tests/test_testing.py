@@ -0,0 +1,416 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas FakeManager
+===========================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import base64
+import io
+import socket
+import threading
+import time
+
+import pytest
+
+from pyvas import AsyncClient, Client, exceptions
+from pyvas.client import CONNECTION_ERRORS
+from pyvas.testing import FakeManager
+from pyvas.transport import UnixTransport
+
+
+CSV_FORMAT = "c1645568-627a-11e3-a660-406186ea4fc5"
+
+
+@pytest.fixture(scope="module")
+def manager():
+    with FakeManager(report_size=10, scan_duration=0.1) as manager:
+        yield manager
+
+
+@pytest.fixture()
+def client(manager):
+    with Client(manager.host, username="admin", password="admin",
+                port=manager.port) as cli:
+        yield cli
+
+
+def test_authentication(manager):
+    client = Client(manager.host, username="admin", password="wrong",
+                    port=manager.port)
+    with pytest.raises(exceptions.AuthenticationError):
+        client.open()
+    client.close()
+
+
+def test_targets(client):
+    response = client.create_target("target", "127.0.0.1", comment="test")
+    assert response.status_code == 201
+    uuid = response.xml.get("id")
+    with pytest.raises(exceptions.ElementExists):
+        client.create_target("target", "127.0.0.1")
+
+    client.modify_target(uuid, comment="changed")
+    assert client.get_target(uuid)["comment"] == "changed"
+    assert [t["@id"] for t in client.list_targets(name="target")] == [uuid]
+
+    client.delete_target(uuid)
+    with pytest.raises(exceptions.ElementNotFound):
+        client.get_target(uuid)
+
+
+def test_tasks_and_reports(client):
+    target = client.create_target("scan", "127.0.0.1").xml.get("id")
+    config = client.list_configs(name="empty")[0]["@id"]
+    task = client.create_task("scan", config, target).xml.get("id")
+    report = client.start_task(task)["report_id"]
+
+    assert client.get_task(task)["status"] == "Running"
+    finished = client.wait_for_tasks([task], min_interval=0.02, timeout=5)
+    assert finished[task]["status"] == "Done"
+
+    results = list(client.iter_report_results(report))
+    assert len(results) == 10
+    assert results[0]["nvt"]["@oid"].startswith("1.3.6.1.4.1.25623")
+
+    out = io.BytesIO()
+    client.download_report_to(report, out, format_uuid=CSV_FORMAT)
+    assert out.getvalue().count(b"\n") == 10
+
+    client.delete_task(task)
+    client.delete_target(target)
+
+
+def test_async_wait_for_tasks_records(manager, client):
+    target = client.create_target("records", "127.0.0.1").xml.get("id")
+    config = client.list_configs(name="empty")[0]["@id"]
+    task = client.create_task("records", config, target).xml.get("id")
+    client.start_task(task)
+
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port,
+                               records=True) as cli:
+            return await cli.wait_for_tasks([task], min_interval=0.02,
+                                            timeout=5)
+    assert asyncio.run(go())[task]["status"] == "Done"
+
+    client.delete_task(task)
+    client.delete_target(target)
+
+
+def test_download_report_dict_mode(manager, client):
+    target = client.create_target("dict", "127.0.0.1").xml.get("id")
+    config = client.list_configs(name="empty")[0]["@id"]
+    task = client.create_task("dict", config, target).xml.get("id")
+    report = client.start_task(task)["report_id"]
+
+    with Client(manager.host, username="admin", password="admin",
+                port=manager.port, parse_mode="dict") as cli:
+        contents = base64.b64decode(
+            cli.download_report(report, format_uuid=CSV_FORMAT))
+        assert contents.count(b"\n") == 10
+        assert cli.download_report(report).get("content_type") == "text/xml"
+
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port,
+                               parse_mode="dict") as cli:
+            return await cli.download_report(report, format_uuid=CSV_FORMAT)
+    assert base64.b64decode(asyncio.run(go())) == contents
+
+    client.delete_task(task)
+    client.delete_target(target)
+
+
+def test_commands_while_streaming_results(manager, client):
+    target = client.create_target("stream", "127.0.0.1").xml.get("id")
+    config = client.list_configs(name="empty")[0]["@id"]
+    task = client.create_task("stream", config, target).xml.get("id")
+    report = client.start_task(task)["report_id"]
+
+    results = client.iter_report_results(report)
+    next(results)
+    with pytest.raises(RuntimeError):
+        client.get_target(target)
+    results.close()
+    # nothing was sent in the midst of the results
+    assert client.get_target(target)["name"] == "stream"
+
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port) as cli:
+            count = 0
+            async for _ in cli.iter_report_results(report):
+                count += 1
+                with pytest.raises(RuntimeError):
+                    await cli.get_target(target)
+            return count, (await cli.get_target(target))["name"]
+    assert asyncio.run(go()) == (10, "stream")
+
+    client.delete_task(task)
+    client.delete_target(target)
+
+
+def test_schedules(client):
+    uuid = client.create_schedule("daily", period=1,
+                                  period_unit="day").xml.get("id")
+    client.modify_schedule(uuid, comment="nightly")
+    assert client.get_schedule(uuid)["comment"] == "nightly"
+    client.delete_schedule(uuid)
+
+
+def test_iter_pages():
+    with FakeManager() as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port) as cli:
+            names = ["target{}".format(i) for i in range(7)]
+            for name in names[:6]:
+                cli.create_target(name, "127.0.0.1")
+
+            # ends on a page boundary without fetching an empty page
+            targets = list(cli.iter_targets(page_size=3))
+            assert [t["name"] for t in targets] == names[:6]
+            assert manager.commands["get_targets"] == 2
+
+            # the last page is shorter than page_size
+            cli.create_target(names[6], "127.0.0.1")
+            for prefetch in (False, True):
+                targets = list(cli.iter_targets(page_size=3,
+                                                prefetch=prefetch))
+                assert [t["name"] for t in targets] == names
+            assert manager.commands["get_targets"] == 8
+
+
+def test_iter_drop_raw(parse_mode):
+    with FakeManager() as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port, parse_mode=parse_mode,
+                    retention="drop_raw") as cli:
+            for i in range(4):
+                cli.create_target("target{}".format(i), "127.0.0.1")
+            assert len(list(cli.iter_targets(page_size=3))) == 4
+
+        async def go():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port,
+                                   parse_mode=parse_mode,
+                                   retention="drop_raw") as cli:
+                return [t async for t in cli.iter_targets(page_size=3)]
+        assert len(asyncio.run(go())) == 4
+        assert manager.commands["get_targets"] == 4
+
+
+def test_iter_prefetch_closed_early():
+    with FakeManager(latency=0.1) as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port) as cli:
+            for i in range(4):
+                cli.create_target("target{}".format(i), "127.0.0.1")
+            threads = set(threading.enumerate())
+
+            targets = cli.iter_targets(page_size=2, prefetch=True)
+            assert next(targets)["name"] == "target0"
+            # the second page is being fetched
+            targets.close()
+            assert set(threading.enumerate()) <= threads
+            assert manager.commands["get_targets"] == 2
+
+            # the prefetched response was read, the connection is in sync
+            assert cli.is_alive()
+            assert [t["name"] for t in cli.list_targets(name="target3")] \
+                == ["target3"]
+
+
+def test_latency():
+    with FakeManager(latency=0.05) as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port) as cli:
+            start = time.time()
+            cli.list_targets()
+            assert time.time() - start >= 0.05
+        assert manager.commands["get_targets"] == 1
+
+
+def test_reconnect(manager, client):
+    client.list_targets()
+    assert manager.drop_connections() == 1
+
+    # dropped while idle: detected before sending
+    client.list_targets()
+    assert client.reconnects == 1
+    assert client.socket.session_reused
+
+    # dropped while sending: only idempotent commands are retried
+    client.is_alive = lambda: True
+    manager.drop_connections()
+    client.list_targets()
+    assert client.reconnects == 2
+
+    manager.drop_connections()
+    with pytest.raises(CONNECTION_ERRORS):
+        client.create_target("dropped", "127.0.0.1")
+
+
+def test_batch_reconnect(manager, client):
+    target = client.create_target("batched", "127.0.0.1").xml.get("id")
+    seen = []
+    client.register_hook("pre_command", lambda request: seen.append(
+        request.tag))
+    client.is_alive = lambda: True
+
+    # batches only reading are sent again over a fresh connection
+    manager.drop_connections()
+    with client.batch() as batch:
+        first = batch.get_target(target)
+        second = batch.get_target(target)
+    assert first.result()["name"] == second.result()["name"] == "batched"
+    assert client.reconnects == 1
+    assert seen == ["commands", "authenticate"]
+
+    manager.drop_connections()
+    with pytest.raises(CONNECTION_ERRORS):
+        with client.batch() as batch:
+            batch.get_target(target)
+            batch.create_target("dropped", "127.0.0.1")
+    del client.is_alive
+    client.delete_target(target)
+
+
+def test_report_streams_reconnect(manager, client):
+    target = client.create_target("streams", "127.0.0.1").xml.get("id")
+    config = client.list_configs(name="empty")[0]["@id"]
+    task = client.create_task("streams", config, target).xml.get("id")
+    report = client.start_task(task)["report_id"]
+
+    manager.drop_connections()
+    out = io.BytesIO()
+    client.download_report_to(report, out, format_uuid=CSV_FORMAT)
+    assert out.getvalue().count(b"\n") == 10
+    assert client.reconnects == 1
+
+    # dropped while sending, nothing received yet
+    client.is_alive = lambda: True
+    manager.drop_connections()
+    assert len(list(client.iter_report_results(report))) == 10
+    assert client.reconnects == 2
+    del client.is_alive
+
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port) as cli:
+            manager.drop_connections()
+            await asyncio.sleep(0.05)
+            results = [result async for result in
+                       cli.iter_report_results(report)]
+            return len(results), cli.reconnects
+    assert asyncio.run(go()) == (10, 1)
+
+    client.delete_task(task)
+    client.delete_target(target)
+
+
+def test_async_reconnect(manager):
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port) as cli:
+            await cli.list_targets()
+            manager.drop_connections()
+            await asyncio.sleep(0.05)
+            await cli.list_targets()
+            return cli.reconnects
+    assert asyncio.run(go()) == 1
+
+
+def test_async_concurrent_reconnect(manager):
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port) as cli:
+            await cli.list_targets()
+            manager.drop_connections()
+            await asyncio.sleep(0.05)
+            responses = await asyncio.gather(
+                *[cli.list_configs(name="empty") for _ in range(3)])
+            assert all(r[0]["name"] == "empty" for r in responses)
+            return cli.reconnects
+    # the first to find the connection dropped replaces it for all
+    assert asyncio.run(go()) == 1
+
+
+def test_unix_transport(tmpdir):
+    path = str(tmpdir.join("gvmd.sock"))
+    with FakeManager(unix_socket=path) as manager:
+        transport = UnixTransport(path)
+        with Client(None, username="admin", password="admin",
+                    transport=transport) as cli:
+            assert cli.socket.family == socket.AF_UNIX
+            cli.list_targets()
+            manager.drop_connections()
+            cli.list_targets()
+            assert cli.reconnects == 1
+
+        async def go():
+            async with AsyncClient(None, username="admin", password="admin",
+                                   transport=transport) as cli:
+                return (await cli.list_configs(name="empty"))[0]["name"]
+        assert asyncio.run(go()) == "empty"
+
+
+def test_retention_policy(manager):
+    with Client(manager.host, username="admin", password="admin",
+                port=manager.port, retention="drop_raw") as cli:
+        response = cli.list_configs()
+        response.data
+        assert response.xml is None
+
+        with cli.retention_policy("raw_bytes_only"):
+            response = cli.list_configs()
+        assert response.raw_bytes
+        response.data
+        assert response.raw is None
+        assert len(response.xml.findall("config")) == 2
+
+        response = cli.list_configs()
+        assert response.retention == "drop_raw"
+
+    with pytest.raises(ValueError):
+        Client("localhost", retention="keep_nothing")
+
+
+def test_overrides_prefetch():
+    with FakeManager() as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port) as cli:
+            for name in ("a", "b"):
+                cli.create_target(name, "127.0.0.1")
+            seen = []
+            list_ = cli._list
+
+            def _list(*args, **kwargs):
+                seen.append((cli._retention(), cli._timeouts().total))
+                return list_(*args, **kwargs)
+            cli._list = _list
+
+            # the next page is fetched by another thread, within them too
+            with cli.retention_policy("drop_raw"), cli.deadline(total=30):
+                list(cli.iter_targets(page_size=1, prefetch=True))
+            assert seen == [("drop_raw", 30)] * 2
+
+
+def test_async_overrides_per_task(manager):
+    async def go():
+        async with AsyncClient(manager.host, username="admin",
+                               password="admin", port=manager.port) as cli:
+            async def override():
+                with cli.retention_policy("raw_bytes_only"), \
+                        cli.deadline(total=30):
+                    await asyncio.sleep(0.05)
+                    return (await cli.list_configs()).retention
+
+            async def other():
+                await asyncio.sleep(0.02)
+                assert cli._timeouts() is None
+                return (await cli.list_configs()).retention
+            return await asyncio.gather(override(), other())
+    assert asyncio.run(go()) == ["raw_bytes_only", "keep_raw"]
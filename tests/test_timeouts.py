@@ -0,0 +1,176 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas timeouts
+========================
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from pyvas import AsyncClient, Client, exceptions
+from pyvas.testing import FakeManager
+from pyvas.timeouts import Deadline, Timeouts
+from pyvas.transport import TLSTransport, UnixTransport
+
+
+class StalledServer(object):
+    """Unix socket server sending `partial` and then nothing."""
+
+    def __init__(self, path, partial=b""):
+        self.path = path
+        self.partial = partial
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen(5)
+        self.connections = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+            conn.recv(4096)
+            conn.sendall(self.partial)
+
+    def close(self):
+        self.listener.close()
+        for conn in self.connections:
+            conn.close()
+
+
+@pytest.fixture()
+def stalled(tmpdir):
+    servers = []
+
+    def start(partial=b""):
+        servers.append(StalledServer(str(tmpdir.join(
+            "gvmd{}.sock".format(len(servers)))), partial))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
+
+
+def unix_client(server, **kwargs):
+    cli = Client(None, transport=UnixTransport(server.path), **kwargs)
+    cli._connect()
+    return cli
+
+
+def test_timeouts_replace():
+    timeouts = Timeouts(connect=1, ttfb=2)
+    assert timeouts.replace(ttfb=None, total=5).ttfb is None
+    assert timeouts.replace(total=5).connect == 1
+    assert timeouts.limits_connect and timeouts.limits_commands
+    assert not Timeouts(connect=1).limits_commands
+
+
+def test_deadline():
+    deadline = Deadline(Timeouts(ttfb=10, total=0.05), "get_tasks")
+    assert deadline.remaining("ttfb") <= 0.05
+    assert deadline.remaining("connect") <= 0.05
+    time.sleep(0.06)
+    with pytest.raises(exceptions.RequestTimeout) as error:
+        deadline.remaining("ttfb")
+    assert error.value.phase == "total"
+    assert Deadline(Timeouts()).remaining("ttfb") is None
+
+
+def test_ttfb_timeout(stalled):
+    cli = unix_client(stalled(), timeouts=Timeouts(ttfb=0.1))
+    start = time.time()
+    with pytest.raises(exceptions.RequestTimeout) as error:
+        cli.list_tasks()
+    assert time.time() - start < 1
+    assert error.value.phase == "ttfb"
+    assert error.value.command == "get_tasks"
+    assert error.value.bytes_sent > 0
+    assert error.value.bytes_received == 0
+    assert "ttfb timeout of 0.1 seconds" in str(error.value)
+    # out of sync, dropped
+    assert cli.socket is None
+
+
+def test_total_timeout_partial_transfer(stalled):
+    partial = b'<get_tasks_response status="200" status_text="OK"><task>'
+    cli = unix_client(stalled(partial))
+    with cli.deadline(ttfb=0.5, total=0.2):
+        with pytest.raises(exceptions.RequestTimeout) as error:
+            cli.list_tasks()
+    assert error.value.phase == "total"
+    assert error.value.bytes_received == len(partial)
+    assert cli.timeouts is None
+
+
+def test_handshake_timeout():
+    # accepts connections, but never answers the TLS client hello
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    try:
+        transport = TLSTransport("127.0.0.1", listener.getsockname()[1])
+        with pytest.raises(exceptions.RequestTimeout) as error:
+            transport.connect(Timeouts(connect=1, handshake=0.1))
+        assert error.value.phase == "handshake"
+    finally:
+        listener.close()
+
+
+def test_timeout_retry_and_recovery():
+    with FakeManager(latency=0.3) as manager:
+        with Client(manager.host, username="admin", password="admin",
+                    port=manager.port, retries=1,
+                    timeouts=Timeouts(connect=5, handshake=5)) as cli:
+            with cli.deadline(ttfb=0.1):
+                with pytest.raises(exceptions.RequestTimeout):
+                    cli.list_tasks()
+            # retried once on a new connection
+            assert cli.reconnects == 1
+
+            with cli.deadline(total=0.1):
+                with pytest.raises(exceptions.RequestTimeout) as error:
+                    cli.list_tasks()
+            assert error.value.phase == "total"
+
+            # the next command reconnects
+            assert cli.list_tasks().ok
+
+        async def run():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port,
+                                   retries=0) as cli:
+                with cli.deadline(ttfb=0.1):
+                    with pytest.raises(exceptions.RequestTimeout) as error:
+                        await cli.list_tasks()
+                assert error.value.phase == "ttfb"
+                assert not cli.is_alive()
+                return (await cli.list_tasks()).ok
+
+        assert asyncio.run(run())
+
+
+def test_timeout_within_context_manager():
+    with FakeManager(latency=0.3) as manager:
+        with pytest.raises(exceptions.RequestTimeout):
+            with Client(manager.host, username="admin", password="admin",
+                        port=manager.port) as cli:
+                with cli.deadline(ttfb=0.05):
+                    cli.create_target("target", "127.0.0.1")
+        assert cli.socket is None
+
+        async def run():
+            async with AsyncClient(manager.host, username="admin",
+                                   password="admin", port=manager.port) as cli:
+                with cli.deadline(ttfb=0.05):
+                    await cli.create_target("target", "127.0.0.1")
+
+        with pytest.raises(exceptions.RequestTimeout):
+            asyncio.run(run())
@@ -69,3 +69,64 @@ def test_lxml_to_dict():
 
     with pytest.raises(TypeError):
         utils.lxml_to_dict(1)
+
+
+def test_lxml_to_dict_shapes():
+    tree = etree.fromstring(
+        '<get_tasks_response status="200">\n'
+        '  <task id="1"><name>one</name><tag>a</tag><tag>b</tag>'
+        '<empty/><text_only>  padded  </text_only>'
+        '<attr_text unit="s">5</attr_text>'
+        '<nested><inner><leaf>x</leaf></inner><inner/></nested></task>\n'
+        '  <task id="2">text<child/></task>\n'
+        '</get_tasks_response>')
+
+    result = utils.lxml_to_dict(tree)
+
+    assert result == {"get_tasks_response": {
+        "@status": "200",
+        "#text": "",
+        "task": [
+            {
+                "@id": "1",
+                "name": "one",
+                "tag": ["a", "b"],
+                "empty": None,
+                "text_only": "padded",
+                "attr_text": {"@unit": "s", "#text": "5"},
+                "nested": {"inner": [{"leaf": "x"}, None]},
+            },
+            {"@id": "2", "#text": "text", "child": None},
+        ],
+    }}
+
+    task = tree.find("task")
+    assert utils.lxml_to_dict(task, strip_root=True) == \
+        result["get_tasks_response"]["task"][0]
+    assert utils.lxml_to_dict(etree.Element("leaf")) == {"leaf": None}
+
+
+def test_dict_to_lxml_repeated_elements():
+    result = utils.dict_to_lxml("tasks", {"task": [{"@id": "1"}, "two"]})
+    tasks = result.findall("task")
+    assert [t.get("id") for t in tasks] == ["1", None]
+    assert tasks[1].text == "two"
+
+
+def test_dict_target():
+    document = (
+        b'<get_tasks_response status="200">\n'
+        b'  <task id="1"><name>one</name><tag>a</tag><tag>b</tag>'
+        b'<empty/><blank>  </blank><attr_text unit="s">5</attr_text>'
+        b'<nested><inner><leaf>x</leaf></inner><inner/></nested></task>\n'
+        b'  <task id="2">te<![CDATA[xt]]><child/>tail</task>\n'
+        b'</get_tasks_response>')
+
+    target = utils.DictTarget()
+    parser = etree.XMLParser(target=target)
+    for i in range(0, len(document), 5):
+        assert not target.done
+        parser.feed(document[i:i + 5])
+    assert target.done
+
+    assert parser.close() == utils.lxml_to_dict(etree.fromstring(document))
@@ -0,0 +1,90 @@
+# -*- encoding: utf-8 -*-
+"""
+Tests for pyvas wait_for_tasks
+==============================
+"""
+from __future__ import unicode_literals
+
+import pytest
+from lxml import etree
+
+from pyvas import Client, exceptions
+
+from conftest import SocketStandIn
+
+
+class TaskSocket(SocketStandIn):
+    """Socket stand-in advancing every task's progress on each get_tasks."""
+
+    def __init__(self, steps):
+        super(TaskSocket, self).__init__()
+        # uuid -> list of (status, progress) returned on successive polls
+        self.steps = steps
+        self.filters = []
+
+    def handle(self, request):
+        assert request.tag == "get_tasks"
+        self.filters.append(request.get("filter"))
+        response = etree.Element("get_tasks_response", status="200",
+                                 status_text="OK")
+        for uuid, steps in sorted(self.steps.items()):
+            if "uuid={}".format(uuid) not in request.get("filter"):
+                continue
+            status, progress = steps.pop(0) if len(steps) > 1 else steps[0]
+            task = etree.SubElement(response, "task", id=uuid)
+            etree.SubElement(task, "status").text = status
+            etree.SubElement(task, "progress").text = str(progress)
+        return response
+
+
+@pytest.fixture()
+def client(parse_mode, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("pyvas.client.time.sleep", sleeps.append)
+    cli = Client("localhost", parse_mode=parse_mode)
+    cli.sleeps = sleeps
+    return cli
+
+
+def test_wait_for_tasks(client):
+    client.socket = TaskSocket({
+        "a": [("Running", 10), ("Running", 50), ("Done", -1)],
+        "b": [("Running", 10), ("Stopped", -1)],
+    })
+    seen = []
+    finished = client.wait_for_tasks(
+        ["a", "b", "gone"], on_progress=lambda *args: seen.append(args))
+
+    assert finished["a"]["status"] == "Done"
+    assert finished["b"]["status"] == "Stopped"
+    assert finished["gone"] is None
+    assert seen[:2] == [("a", "Running", 10), ("b", "Running", 10)]
+
+    # one request per cycle, only for tasks still running
+    filters = client.socket.filters
+    assert len(filters) == 3
+    assert "uuid=b" not in filters[2]
+    assert len(client.sleeps) == 2
+
+
+def test_wait_for_tasks_records(client):
+    client.records = True
+    client.socket = TaskSocket({"a": [("Running", 10), ("Done", -1)]})
+    finished = client.wait_for_tasks(["a"])
+    assert finished["a"]["status"] == "Done"
+
+
+def test_wait_for_tasks_backoff(client):
+    client.socket = TaskSocket({
+        "a": [("Running", 10)] * 4 + [("Running", 95), ("Done", -1)],
+    })
+    client.wait_for_tasks(["a"], min_interval=1, max_interval=4)
+    # no progress doubles the interval up to max, near done resets it
+    assert client.sleeps == [1, 2, 4, 4, 1]
+
+
+def test_wait_for_tasks_timeout(client):
+    client.socket = TaskSocket({"a": [("Running", 10)]})
+    with pytest.raises(exceptions.WaitTimeout) as info:
+        client.wait_for_tasks(["a"], timeout=0)
+    assert info.value.pending == ["a"]